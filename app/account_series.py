@@ -0,0 +1,92 @@
+"""
+Account equity/margin time series. A background sampler reads account_info
+every ACCOUNT_SAMPLE_INTERVAL seconds (one MT5 worker job) and records
+FIELDS into a fixed-size numpy ring buffer of ACCOUNT_SAMPLE_CAPACITY rows,
+so chart readers are served from memory without touching the terminal.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+import MetaTrader5 as mt5
+import numpy as np
+
+from mt5_worker import run_mt5
+
+logger = logging.getLogger(__name__)
+
+INTERVAL = float(os.environ.get('ACCOUNT_SAMPLE_INTERVAL', 5.0))
+CAPACITY = int(os.environ.get('ACCOUNT_SAMPLE_CAPACITY', 17280))
+FIELDS = ('balance', 'equity', 'margin', 'margin_free', 'margin_level')
+
+_time_msc = np.zeros(CAPACITY, dtype=np.int64)
+_values = np.zeros((CAPACITY, len(FIELDS)), dtype=np.float64)
+_next = 0
+_count = 0
+_lock = threading.Lock()
+_sampler: Optional[threading.Thread] = None
+
+
+def record(info) -> None:
+    """Append one account_info sample to the ring buffer."""
+    global _next, _count
+    row = [getattr(info, field) for field in FIELDS]
+    with _lock:
+        _time_msc[_next] = int(time.time() * 1000)
+        _values[_next] = row
+        _next = (_next + 1) % CAPACITY
+        _count = min(_count + 1, CAPACITY)
+
+
+def _ordered():
+    """Copies of the stored samples, oldest first."""
+    with _lock:
+        if _count < CAPACITY:
+            return _time_msc[:_count].copy(), _values[:_count].copy()
+        return np.roll(_time_msc, -_next), np.roll(_values, -_next, axis=0)
+
+
+def series(from_msc: Optional[int] = None, to_msc: Optional[int] = None, points: Optional[int] = None) -> dict:
+    """
+    Columnar samples within [from_msc, to_msc]. With points, the range is cut
+    into that many equal time buckets and the last sample of each non-empty
+    bucket is kept.
+    """
+    times, values = _ordered()
+    lo = 0 if from_msc is None else np.searchsorted(times, from_msc, side='left')
+    hi = len(times) if to_msc is None else np.searchsorted(times, to_msc, side='right')
+    times, values = times[lo:hi], values[lo:hi]
+    if points and len(times) > points:
+        edges = np.linspace(times[0], times[-1], points + 1)[1:-1]
+        buckets = np.searchsorted(edges, times, side='right')
+        last = np.flatnonzero(np.diff(buckets, append=buckets[-1] + 1))
+        times, values = times[last], values[last]
+    result = {"time_msc": times.tolist()}
+    for i, field in enumerate(FIELDS):
+        result[field] = values[:, i].tolist()
+    return result
+
+
+def _sample_loop() -> None:
+    while True:
+        started = time.monotonic()
+        try:
+            info = run_mt5(mt5.account_info, timeout=10)
+            if info is not None:
+                record(info)
+            else:
+                logger.error(f"Account sampler: account_info failed: {run_mt5(mt5.last_error)}")
+        except Exception as e:
+            logger.error(f"Account sampler: {e}")
+        time.sleep(max(0.0, INTERVAL - (time.monotonic() - started)))
+
+
+def start_account_sampler() -> None:
+    """Start the background account sampler thread (idempotent)."""
+    global _sampler
+    with _lock:
+        if _sampler is None:
+            _sampler = threading.Thread(target=_sample_loop, daemon=True)
+            _sampler.start()
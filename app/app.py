@@ -7,6 +7,10 @@ from flasgger import Swagger
 from werkzeug.middleware.proxy_fix import ProxyFix
 from swagger import swagger_config
 from mt5_worker import start_worker
+from responses import compress_response
+from quotes import start_tick_poller
+from symbols import start_symbol_catalog
+from account_series import start_account_sampler
 
 # Import routes
 from routes.health import health_bp
@@ -17,6 +21,10 @@ from routes.order import order_bp
 from routes.history import history_bp
 from routes.error import error_bp
 from routes.account import account_bp
+from routes.stream import stream_bp
+from routes.market_book import market_book_bp
+from routes.trade_events import trade_events_bp
+from routes.trailing import trailing_bp
 
 load_dotenv()
 logger = logging.getLogger(__name__)
@@ -35,11 +43,24 @@ app.register_blueprint(order_bp)
 app.register_blueprint(history_bp)
 app.register_blueprint(error_bp)
 app.register_blueprint(account_bp)
+app.register_blueprint(stream_bp)
+app.register_blueprint(market_book_bp)
+app.register_blueprint(trade_events_bp)
+app.register_blueprint(trailing_bp)
+
+# Negotiated gzip/zstd for JSON responses not served from a cached Payload
+app.after_request(compress_response)
 
 app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
 
 # Start MT5 worker thread so all MT5 calls run serially
 start_worker()
+# Background tick poller feeding the latest-quote table
+start_tick_poller()
+# Symbol catalog (contract specs) loaded once and refreshed on a slow schedule
+start_symbol_catalog()
+# Account balance/equity/margin samples for /account_history
+start_account_sampler()
 
 if __name__ == '__main__':
     if not mt5.initialize():
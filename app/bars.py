@@ -0,0 +1,261 @@
+"""
+Live forming bars. For every tracked (symbol, timeframe) the current candle
+is built in memory from the polled tick stream (bid prices, as MT5 builds its
+bars) and reconciled with copy_rates_from_pos when a bar closes. Tracked
+pairs come from /stream subscriptions and from fetch_data_pos requests that
+returned rates (dropped after BAR_IDLE_SECONDS without one; at most
+BAR_MAX_REQUESTED pairs, for symbols in the loaded catalog). The forming bar is merged into
+fetch_data_pos responses and published to the stream hub as "bar" events;
+the bar that just closed is re-published with its reconciled values.
+
+Between reconciliations tick_volume only counts ticks seen by the poller.
+Bars are tuples in rates field order (FIELDS) and are replaced whole.
+"""
+import calendar
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+import MetaTrader5 as mt5
+
+from lib import get_timeframe
+from mt5_worker import run_mt5
+from serialize import http_dates
+import quotes
+import stream
+import symbols
+
+logger = logging.getLogger(__name__)
+
+IDLE_SECONDS = float(os.environ.get('BAR_IDLE_SECONDS', 300))
+MAX_REQUESTED = int(os.environ.get('BAR_MAX_REQUESTED', 200))
+FIELDS = ('time', 'open', 'high', 'low', 'close', 'tick_volume', 'spread', 'real_volume')
+PERIOD_SECONDS = {
+    "M1": 60,
+    "M5": 300,
+    "M15": 900,
+    "M30": 1800,
+    "H1": 3600,
+    "H4": 14400,
+    "D1": 86400,
+}
+_WEEK_SECONDS = 7 * 86400
+# Weekly bars open on Sunday; 1970-01-04 was the first Sunday after the epoch
+_FIRST_SUNDAY = 3 * 86400
+
+_subscriptions: Dict[Tuple[str, str], int] = {}
+_requested: Dict[Tuple[str, str], float] = {}
+_tracked: set = set()
+_pending: set = set()
+_forming: Dict[Tuple[str, str], tuple] = {}
+_closed: Dict[Tuple[str, str], tuple] = {}
+_lock = threading.Lock()
+_wakeup = threading.Event()
+_builder: Optional[threading.Thread] = None
+
+
+def bar_start(timeframe: str, t: int) -> int:
+    """Open time of the bar containing server time t."""
+    if timeframe == "MN1":
+        d = datetime.fromtimestamp(t, timezone.utc)
+        return calendar.timegm((d.year, d.month, 1, 0, 0, 0))
+    if timeframe == "W1":
+        return t - (t - _FIRST_SUNDAY) % _WEEK_SECONDS
+    return t - t % PERIOD_SECONDS[timeframe]
+
+
+def _publish(key: Tuple[str, str], bar: tuple) -> None:
+    symbol, timeframe = key
+    topic = ("bar", symbol, timeframe)
+    if stream.has_subscribers(topic):
+        record = dict(zip(FIELDS, bar), time=http_dates([bar[0]])[0], symbol=symbol, timeframe=timeframe)
+        stream.publish(topic, "bar", record)
+
+
+def _apply_tick(key: Tuple[str, str], tick: dict) -> None:
+    price = tick['bid']
+    if not price:
+        return
+    start = bar_start(key[1], tick['time'])
+    with _lock:
+        bar = _forming.get(key)
+        if bar is None or start < bar[0]:
+            return
+        if start == bar[0]:
+            bar = (bar[0], bar[1], max(bar[2], price), min(bar[3], price), price, bar[5] + 1, bar[6], bar[7])
+        else:
+            # Bar closed: keep the provisional close until MT5 confirms it
+            _closed[key] = bar
+            info = symbols.get(key[0])
+            point = info.get('point') if info else None
+            spread = int(round((tick['ask'] - price) / point)) if point else bar[6]
+            bar = (start, price, price, price, price, 1, spread, 0)
+            _pending.add(key)
+            _wakeup.set()
+        _forming[key] = bar
+    _publish(key, bar)
+
+
+def _on_ticks(changed: Dict[str, dict]) -> None:
+    for key in list(_tracked):
+        tick = changed.get(key[0])
+        if tick is not None:
+            _apply_tick(key, tick)
+
+
+def _reconcile(key: Tuple[str, str], rates) -> None:
+    """Replace in-memory bars with MT5's last two bars (seed or bar close)."""
+    rows = rates.tolist()
+    with _lock:
+        if key not in _tracked:
+            return
+        forming = _forming.get(key)
+        if forming is not None and forming[0] > rows[-1][0]:
+            # Ticks moved on while MT5 was read: its last bar is our closed one
+            closed, forming = rows[-1], forming
+        else:
+            closed, forming = (rows[-2] if len(rows) > 1 else None), rows[-1]
+        if closed is not None:
+            _closed[key] = closed
+        _forming[key] = forming
+    if closed is not None:
+        _publish(key, closed)
+    _publish(key, forming)
+
+
+def _fetch_bars(keys) -> dict:
+    """Runs on the MT5 worker: last two bars per (symbol, timeframe)."""
+    bars = {}
+    for symbol, timeframe in keys:
+        rates = mt5.copy_rates_from_pos(symbol, get_timeframe(timeframe), 0, 2)
+        if rates is not None and len(rates):
+            bars[(symbol, timeframe)] = rates
+    return bars
+
+
+def _sync_tracking() -> None:
+    """Start/stop tracking pairs as subscriptions and fetch_data_pos interest change."""
+    now = time.monotonic()
+    with _lock:
+        for key, last_read in list(_requested.items()):
+            if now - last_read > IDLE_SECONDS:
+                del _requested[key]
+        wanted = set(_subscriptions).union(_requested)
+        started = wanted - _tracked
+        stopped = _tracked - wanted
+        for key in stopped:
+            _tracked.discard(key)
+            _pending.discard(key)
+            _forming.pop(key, None)
+            _closed.pop(key, None)
+        _tracked.update(started)
+        _pending.update(started)
+    for symbol, _ in started:
+        quotes.subscribe(symbol)
+    for symbol, _ in stopped:
+        quotes.unsubscribe(symbol)
+
+
+def _build_loop() -> None:
+    while True:
+        _wakeup.wait(timeout=1.0)
+        _wakeup.clear()
+        _sync_tracking()
+        with _lock:
+            pending = list(_pending)
+            _pending.clear()
+        if not pending:
+            continue
+        try:
+            for key, rates in run_mt5(lambda: _fetch_bars(pending), timeout=10).items():
+                _reconcile(key, rates)
+        except Exception as e:
+            logger.error(f"Bar builder: {e}")
+            with _lock:
+                _pending.update(key for key in pending if key in _tracked)
+            time.sleep(1.0)
+
+
+def _ensure_builder() -> None:
+    global _builder
+    with _lock:
+        if _builder is None:
+            _builder = threading.Thread(target=_build_loop, daemon=True)
+            _builder.start()
+    _wakeup.set()
+
+
+def subscribe(symbol: str, timeframe: str) -> None:
+    """Track bars for (symbol, timeframe) until a matching unsubscribe(). Raises ValueError on a bad timeframe."""
+    get_timeframe(timeframe)
+    key = (symbol, timeframe.upper())
+    with _lock:
+        _subscriptions[key] = _subscriptions.get(key, 0) + 1
+    _ensure_builder()
+
+
+def unsubscribe(symbol: str, timeframe: str) -> None:
+    key = (symbol, timeframe.upper())
+    with _lock:
+        count = _subscriptions.get(key, 0) - 1
+        if count > 0:
+            _subscriptions[key] = count
+        else:
+            _subscriptions.pop(key, None)
+    _wakeup.set()
+
+
+def track(symbol: str, timeframe: str) -> None:
+    """
+    Mark the pair as requested so it starts/keeps being tracked. Call only
+    once rates were read for it; pairs whose symbol is missing from the
+    loaded catalog, or beyond BAR_MAX_REQUESTED, are ignored.
+    """
+    key = (symbol, timeframe.upper())
+    with _lock:
+        if key in _requested:
+            _requested[key] = time.monotonic()
+            return
+        if len(_requested) >= MAX_REQUESTED or (symbols.is_loaded() and symbols.get(symbol) is None):
+            return
+        _requested[key] = time.monotonic()
+    _ensure_builder()
+
+
+def live_bars(symbol: str, timeframe: str) -> Optional[tuple]:
+    """
+    Return (last closed bar, forming bar) for the pair, or None while it is not
+    tracked. Keeps an already requested pair tracked; see track().
+    """
+    key = (symbol, timeframe.upper())
+    with _lock:
+        if key in _requested:
+            _requested[key] = time.monotonic()
+    forming = _forming.get(key)
+    if forming is None:
+        return None
+    return _closed.get(key), forming
+
+
+def merge(rates, live: Optional[tuple]):
+    """Return rates with the in-memory closed/forming bars merged into the tail (same length)."""
+    if live is None or len(rates) == 0:
+        return rates
+    closed, forming = live
+    last_time = int(rates['time'][-1])
+    if forming[0] < last_time:
+        return rates
+    merged = rates.copy()
+    if forming[0] > last_time:
+        # The array's forming bar has closed since it was fetched
+        merged[:-1] = rates[1:]
+        if closed is not None and closed[0] == last_time:
+            merged[-2] = closed
+    merged[-1] = forming
+    return merged
+
+
+quotes.add_listener(_on_ticks)
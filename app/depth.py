@@ -0,0 +1,216 @@
+"""
+Market depth (DOM) for subscribed symbols. A background refresher keeps
+market_book_add/release in step with the subscribed set and snapshots
+market_book_get for all of them in one MT5 worker job per cycle. Snapshots
+are stored as compact parallel arrays per side; level changes are published
+to the stream hub as diffs, so many readers share one MT5 poll. Reads are
+numbered on the worker and stored in that order under one lock, whichever
+thread ran them, so seq never repeats and diffs are against the previous
+read.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+import MetaTrader5 as mt5
+
+from mt5_worker import run_mt5
+import stream
+import symbols as catalog
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = float(os.environ.get('BOOK_POLL_INTERVAL', 0.2))
+IDLE_SECONDS = float(os.environ.get('BOOK_IDLE_SECONDS', 60))
+MAX_REQUESTED = int(os.environ.get('BOOK_MAX_REQUESTED', 50))
+
+_BID_TYPES = (getattr(mt5, 'BOOK_TYPE_BUY', 2), getattr(mt5, 'BOOK_TYPE_BUY_MARKET', 4))
+
+_pins: Dict[str, int] = {}
+_requested: Dict[str, float] = {}
+_added: set = set()
+_books: Dict[str, dict] = {}
+_lock = threading.Lock()
+# Serialises _store (snapshot, seq, diff and publish); _stored_read: symbol -> read number in _books
+_store_lock = threading.Lock()
+_stored_read: Dict[str, int] = {}
+_reads = 0
+_wakeup = threading.Event()
+_refresher: Optional[threading.Thread] = None
+
+
+def _snapshot(symbol: str, levels) -> dict:
+    """Compact snapshot: bids best-first (descending), asks best-first (ascending)."""
+    bids = sorted(((l.price, l.volume_dbl) for l in levels if l.type in _BID_TYPES), reverse=True)
+    asks = sorted((l.price, l.volume_dbl) for l in levels if l.type not in _BID_TYPES)
+    previous = _books.get(symbol)
+    return {
+        "symbol": symbol,
+        "seq": previous["seq"] + 1 if previous else 1,
+        "time_msc": int(time.time() * 1000),
+        "bids": {"price": [p for p, _ in bids], "volume": [v for _, v in bids]},
+        "asks": {"price": [p for p, _ in asks], "volume": [v for _, v in asks]},
+    }
+
+
+def _side_diff(old: dict, new: dict) -> List[list]:
+    """[[price, volume], ...] for changed levels; volume 0 means the level was removed."""
+    old_levels = dict(zip(old["price"], old["volume"]))
+    new_levels = dict(zip(new["price"], new["volume"]))
+    changes = [[p, v] for p, v in new_levels.items() if old_levels.get(p) != v]
+    changes.extend([p, 0.0] for p in old_levels if p not in new_levels)
+    return changes
+
+
+def _sync_and_read(active: List[str]) -> dict:
+    """
+    Runs on the MT5 worker: add/release books to match active, then read them
+    all. Symbols whose market_book_add fails are dropped from the requested
+    set (pins are left to subscribe()).
+    """
+    global _reads
+    _reads += 1
+    failed = []
+    for symbol in set(active) - _added:
+        if mt5.market_book_add(symbol):
+            _added.add(symbol)
+        else:
+            logger.error(f"market_book_add failed for {symbol}: {mt5.last_error()}")
+            failed.append(symbol)
+    released = []
+    for symbol in _added - set(active):
+        mt5.market_book_release(symbol)
+        _added.discard(symbol)
+        released.append(symbol)
+    books = {}
+    for symbol in active:
+        if symbol in _added:
+            levels = mt5.market_book_get(symbol)
+            if levels is not None:
+                books[symbol] = levels
+    if failed:
+        with _lock:
+            for symbol in failed:
+                _requested.pop(symbol, None)
+    return {"read": _reads, "books": books, "released": released}
+
+
+def _store(result: dict) -> None:
+    """Store one _sync_and_read result unless a later read of the symbol is already stored."""
+    read = result["read"]
+    with _store_lock:
+        for symbol in result["released"]:
+            if _stored_read.get(symbol, 0) < read:
+                _stored_read[symbol] = read
+                _books.pop(symbol, None)
+        for symbol, levels in result["books"].items():
+            if _stored_read.get(symbol, 0) >= read:
+                continue
+            _stored_read[symbol] = read
+            snapshot = _snapshot(symbol, levels)
+            previous = _books.get(symbol)
+            _books[symbol] = snapshot
+            if previous is not None and stream.has_subscribers(("book", symbol)):
+                bids = _side_diff(previous["bids"], snapshot["bids"])
+                asks = _side_diff(previous["asks"], snapshot["asks"])
+                if bids or asks:
+                    stream.publish(("book", symbol), "book", {
+                        "symbol": symbol, "seq": snapshot["seq"], "time_msc": snapshot["time_msc"],
+                        "bids": bids, "asks": asks,
+                    })
+
+
+def _active_symbols() -> List[str]:
+    now = time.monotonic()
+    with _lock:
+        for symbol, last_read in list(_requested.items()):
+            if now - last_read > IDLE_SECONDS:
+                del _requested[symbol]
+        return list(set(_pins).union(_requested))
+
+
+def _refresh_loop() -> None:
+    while True:
+        active = _active_symbols()
+        if not active and not _added:
+            _wakeup.wait()
+            _wakeup.clear()
+            continue
+        started = time.monotonic()
+        try:
+            _store(run_mt5(lambda: _sync_and_read(active), timeout=10))
+        except Exception as e:
+            logger.error(f"Market book refresher: {e}")
+        time.sleep(max(0.0, POLL_INTERVAL - (time.monotonic() - started)))
+
+
+def _ensure_refresher() -> None:
+    global _refresher
+    with _lock:
+        if _refresher is None:
+            _refresher = threading.Thread(target=_refresh_loop, daemon=True)
+            _refresher.start()
+    _wakeup.set()
+
+
+def subscribe(symbols: List[str]) -> Dict[str, bool]:
+    """
+    Pin symbols' books until a matching unsubscribe(). market_book_add runs now
+    (one worker job) so failures are reported; failed symbols are not pinned.
+    """
+    with _lock:
+        for symbol in symbols:
+            _pins[symbol] = _pins.get(symbol, 0) + 1
+    active = _active_symbols()
+    try:
+        _store(run_mt5(lambda: _sync_and_read(active)))
+    except Exception:
+        unsubscribe(symbols)
+        raise
+    results = {symbol: symbol in _added for symbol in symbols}
+    failed = [symbol for symbol, ok in results.items() if not ok]
+    if failed:
+        unsubscribe(failed)
+    _ensure_refresher()
+    return results
+
+
+def unsubscribe(symbols: List[str]) -> None:
+    """Release pins; books no longer used are released on the next refresh."""
+    with _lock:
+        for symbol in symbols:
+            count = _pins.get(symbol, 0) - 1
+            if count > 0:
+                _pins[symbol] = count
+            else:
+                _pins.pop(symbol, None)
+
+
+def latest(symbol: str) -> Optional[dict]:
+    """Latest stored snapshot for symbol, without subscribing."""
+    return _books.get(symbol)
+
+
+def get_book(symbol: str) -> Optional[dict]:
+    """
+    Latest snapshot for symbol. An unsubscribed symbol is added and read now,
+    then kept refreshed until unread for BOOK_IDLE_SECONDS. Symbols missing
+    from the loaded catalog, beyond BOOK_MAX_REQUESTED or without a book
+    (market_book_add failed) return None and are not kept.
+    """
+    with _lock:
+        if symbol in _requested or symbol in _pins:
+            _requested[symbol] = time.monotonic()
+        elif len(_requested) < MAX_REQUESTED and (not catalog.is_loaded() or catalog.get(symbol) is not None):
+            _requested[symbol] = time.monotonic()
+        else:
+            return None
+    book = _books.get(symbol)
+    if book is None:
+        active = _active_symbols()
+        _store(run_mt5(lambda: _sync_and_read(active)))
+        _ensure_refresher()
+        book = _books.get(symbol)
+    return book
@@ -0,0 +1,72 @@
+"""
+Memoized ORDER_FILLING_* resolution per (symbol, market or pending), shared
+by order placement and position closes. Brokers may accept different modes
+for market deals and pending orders, so the two are learned separately. The
+first choice comes from the catalog's filling_mode bitmask; when order_send
+rejects a mode with TRADE_RETCODE_INVALID_FILL the next candidate is tried
+in the same worker job and the mode that worked is remembered, so later
+requests skip both the lookup and the failed round trip.
+"""
+import logging
+from typing import Dict, List, Tuple
+
+import MetaTrader5 as mt5
+
+import symbols
+
+logger = logging.getLogger(__name__)
+
+# SYMBOL_FILLING_* (bitmask) → ORDER_FILLING_* for order_send (broker-dependent)
+_SYMBOL_TO_ORDER_FILLING = (
+    (getattr(mt5, 'SYMBOL_FILLING_RETURN', 4), mt5.ORDER_FILLING_RETURN),
+    (getattr(mt5, 'SYMBOL_FILLING_IOC', 2), mt5.ORDER_FILLING_IOC),
+    (getattr(mt5, 'SYMBOL_FILLING_FOK', 1), mt5.ORDER_FILLING_FOK),
+)
+_ALL_MODES = tuple(order_filling for _, order_filling in _SYMBOL_TO_ORDER_FILLING)
+_INVALID_FILL = getattr(mt5, 'TRADE_RETCODE_INVALID_FILL', 10030)
+
+_modes: Dict[Tuple[str, bool], int] = {}
+
+
+def _allowed(symbol: str) -> List[int]:
+    """ORDER_FILLING_* modes the catalog says symbol supports, in preference order."""
+    info = symbols.get_or_load(symbol)
+    mode = info.get('filling_mode', 0) if info else 0
+    return [order_filling for sym_flag, order_filling in _SYMBOL_TO_ORDER_FILLING if mode & sym_flag]
+
+
+def resolve(symbol: str, is_market: bool = True) -> int:
+    """Filling mode for market (or pending) orders on symbol: the remembered one, else the catalog's first allowed mode."""
+    key = (symbol, is_market)
+    mode = _modes.get(key)
+    if mode is None:
+        allowed = _allowed(symbol)
+        mode = _modes[key] = allowed[0] if allowed else mt5.ORDER_FILLING_RETURN
+    return mode
+
+
+def _candidates(symbol: str, is_market: bool) -> List[int]:
+    first = resolve(symbol, is_market)
+    ordered = [first] + _allowed(symbol) + list(_ALL_MODES)
+    return list(dict.fromkeys(ordered))
+
+
+def order_send(request: dict):
+    """
+    Runs on the MT5 worker: order_send with the symbol's filling mode, falling
+    back through the other modes on TRADE_RETCODE_INVALID_FILL and remembering
+    the one that was accepted. request["type_filling"] is set to the mode used.
+    """
+    symbol = request["symbol"]
+    key = (symbol, request["action"] == mt5.TRADE_ACTION_DEAL)
+    result = None
+    for mode in _candidates(*key):
+        request["type_filling"] = mode
+        result = mt5.order_send(request)
+        if result is None or result.retcode != _INVALID_FILL:
+            if result is not None and _modes.get(key) != mode:
+                logger.info(f"Filling mode for {symbol} ({'market' if key[1] else 'pending'}) learned: {mode}")
+                _modes[key] = mode
+            return result
+        logger.warning(f"Filling mode {mode} rejected for {symbol}; trying the next one")
+    return result
@@ -0,0 +1,71 @@
+"""
+Idempotency keys for order submission. The first request with a key owns it
+and runs; concurrent or later requests with the same key wait for and replay
+the owner's stored response instead of sending another order. Only 2xx/4xx
+responses are stored: after a 5xx the owner abandons the key, so a retry
+runs again. Entries live for IDEMPOTENCY_TTL seconds; at most
+IDEMPOTENCY_MAX_KEYS completed entries are kept (oldest evicted first,
+in-flight entries are never evicted).
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+TTL = float(os.environ.get('IDEMPOTENCY_TTL', 86400))
+MAX_KEYS = int(os.environ.get('IDEMPOTENCY_MAX_KEYS', 10000))
+
+_entries: "OrderedDict[str, dict]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def fingerprint(data) -> str:
+    """Stable digest of a request body, to detect a key reused for a different request."""
+    return hashlib.blake2b(json.dumps(data, sort_keys=True, default=str).encode(), digest_size=16).hexdigest()
+
+
+def _purge(now: float) -> None:
+    for key in list(_entries):
+        entry = _entries[key]
+        if now - entry["created"] <= TTL and len(_entries) <= MAX_KEYS:
+            break
+        if entry["response"] is None:
+            continue
+        del _entries[key]
+
+
+def begin(key: str, digest: str) -> Tuple[dict, bool]:
+    """Return (entry, owner). owner is True when this call created the entry and must complete() it."""
+    now = time.monotonic()
+    with _lock:
+        _purge(now)
+        entry = _entries.get(key)
+        if entry is not None and now - entry["created"] <= TTL:
+            return entry, False
+        entry = {"created": now, "digest": digest, "response": None, "done": threading.Event()}
+        _entries[key] = entry
+        _entries.move_to_end(key)
+        return entry, True
+
+
+def complete(entry: dict, response: Tuple[bytes, int]) -> None:
+    """Store the owner's (body, status) and release waiting requests."""
+    entry["response"] = response
+    entry["done"].set()
+
+
+def abandon(key: str, entry: dict) -> None:
+    """Forget an entry whose owner failed before producing a response (waiters get None)."""
+    with _lock:
+        if _entries.get(key) is entry:
+            del _entries[key]
+    entry["done"].set()
+
+
+def wait(entry: dict, timeout: float) -> Optional[Tuple[bytes, int]]:
+    """The stored (body, status) once the owner completes, or None on timeout/abandon."""
+    entry["done"].wait(timeout)
+    return entry["response"]
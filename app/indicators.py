@@ -0,0 +1,267 @@
+"""
+Technical indicators computed with numpy over MT5 rate arrays (the structured
+arrays returned by copy_rates_*). Results are memoized per
+(symbol, timeframe, indicator, params, last bar time). Recursive indicators
+(EMA, RSI, ATR) keep their smoothing state for closed bars and extend it as
+new bars arrive instead of recomputing the whole series. Both stores keep
+the INDICATOR_CACHE_KEYS most recently used entries.
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# name -> (parameter types, default values for trailing optional parameters)
+INDICATOR_PARAMS = {
+    "sma": ((int,), ()),
+    "ema": ((int,), ()),
+    "rsi": ((int,), ()),
+    "atr": ((int,), ()),
+    "bbands": ((int, float), (2.0,)),
+}
+MAX_PERIOD = 5000
+# Closed-bar history kept per recursive indicator; longer windows reseed.
+MAX_HISTORY = 100000
+MAX_KEYS = int(os.environ.get('INDICATOR_CACHE_KEYS', 256))
+
+_memo: "OrderedDict[tuple, tuple]" = OrderedDict()
+_history: "OrderedDict[tuple, tuple]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def _lookup(store: OrderedDict, key: tuple):
+    with _lock:
+        entry = store.get(key)
+        if entry is not None:
+            store.move_to_end(key)
+        return entry
+
+
+def _store(store: OrderedDict, key: tuple, entry: tuple) -> None:
+    with _lock:
+        store[key] = entry
+        store.move_to_end(key)
+        while len(store) > MAX_KEYS:
+            store.popitem(last=False)
+
+
+def parse_specs(specs: str) -> List[Tuple[str, tuple]]:
+    """
+    Parse an indicator list such as "sma:20,ema:50,bbands:20:2".
+    Raises ValueError on unknown indicators or bad parameters.
+    """
+    parsed = []
+    for raw in specs.split(','):
+        raw = raw.strip()
+        if not raw:
+            continue
+        name, *args = [part.strip() for part in raw.lower().split(':')]
+        if name not in INDICATOR_PARAMS:
+            valid = ', '.join(INDICATOR_PARAMS)
+            raise ValueError(f"Invalid indicator: '{name}'. Valid options are: {valid}.")
+        types, defaults = INDICATOR_PARAMS[name]
+        required = len(types) - len(defaults)
+        if not required <= len(args) <= len(types):
+            raise ValueError(f"Indicator '{name}' takes {required} to {len(types)} parameters.")
+        try:
+            params = tuple(t(a) for t, a in zip(types, args)) + defaults[len(args) - required:]
+        except ValueError:
+            raise ValueError(f"Invalid parameters for indicator '{raw}'.")
+        if not 1 <= params[0] <= MAX_PERIOD:
+            raise ValueError(f"Indicator period must be between 1 and {MAX_PERIOD}.")
+        parsed.append((name, params))
+    if not parsed:
+        raise ValueError("At least one indicator is required.")
+    return parsed
+
+
+def output_names(name: str, params: tuple) -> List[str]:
+    """Response keys for an indicator, e.g. ema_20 or bbands_20_2_upper."""
+    base = '_'.join([name] + [format(p, 'g') for p in params])
+    if name == "bbands":
+        return [f"{base}_upper", f"{base}_middle", f"{base}_lower"]
+    return [base]
+
+
+# --- windowed indicators (vectorized over the full window) ---
+
+def _rolling_sum(values: np.ndarray, period: int) -> np.ndarray:
+    out = np.full(len(values), np.nan)
+    if len(values) >= period:
+        csum = np.cumsum(np.insert(values, 0, 0.0))
+        out[period - 1:] = csum[period:] - csum[:-period]
+    return out
+
+
+def _sma(rates, period: int) -> List[np.ndarray]:
+    return [_rolling_sum(rates['close'].astype(np.float64), period) / period]
+
+
+def _bbands(rates, period: int, width: float) -> List[np.ndarray]:
+    close = rates['close'].astype(np.float64)
+    # Shift by the first close so the sum of squares keeps its precision
+    shifted = close - close[0] if len(close) else close
+    mean = _rolling_sum(shifted, period) / period
+    var = _rolling_sum(shifted * shifted, period) / period - mean * mean
+    std = np.sqrt(np.clip(var, 0.0, None))
+    middle = mean + (close[0] if len(close) else 0.0)
+    return [middle + width * std, middle, middle - width * std]
+
+
+_WINDOWED = {"sma": _sma, "bbands": _bbands}
+
+
+# --- recursive indicators: step(rates, period, state) -> (values, state) ---
+# state is None to seed from the start of rates; the returned state is None
+# when there were not enough bars to seed.
+
+def _ema(rates, period: int, state: Optional[tuple]):
+    close = rates['close'].astype(np.float64)
+    out = np.full(len(close), np.nan)
+    alpha = 2.0 / (period + 1)
+    if state is None:
+        if len(close) < period:
+            return out, None
+        value = close[:period].mean()
+        out[period - 1] = value
+        start = period
+    else:
+        (value,) = state
+        start = 0
+    for i in range(start, len(close)):
+        value += alpha * (close[i] - value)
+        out[i] = value
+    return out, (value,)
+
+
+def _rsi_value(gain: float, loss: float) -> float:
+    if loss == 0:
+        return 100.0 if gain > 0 else 50.0
+    return 100.0 - 100.0 / (1.0 + gain / loss)
+
+
+def _rsi(rates, period: int, state: Optional[tuple]):
+    close = rates['close'].astype(np.float64)
+    out = np.full(len(close), np.nan)
+    if state is None:
+        if len(close) <= period:
+            return out, None
+        delta = np.diff(close[:period + 1])
+        gain = np.clip(delta, 0.0, None).mean()
+        loss = np.clip(-delta, 0.0, None).mean()
+        out[period] = _rsi_value(gain, loss)
+        prev = close[period]
+        start = period + 1
+    else:
+        prev, gain, loss = state
+        start = 0
+    for i in range(start, len(close)):
+        delta = close[i] - prev
+        prev = close[i]
+        gain = (gain * (period - 1) + max(delta, 0.0)) / period
+        loss = (loss * (period - 1) + max(-delta, 0.0)) / period
+        out[i] = _rsi_value(gain, loss)
+    return out, (prev, gain, loss)
+
+
+def _atr(rates, period: int, state: Optional[tuple]):
+    high = rates['high'].astype(np.float64)
+    low = rates['low'].astype(np.float64)
+    close = rates['close'].astype(np.float64)
+    out = np.full(len(close), np.nan)
+    if state is None:
+        if len(close) < period:
+            return out, None
+        prev_close = close[:period - 1]
+        tr = high[:period] - low[:period]
+        tr[1:] = np.maximum.reduce([
+            tr[1:], np.abs(high[1:period] - prev_close), np.abs(low[1:period] - prev_close)
+        ])
+        value = tr.mean()
+        out[period - 1] = value
+        prev = close[period - 1]
+        start = period
+    else:
+        prev, value = state
+        start = 0
+    for i in range(start, len(close)):
+        tr = max(high[i] - low[i], abs(high[i] - prev), abs(low[i] - prev))
+        value = (value * (period - 1) + tr) / period
+        prev = close[i]
+        out[i] = value
+    return out, (prev, value)
+
+
+_RECURSIVE = {"ema": _ema, "rsi": _rsi, "atr": _atr}
+
+
+def _run_recursive(symbol: str, timeframe: str, rates, name: str, params: tuple) -> np.ndarray:
+    """
+    Evaluate a recursive indicator over rates. Closed bars (all but the last)
+    come from the stored history, extended with any bars newer than it; the
+    forming bar is one step from the last closed state and is never stored.
+    """
+    step = _RECURSIVE[name]
+    period = params[0]
+    key = (symbol, timeframe, name, params)
+    closed = rates[:-1]
+    closed_times = closed['time']
+    hist = _lookup(_history, key)
+
+    closed_values = None
+    if hist is not None and len(closed):
+        times, values, state = hist
+        if times[-1] > closed_times[-1]:
+            # Older window than the stored history (e.g. a stale cached fetch)
+            return step(rates, period, None)[0]
+        new = closed[closed_times > times[-1]]
+        # The state can only be extended when the window still contains the
+        # last stored bar; otherwise bars in between are missing (reseed below).
+        # Bar times are not compared arithmetically: market closures leave gaps.
+        contiguous = not len(new) or (closed_times == times[-1]).any()
+        if contiguous and len(new):
+            new_values, state = step(new, period, state)
+            times = np.concatenate((times, new['time']))[-MAX_HISTORY:]
+            values = np.concatenate((values, new_values))[-MAX_HISTORY:]
+        pos = np.searchsorted(times, closed_times)
+        if contiguous and (pos < len(times)).all() and (times[np.minimum(pos, len(times) - 1)] == closed_times).all():
+            closed_values = values[pos]
+            _store(_history, key, (times, values, state))
+
+    if closed_values is None:
+        closed_values, state = step(closed, period, None)
+        if state is None:
+            return step(rates, period, None)[0]
+        _store(_history, key, (closed_times.copy(), closed_values, state))
+
+    forming_value, _ = step(rates[-1:], period, state)
+    return np.concatenate((closed_values, forming_value))
+
+
+def compute(symbol: str, timeframe: str, rates, specs: List[Tuple[str, tuple]]) -> Dict[str, np.ndarray]:
+    """
+    Compute the parsed indicator specs over a non-empty rates array.
+    Returns {output name: float64 array aligned with rates}, NaN during warm-up.
+    """
+    last = rates[-1]
+    # The forming bar changes under the same bar time, so it is part of the check
+    signature = (
+        int(last['time']), int(rates['time'][0]),
+        float(last['high']), float(last['low']), float(last['close']),
+    )
+    result = {}
+    for name, params in specs:
+        memo_key = (symbol, timeframe, len(rates), name, params)
+        entry = _lookup(_memo, memo_key)
+        if entry is not None and entry[0] == signature:
+            outputs = entry[1]
+        else:
+            if name in _WINDOWED:
+                outputs = _WINDOWED[name](rates, *params)
+            else:
+                outputs = [_run_recursive(symbol, timeframe, rates, name, params)]
+            _store(_memo, memo_key, (signature, outputs))
+        result.update(zip(output_names(name, params), outputs))
+    return result
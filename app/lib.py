@@ -4,29 +4,13 @@ from typing import List, Dict
 import pandas as pd
 import pytz
 from constants import MT5Timeframe
+import filling
+import symbols
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
-# SYMBOL_FILLING_* (bitmask) → ORDER_FILLING_* for order_send (broker-dependent)
-_SYMBOL_TO_ORDER_FILLING = (
-    (getattr(mt5, 'SYMBOL_FILLING_RETURN', 4), mt5.ORDER_FILLING_RETURN),
-    (getattr(mt5, 'SYMBOL_FILLING_IOC', 2), mt5.ORDER_FILLING_IOC),
-    (getattr(mt5, 'SYMBOL_FILLING_FOK', 1), mt5.ORDER_FILLING_FOK),
-)
-
-
-def _get_symbol_filling_mode(symbol):
-    """Return ORDER_FILLING_* supported by the symbol (from symbol_info filling_mode bitmask)."""
-    info = mt5.symbol_info(symbol)
-    if info is None:
-        return mt5.ORDER_FILLING_RETURN
-    mode = getattr(info, 'filling_mode', 0)
-    for sym_flag, order_filling in _SYMBOL_TO_ORDER_FILLING:
-        if mode & sym_flag:
-            return order_filling
-    return mt5.ORDER_FILLING_RETURN
-
 
 def get_timeframe(timeframe_str: str) -> MT5Timeframe:
     try:
@@ -38,23 +22,38 @@ def get_timeframe(timeframe_str: str) -> MT5Timeframe:
         )
 
 
+def close_request(position, tick, deviation=20, magic=0, comment='', type_filling=None):
+    """
+    order_send request closing position (ticket, symbol, volume, type) with
+    the opposite order: BUY position → SELL at bid, SELL position → BUY at
+    ask. Returns None when the tick has no price for that side.
+    """
+    is_buy = position['type'] == mt5.POSITION_TYPE_BUY
+    price = tick.bid if is_buy else tick.ask
+    if not price:
+        return None
+    return {
+        "action": mt5.TRADE_ACTION_DEAL,
+        "position": position['ticket'],  # select the position you want to close
+        "symbol": position['symbol'],
+        "volume": position['volume'],  # FLOAT
+        "type": mt5.ORDER_TYPE_SELL if is_buy else mt5.ORDER_TYPE_BUY,
+        "price": price,
+        "deviation": deviation,  # INTEGER
+        "magic": magic,          # INTEGER
+        "comment": comment,
+        "type_time": mt5.ORDER_TIME_GTC,
+        "type_filling": type_filling,
+    }
+
+
 def close_position(position, deviation=20, magic=0, comment='', type_filling=None):
     if 'type' not in position or 'ticket' not in position:
         logger.error("Position dictionary missing 'type' or 'ticket' keys.")
         return None
 
-    # Use symbol's allowed filling mode if not specified (avoids "Unsupported filling mode" per broker)
-    if type_filling is None:
-        type_filling = _get_symbol_filling_mode(position['symbol'])
-
-    # Close position with opposite order: BUY position → SELL at bid, SELL position → BUY at ask
-    order_type_dict = {
-        0: mt5.ORDER_TYPE_SELL,  # close BUY position with SELL
-        1: mt5.ORDER_TYPE_BUY,    # close SELL position with BUY
-    }
-
     position_type = position['type']
-    if position_type not in order_type_dict:
+    if position_type not in (mt5.POSITION_TYPE_BUY, mt5.POSITION_TYPE_SELL):
         logger.error(f"Unknown position type: {position_type}")
         return None
 
@@ -63,111 +62,116 @@ def close_position(position, deviation=20, magic=0, comment='', type_filling=Non
         logger.error(f"Failed to get tick for symbol: {position['symbol']}")
         return None
 
-    price_dict = {
-        0: tick.bid,  # closing BUY = SELL at bid
-        1: tick.ask,   # closing SELL = BUY at ask
-    }
-
-    price = price_dict[position_type]
-    if price == 0.0:
+    request = close_request(position, tick, deviation, magic, comment, type_filling)
+    if request is None:
         logger.error(f"Invalid price retrieved for symbol: {position['symbol']}")
         return None
 
-    request = {
-        "action": mt5.TRADE_ACTION_DEAL,
-        "position": position['ticket'],  # select the position you want to close
-        "symbol": position['symbol'],
-        "volume": position['volume'],  # FLOAT
-        "type": order_type_dict[position_type],
-        "price": price,
-        "deviation": deviation,  # INTEGER
-        "magic": magic,          # INTEGER
-        "comment": comment,
-        "type_time": mt5.ORDER_TIME_GTC,
-        "type_filling": type_filling,
-    }
-
-    order_result = mt5.order_send(request)
+    # Use symbol's allowed filling mode if not specified (avoids "Unsupported filling mode" per broker)
+    if type_filling is None:
+        order_result = filling.order_send(request)
+    else:
+        order_result = mt5.order_send(request)
 
-    if order_result.retcode != mt5.TRADE_RETCODE_DONE:
-        logger.error(f"Failed to close position {position['ticket']}: {order_result.comment}")
+    if order_result is None or order_result.retcode != mt5.TRADE_RETCODE_DONE:
+        logger.error(f"Failed to close position {position['ticket']}: {order_result.comment if order_result else mt5.last_error()}")
         return None
 
     logger.info(f"Position {position['ticket']} closed successfully.")
     return order_result
 
 
-def close_all_positions(order_type='all', magic=None, type_filling=None):
+def close_all_positions(order_type='all', magic=None, type_filling=None, symbols_filter=None, deviation=20):
+    """
+    Close every open position matching magic, order_type ('BUY', 'SELL' or
+    'all') and symbols_filter (list of names). Filling mode and tick are
+    resolved once per symbol (filling mode via the shared resolver), then
+    closes are sent back-to-back.
+
+    Returns one dict per matching position: ticket, symbol, volume, price
+    (requested), result (OrderSendResult, or None when nothing was sent),
+    error, latency_ms and slippage_points (adverse fill distance, positive is
+    worse than requested).
+    """
     order_type_dict = {
         'BUY': mt5.ORDER_TYPE_BUY,
         'SELL': mt5.ORDER_TYPE_SELL
     }
+    if order_type != 'all' and order_type not in order_type_dict:
+        logger.error(f"Invalid order_type: {order_type}. Must be 'BUY', 'SELL', or 'all'.")
+        return []
 
-    if mt5.positions_total() > 0:
-        positions = mt5.positions_get()
-        if positions is None:
-            logger.error("Failed to retrieve positions.")
-            return []
-
-        positions_data = [pos._asdict() for pos in positions]
-        positions_df = pd.DataFrame(positions_data)
-
-        # Filtering by magic if specified
-        if magic is not None:
-            positions_df = positions_df[positions_df['magic'] == magic]
-
-        # Filtering by order_type if not 'all'
-        if order_type != 'all':
-            if order_type not in order_type_dict:
-                logger.error(f"Invalid order_type: {order_type}. Must be 'BUY', 'SELL', or 'all'.")
-                return []
-            positions_df = positions_df[positions_df['type'] == order_type_dict[order_type]]
-
-        if positions_df.empty:
-            logger.error('No open positions matching the criteria.')
-            return []
-
-        results = []
-        for _, position in positions_df.iterrows():
-            order_result = close_position(position, type_filling=type_filling)
-            if order_result:
-                results.append(order_result)
-            else:
-                logger.error(f"Failed to close position {position['ticket']}.")
-        
-        return results
-    else:
-        logger.error("No open positions to close.")
+    positions = mt5.positions_get()
+    if positions is None:
+        logger.error("Failed to retrieve positions.")
         return []
 
+    wanted_type = order_type_dict.get(order_type)
+    wanted_symbols = set(symbols_filter) if symbols_filter else None
+    positions = [
+        p for p in positions
+        if (magic is None or p.magic == magic)
+        and (wanted_type is None or p.type == wanted_type)
+        and (wanted_symbols is None or p.symbol in wanted_symbols)
+    ]
+    if not positions:
+        logger.error('No open positions matching the criteria.')
+        return []
+
+    ticks, points = {}, {}
+    for symbol in {p.symbol for p in positions}:
+        ticks[symbol] = mt5.symbol_info_tick(symbol)
+        info = symbols.get(symbol)
+        points[symbol] = info.get('point') if info else None
+
+    reports = []
+    for position in positions:
+        report = {"ticket": position.ticket, "symbol": position.symbol, "volume": position.volume,
+                  "price": None, "result": None, "error": None, "latency_ms": None, "slippage_points": None}
+        reports.append(report)
+        tick = ticks[position.symbol]
+        request = close_request(position._asdict(), tick, deviation, type_filling=type_filling) if tick is not None else None
+        if request is None:
+            report["error"] = f"Failed to get price for symbol: {position.symbol}"
+            logger.error(report["error"])
+            continue
+        is_buy = position.type == mt5.POSITION_TYPE_BUY
+        price = report["price"] = request["price"]
+        started = time.perf_counter()
+        result = filling.order_send(request) if type_filling is None else mt5.order_send(request)
+        report["latency_ms"] = (time.perf_counter() - started) * 1000
+        report["result"] = result
+        if result is None or result.retcode != mt5.TRADE_RETCODE_DONE:
+            report["error"] = result.comment if result else f"order_send returned None: {mt5.last_error()[1]}"
+            logger.error(f"Failed to close position {position.ticket}: {report['error']}")
+            continue
+        point = points[position.symbol]
+        if result.price and point:
+            report["slippage_points"] = round((price - result.price if is_buy else result.price - price) / point, 1)
+
+    return reports
+
 def get_positions(magic=None):
+    """Return open positions as a list of dicts, optionally filtered by magic (empty on failure)."""
     # First check if MT5 is initialized
     if not mt5.initialize():
         logger.error("Failed to initialize MT5.")
-        return pd.DataFrame()
+        return []
 
     total_positions = mt5.positions_total()
     if total_positions is None:
         logger.error("Failed to get positions total.")
-        return pd.DataFrame()
-
-    if total_positions > 0:
-        positions = mt5.positions_get()
-        if positions is None:
-            logger.error("Failed to retrieve positions.")
-            return pd.DataFrame()
+        return []
 
-        positions_data = [pos._asdict() for pos in positions]
-        positions_df = pd.DataFrame(positions_data)
+    if total_positions == 0:
+        return []
 
-        if magic is not None:
-            positions_df = positions_df[positions_df['magic'] == magic]
+    positions = mt5.positions_get()
+    if positions is None:
+        logger.error("Failed to retrieve positions.")
+        return []
 
-        return positions_df
-    else:
-        return pd.DataFrame(columns=['ticket', 'time', 'time_msc', 'time_update', 'time_update_msc', 'type',
-                                   'magic', 'identifier', 'reason', 'volume', 'price_open', 'sl', 'tp',
-                                   'price_current', 'swap', 'profit', 'symbol', 'comment', 'external_id'])
+    return [pos._asdict() for pos in positions if magic is None or pos.magic == magic]
     
 
 def get_deal_from_ticket(ticket, from_date=None, to_date=None):
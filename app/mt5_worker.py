@@ -1,7 +1,8 @@
 """
 Single-threaded MT5 job queue. All MT5 calls run in one worker thread so the
 terminal is never used concurrently. Request handlers submit work via run_mt5()
-and block until the worker returns the result.
+and block until the worker returns the result, or via submit_mt5() with a
+completion callback when they must not wait.
 """
 import logging
 import queue
@@ -11,6 +12,7 @@ from typing import Any, Callable, Optional
 logger = logging.getLogger(__name__)
 
 _job_queue: Optional[queue.Queue] = None
+_worker_thread: Optional[threading.Thread] = None
 _worker_started = threading.Event()
 _start_lock = threading.Lock()
 
@@ -32,18 +34,23 @@ def _worker_loop() -> None:
             job["result"] = None
             job["exception"] = e
         job["event"].set()
+        if job.get("callback") is not None:
+            try:
+                job["callback"](job["result"], job["exception"])
+            except Exception as e:
+                logger.error(f"MT5 worker: job callback failed: {e}")
 
 
 def _ensure_worker() -> None:
-    global _job_queue
+    global _job_queue, _worker_thread
     if _job_queue is not None:
         return
     with _start_lock:
         if _job_queue is not None:
             return
         _job_queue = queue.Queue()
-        t = threading.Thread(target=_worker_loop, daemon=True)
-        t.start()
+        _worker_thread = threading.Thread(target=_worker_loop, daemon=True)
+        _worker_thread.start()
         _worker_started.wait(timeout=10)
         if not _worker_started.is_set():
             logger.warning("MT5 worker start event not set within 10s.")
@@ -59,8 +66,11 @@ def run_mt5(fn: Callable[[], Any], timeout: Optional[float] = None) -> Any:
     Run the callable on the MT5 worker thread and return its result.
     Raises the same exception the callable raised if it fails.
     If timeout is set and exceeded, raises TimeoutError.
+    Called from the worker thread itself (nested helpers), fn runs inline.
     """
     _ensure_worker()
+    if threading.current_thread() is _worker_thread:
+        return fn()
     job = {"fn": fn, "result": None, "exception": None, "event": threading.Event()}
     _job_queue.put(job)
     if not job["event"].wait(timeout=timeout):
@@ -69,3 +79,13 @@ def run_mt5(fn: Callable[[], Any], timeout: Optional[float] = None) -> Any:
     if job["exception"] is not None:
         raise job["exception"]
     return job["result"]
+
+
+def submit_mt5(fn: Callable[[], Any], callback: Callable[[Any, Optional[Exception]], None]) -> None:
+    """
+    Queue the callable on the MT5 worker and return immediately. The worker
+    calls callback(result, exception) when it finishes (on the worker thread,
+    so the callback must be quick and must not call run_mt5 from elsewhere).
+    """
+    _ensure_worker()
+    _job_queue.put({"fn": fn, "result": None, "exception": None, "event": threading.Event(), "callback": callback})
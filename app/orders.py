@@ -0,0 +1,178 @@
+"""
+Order request building shared by /order and /order_batch. build_request()
+validates a JSON order and maps it to an order_send request; send() runs on
+the MT5 worker, fills the market price from the given tick and retries
+requotes within the order's retry policy.
+"""
+import os
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+import MetaTrader5 as mt5
+import pytz
+
+import filling
+import symbols
+
+ORDER_TYPE_MAP = {
+    'BUY': mt5.ORDER_TYPE_BUY,
+    'SELL': mt5.ORDER_TYPE_SELL,
+    'BUY_LIMIT': mt5.ORDER_TYPE_BUY_LIMIT,
+    'SELL_LIMIT': mt5.ORDER_TYPE_SELL_LIMIT,
+    'BUY_STOP': mt5.ORDER_TYPE_BUY_STOP,
+    'SELL_STOP': mt5.ORDER_TYPE_SELL_STOP,
+    'BUY_STOP_LIMIT': mt5.ORDER_TYPE_BUY_STOP_LIMIT,
+    'SELL_STOP_LIMIT': mt5.ORDER_TYPE_SELL_STOP_LIMIT
+}
+MARKET_TYPES = ('BUY', 'SELL')
+MAX_ATTEMPTS = int(os.environ.get('ORDER_MAX_ATTEMPTS', 3))
+REQUOTE_WAIT = float(os.environ.get('ORDER_REQUOTE_WAIT', 0.5))
+_REQUOTE_POLL = 0.01
+RETRY_RETCODES = (mt5.TRADE_RETCODE_REQUOTE, mt5.TRADE_RETCODE_PRICE_CHANGED, mt5.TRADE_RETCODE_PRICE_OFF)
+TYPE_FILLING_MAP = {
+    'ORDER_FILLING_IOC': mt5.ORDER_FILLING_IOC,
+    'ORDER_FILLING_FOK': mt5.ORDER_FILLING_FOK,
+    'ORDER_FILLING_RETURN': mt5.ORDER_FILLING_RETURN
+}
+
+
+def is_market(data: dict) -> bool:
+    return data['type'] in MARKET_TYPES
+
+
+def parse_expiration(value: str) -> datetime:
+    """ISO 8601 expiration (naive means UTC). Raises ValueError."""
+    try:
+        expiration = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        raise ValueError("Invalid expiration format. Use ISO 8601 format")
+    if expiration.tzinfo is None:
+        expiration = pytz.UTC.localize(expiration)
+    return expiration
+
+
+def build_request(data: dict) -> dict:
+    """Validate an /order body and return the order_send request. Raises ValueError."""
+    required_fields = ['symbol', 'volume', 'type']
+    if not all(field in data for field in required_fields):
+        raise ValueError("Missing required fields")
+
+    order_type_str = data['type']
+    if order_type_str not in ORDER_TYPE_MAP:
+        raise ValueError(f"Invalid order type: {order_type_str}")
+    is_market_order = order_type_str in MARKET_TYPES
+
+    # Without an explicit mode the symbol's (learned) filling mode is used at send time
+    type_filling = None
+    if data.get('type_filling'):
+        type_filling = TYPE_FILLING_MAP.get(data['type_filling'].upper(), mt5.ORDER_FILLING_IOC)
+
+    request_data = {
+        "action": mt5.TRADE_ACTION_DEAL if is_market_order else mt5.TRADE_ACTION_PENDING,
+        "symbol": data['symbol'],
+        "volume": float(data['volume']),
+        "type": ORDER_TYPE_MAP[order_type_str],
+        "deviation": data.get('deviation', 20),
+        "magic": data.get('magic', 0),
+        "comment": data.get('comment', ''),
+        "type_time": mt5.ORDER_TIME_GTC,
+        "type_filling": type_filling,
+    }
+
+    # Add expiration if provided (for pending orders)
+    if 'expiration' in data and not is_market_order:
+        request_data["expiration"] = parse_expiration(data['expiration'])
+
+    # Add optional SL/TP if provided
+    if 'sl' in data:
+        request_data["sl"] = float(data['sl'])
+    if 'tp' in data:
+        request_data["tp"] = float(data['tp'])
+
+    if not is_market_order:
+        if 'price' not in data:
+            raise ValueError("Price is required for limit/stop orders")
+        request_data["price"] = float(data['price'])
+    return request_data
+
+
+def retry_policy(data: dict) -> dict:
+    """
+    Requote retry policy for a market order body: max_attempts (total sends,
+    default ORDER_MAX_ATTEMPTS) and max_slippage (points the price may drift
+    from the first attempt, default the order's deviation). Raises ValueError.
+    """
+    try:
+        max_attempts = int(data.get('max_attempts', MAX_ATTEMPTS))
+        max_slippage = float(data.get('max_slippage', data.get('deviation', 20)))
+    except (TypeError, ValueError):
+        raise ValueError("max_attempts and max_slippage must be numbers")
+    if max_attempts < 1 or max_slippage < 0:
+        raise ValueError("max_attempts must be at least 1 and max_slippage non-negative")
+    return {"max_attempts": max_attempts, "max_slippage": max_slippage}
+
+
+def _order_send(request_data: dict):
+    if request_data["type_filling"] is None:
+        return filling.order_send(request_data)
+    return mt5.order_send(request_data)
+
+
+def _next_tick(symbol: str, previous):
+    """
+    First tick whose time_msc, bid or ask differs from previous, polled for up
+    to ORDER_REQUOTE_WAIT seconds; None when the quote did not move.
+    """
+    deadline = time.monotonic() + REQUOTE_WAIT
+    while True:
+        tick = mt5.symbol_info_tick(symbol)
+        if tick is not None and (tick.time_msc, tick.bid, tick.ask) != (previous.time_msc, previous.bid, previous.ask):
+            return tick
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(_REQUOTE_POLL)
+
+
+def send(request_data: dict, tick=None, policy: Optional[dict] = None) -> Tuple[Optional[object], List[dict]]:
+    """
+    Runs on the MT5 worker: set the market price from tick (ask for buys, bid
+    for sells) unless the request is pending, then order_send (through the
+    filling-mode resolver when no mode was given).
+
+    Market orders rejected with a requote/price-changed/price-off retcode are
+    re-priced from the next tick and resent in the same job, up to the policy's
+    max_attempts and while the adverse drift from the first price stays within
+    max_slippage points. The retry waits (up to ORDER_REQUOTE_WAIT seconds) for
+    the quote to change, so the rejected price is never resent. Returns (last result, per-attempt list of price,
+    retcode and latency_ms).
+    """
+    attempts = []
+    is_market_order = request_data["action"] == mt5.TRADE_ACTION_DEAL
+    is_buy = request_data["type"] == mt5.ORDER_TYPE_BUY
+    max_attempts = policy["max_attempts"] if policy and is_market_order else 1
+    first_price = None
+    while True:
+        if is_market_order:
+            request_data["price"] = tick.ask if is_buy else tick.bid
+            first_price = first_price or request_data["price"]
+        started = time.perf_counter()
+        result = _order_send(request_data)
+        attempts.append({
+            "price": request_data.get("price"),
+            "retcode": result.retcode if result is not None else None,
+            "latency_ms": (time.perf_counter() - started) * 1000,
+        })
+        if result is None or result.retcode not in RETRY_RETCODES or len(attempts) >= max_attempts:
+            return result, attempts
+        tick = _next_tick(request_data["symbol"], tick)
+        if tick is None:
+            attempts[-1]["stopped"] = f"no new quote within {REQUOTE_WAIT:g}s"
+            return result, attempts
+        info = symbols.get(request_data["symbol"])
+        point = info.get('point') if info else None
+        new_price = tick.ask if is_buy else tick.bid
+        drift = (new_price - first_price) if is_buy else (first_price - new_price)
+        if point and drift / point > policy["max_slippage"]:
+            attempts[-1]["stopped"] = f"price moved {drift / point:.1f} points, above max_slippage"
+            return result, attempts
@@ -0,0 +1,156 @@
+"""
+Bulk pending-order management. cancel() and modify() run on the MT5 worker:
+one orders_get, selection by magic/symbol/type/ticket list, then every
+TRADE_ACTION_REMOVE or TRADE_ACTION_MODIFY back-to-back with last_error read
+inline. Modifications keep the order's current values for anything not
+given, skip no-op changes locally and check the new price and stops against
+the latest quote before sending.
+"""
+import time
+from typing import Dict, List, Optional
+
+import MetaTrader5 as mt5
+
+import orders
+import pretrade
+import quotes
+import symbols
+
+
+def select(pending: List[dict], filters: dict) -> List[dict]:
+    """
+    Orders matching the filters: magic, symbol, type (e.g. 'BUY_LIMIT') and
+    tickets. A filter is ignored only when None, so an empty ticket list
+    matches nothing.
+    """
+    wanted_type = None
+    if filters.get('type') is not None:
+        if filters['type'] not in orders.ORDER_TYPE_MAP:
+            raise ValueError(f"Invalid order type: {filters['type']}")
+        wanted_type = orders.ORDER_TYPE_MAP[filters['type']]
+    tickets = set(filters['tickets']) if filters.get('tickets') is not None else None
+    return [
+        order for order in pending
+        if (filters.get('magic') is None or order['magic'] == filters['magic'])
+        and (filters.get('symbol') is None or order['symbol'] == filters['symbol'])
+        and (wanted_type is None or order['type'] == wanted_type)
+        and (tickets is None or order['ticket'] in tickets)
+    ]
+
+
+def _read_orders() -> Optional[List[dict]]:
+    pending = mt5.orders_get()
+    return None if pending is None else [order._asdict() for order in pending]
+
+
+def _send(request_data: dict, entry: dict, done_status: str) -> None:
+    started = time.perf_counter()
+    result = mt5.order_send(request_data)
+    entry["latency_ms"] = (time.perf_counter() - started) * 1000
+    if result is None:
+        entry.update(status="rejected", error=f"order_send returned None: {mt5.last_error()[1]}")
+    elif result.retcode == mt5.TRADE_RETCODE_DONE:
+        entry.update(status=done_status, retcode=result.retcode)
+    else:
+        entry.update(status="rejected", retcode=result.retcode, error=result.comment)
+
+
+def cancel(filters: dict) -> Optional[List[dict]]:
+    """Remove every matching pending order. Returns per-order results, or None when orders_get failed."""
+    pending = _read_orders()
+    if pending is None:
+        return None
+    results = []
+    for order in select(pending, filters):
+        entry = {"ticket": order['ticket'], "symbol": order['symbol']}
+        results.append(entry)
+        _send({"action": mt5.TRADE_ACTION_REMOVE, "order": order['ticket']}, entry, "cancelled")
+    return results
+
+
+def _tick(symbol: str, ticks: Dict[str, Optional[dict]]) -> Optional[dict]:
+    if symbol not in ticks:
+        tick = quotes.get_tick(symbol)
+        if tick is None:
+            live = mt5.symbol_info_tick(symbol)
+            tick = live._asdict() if live is not None else None
+        ticks[symbol] = tick
+    return ticks[symbol]
+
+
+def modify(changes: Optional[Dict[int, dict]] = None, filters: Optional[dict] = None,
+           shift_points: float = 0.0, expiration: Optional[int] = None) -> Optional[List[dict]]:
+    """
+    Modify pending orders. changes maps ticket -> {price, sl, tp, expiration}
+    (expiration as a Unix timestamp); otherwise every order matching filters
+    is shifted by shift_points (price, stop-limit price, SL and TP together)
+    and/or given the expiration. Returns per-order results with status
+    modified, unchanged, rejected or not_found, or None when orders_get failed.
+    """
+    pending = _read_orders()
+    if pending is None:
+        return None
+    by_ticket = {order['ticket']: order for order in pending}
+    if changes is None:
+        changes = {order['ticket']: {} for order in select(pending, filters or {})}
+
+    ticks = {}
+    results = []
+    for ticket, change in changes.items():
+        entry = {"ticket": ticket}
+        results.append(entry)
+        order = by_ticket.get(ticket)
+        if order is None:
+            entry.update(status="not_found", error="Order not found")
+            continue
+        info = symbols.get(order['symbol']) or {}
+        point = info.get('point') or 0.0
+        if shift_points and not point:
+            entry.update(status="rejected", error=f"No point size known for {order['symbol']}")
+            continue
+        offset = shift_points * point
+
+        def _level(name: str, current: float) -> float:
+            if change.get(name) is not None:
+                return float(change[name])
+            return current + offset if current else current
+
+        price = _level('price', order['price_open'])
+        stoplimit = order['price_stoplimit'] + offset if order['price_stoplimit'] else 0.0
+        sl, tp = _level('sl', order['sl']), _level('tp', order['tp'])
+        if info.get('digits') is not None:
+            price, stoplimit, sl, tp = (round(v, info['digits']) for v in (price, stoplimit, sl, tp))
+        new_expiration = change.get('expiration', expiration)
+        type_time, time_expiration = order['type_time'], order['time_expiration']
+        if new_expiration is not None:
+            type_time, time_expiration = mt5.ORDER_TIME_SPECIFIED, int(new_expiration)
+        entry.update(symbol=order['symbol'], price=price, sl=sl, tp=tp)
+
+        half_point = point / 2 if point else 1e-9
+        if (all(abs(new - old) < half_point for new, old in
+                ((price, order['price_open']), (stoplimit, order['price_stoplimit']), (sl, order['sl']), (tp, order['tp'])))
+                and type_time == order['type_time'] and time_expiration == order['time_expiration']):
+            entry["status"] = "unchanged"
+            continue
+
+        tick = _tick(order['symbol'], ticks)
+        if info and tick is not None and tick['bid'] and tick['ask']:
+            invalid = pretrade.check_stops(info, order['type'], price, sl, tp, tick)
+            if invalid:
+                entry.update(status="rejected", error=invalid)
+                continue
+
+        request_data = {
+            "action": mt5.TRADE_ACTION_MODIFY,
+            "order": ticket,
+            "symbol": order['symbol'],
+            "price": price,
+            "sl": sl,
+            "tp": tp,
+            "type_time": type_time,
+            "expiration": time_expiration,
+        }
+        if stoplimit:
+            request_data["stoplimit"] = stoplimit
+        _send(request_data, entry, "modified")
+    return results
@@ -0,0 +1,140 @@
+"""
+Local pre-trade validation against the cached symbol catalog, so requests
+that the broker would reject (TRADE_RETCODE_INVALID_VOLUME, INVALID_STOPS,
+TRADE_DISABLED, MARKET_CLOSED, ...) fail without a worker slot or a round
+trip. Checks mirror the MQL5 trade request rules: volume min/max/step, trade
+mode, stops level distance of SL/TP (and pending prices) from the market,
+freeze level for modifications, and the session state via quote staleness.
+Each check returns an error message, or None when the request looks valid.
+Anything that cannot be judged locally (unknown symbol, no fresh quote) is
+left to the broker.
+"""
+from typing import Optional
+
+import MetaTrader5 as mt5
+
+import quote_stats
+import quotes
+import symbols
+
+_TRADE_MODE_DISABLED = getattr(mt5, 'SYMBOL_TRADE_MODE_DISABLED', 0)
+_TRADE_MODE_LONGONLY = getattr(mt5, 'SYMBOL_TRADE_MODE_LONGONLY', 1)
+_TRADE_MODE_SHORTONLY = getattr(mt5, 'SYMBOL_TRADE_MODE_SHORTONLY', 2)
+_TRADE_MODE_CLOSEONLY = getattr(mt5, 'SYMBOL_TRADE_MODE_CLOSEONLY', 3)
+
+_BUY_TYPES = (mt5.ORDER_TYPE_BUY, mt5.ORDER_TYPE_BUY_LIMIT, mt5.ORDER_TYPE_BUY_STOP, mt5.ORDER_TYPE_BUY_STOP_LIMIT)
+_EPSILON = 1e-9
+
+
+def check_volume(info: dict, volume: float) -> Optional[str]:
+    volume_min = info.get('volume_min') or 0.0
+    volume_max = info.get('volume_max') or 0.0
+    step = info.get('volume_step') or 0.0
+    if volume <= 0 or volume < volume_min - _EPSILON:
+        return f"Volume {volume} is below the minimum {volume_min}"
+    if volume_max and volume > volume_max + _EPSILON:
+        return f"Volume {volume} is above the maximum {volume_max}"
+    if step and abs(volume / step - round(volume / step)) > 1e-6:
+        return f"Volume {volume} is not a multiple of the volume step {step}"
+    return None
+
+
+def check_trade_mode(info: dict, order_type: int) -> Optional[str]:
+    """Whether a new position/order of order_type may be opened on the symbol."""
+    mode = info.get('trade_mode')
+    if mode == _TRADE_MODE_DISABLED:
+        return "Trading is disabled for this symbol"
+    if mode == _TRADE_MODE_CLOSEONLY:
+        return "Symbol is in close-only mode"
+    is_buy = order_type in _BUY_TYPES
+    if mode == _TRADE_MODE_LONGONLY and not is_buy:
+        return "Symbol allows long positions only"
+    if mode == _TRADE_MODE_SHORTONLY and is_buy:
+        return "Symbol allows short positions only"
+    return None
+
+
+def _distance_error(name: str, distance: float, level_points: int, point: float) -> Optional[str]:
+    if distance < level_points * point - _EPSILON:
+        return f"{name} is {distance / point:.1f} points from the reference price; the symbol requires at least {level_points}"
+    return None
+
+
+def check_stops(info: dict, order_type: int, price: Optional[float], sl: float, tp: float, tick: dict) -> Optional[str]:
+    """
+    Stops level rules. Market orders compare SL/TP with the closing side of
+    the quote (bid for buys, ask for sells); pending orders compare their price
+    with the market and SL/TP with their own price.
+    """
+    point = info.get('point') or 0.0
+    level = info.get('trade_stops_level') or 0
+    if not point:
+        return None
+    is_buy = order_type in _BUY_TYPES
+    if order_type in (mt5.ORDER_TYPE_BUY, mt5.ORDER_TYPE_SELL):
+        reference = tick['bid'] if is_buy else tick['ask']
+    else:
+        reference = price
+        market_distance = {
+            mt5.ORDER_TYPE_BUY_LIMIT: tick['ask'] - price,
+            mt5.ORDER_TYPE_SELL_LIMIT: price - tick['bid'],
+            mt5.ORDER_TYPE_BUY_STOP: price - tick['ask'],
+            mt5.ORDER_TYPE_SELL_STOP: tick['bid'] - price,
+        }.get(order_type)
+        if market_distance is not None:
+            error = _distance_error("Order price", market_distance, level, point)
+            if error:
+                return error
+    if sl:
+        error = _distance_error("Stop loss", reference - sl if is_buy else sl - reference, level, point)
+        if error:
+            return error
+    if tp:
+        error = _distance_error("Take profit", tp - reference if is_buy else reference - tp, level, point)
+        if error:
+            return error
+    return None
+
+
+def check_order(request_data: dict) -> Optional[str]:
+    """Validate an order_send request built by orders.build_request (TRADE_ACTION_DEAL/PENDING)."""
+    symbol = request_data["symbol"]
+    info = symbols.get(symbol)
+    if info is None:
+        return None
+    error = check_volume(info, request_data["volume"]) or check_trade_mode(info, request_data["type"])
+    if error:
+        return error
+    is_market_order = request_data["action"] == mt5.TRADE_ACTION_DEAL
+    if is_market_order:
+        error = quote_stats.stale_reason(symbol)
+        if error:
+            return error
+    tick = quotes.get_tick(symbol)
+    if tick is None or not tick['bid'] or not tick['ask']:
+        return None
+    return check_stops(info, request_data["type"], request_data.get("price"),
+                       request_data.get("sl") or 0.0, request_data.get("tp") or 0.0, tick)
+
+
+def check_sltp(position: dict, sl: float, tp: float, tick: dict) -> Optional[str]:
+    """
+    Validate a TRADE_ACTION_SLTP change for an open position: the existing
+    SL/TP must be outside the freeze level and the new ones outside the stops
+    level, both measured from the closing side of the quote.
+    """
+    info = symbols.get(position['symbol'])
+    if info is None or tick is None or not tick['bid'] or not tick['ask']:
+        return None
+    point = info.get('point') or 0.0
+    freeze = info.get('trade_freeze_level') or 0
+    if not point:
+        return None
+    is_buy = position['type'] == mt5.POSITION_TYPE_BUY
+    reference = tick['bid'] if is_buy else tick['ask']
+    if freeze:
+        for name, level in (("Stop loss", position.get('sl')), ("Take profit", position.get('tp'))):
+            if level and abs(reference - level) < freeze * point - _EPSILON:
+                return f"{name} is inside the freeze level ({freeze} points) and cannot be modified"
+    order_type = mt5.ORDER_TYPE_BUY if is_buy else mt5.ORDER_TYPE_SELL
+    return check_stops(info, order_type, None, sl or 0.0, tp or 0.0, tick)
@@ -0,0 +1,160 @@
+"""
+Rolling per-symbol quote statistics, fed by the tick poller's listener.
+Everything is constant memory per symbol and exponentially time-decayed with
+QUOTE_STATS_WINDOW seconds as the time constant:
+
+- spread: histogram of spreads in points (SPREAD_BINS bins, the last one open
+  ended), for percentiles and mean;
+- tick rate: decayed count of quote changes per second;
+- last change: when the quote last changed, for stale-quote detection.
+
+Decay is applied lazily: new samples get weight exp(t / window), so an update
+touches one bin, and the histogram is rescaled before the weight overflows.
+Statistics of symbols no longer polled are dropped after a window.
+"""
+import logging
+import math
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+import quotes
+import symbols
+
+logger = logging.getLogger(__name__)
+
+WINDOW = float(os.environ.get('QUOTE_STATS_WINDOW', 300))
+STALE_SECONDS = float(os.environ.get('QUOTE_STALE_SECONDS', 30))
+SPREAD_BINS = 1000
+PERCENTILES = (50, 90, 99)
+# A quote stored longer ago than this means the symbol is no longer polled
+_POLL_GAP_SECONDS = 5.0
+# Rescale the histogram once a sample weight would exceed exp(_MAX_EXPONENT)
+_MAX_EXPONENT = 400.0
+_SWEEP_SECONDS = 60.0
+
+_stats: Dict[str, dict] = {}
+_lock = threading.Lock()
+_swept_at = 0.0
+
+
+def _new_stats(now: float) -> dict:
+    return {
+        "hist": np.zeros(SPREAD_BINS),
+        "origin": now,
+        "created": now,
+        "rate": 0.0,
+        "rate_at": now,
+        "last_change": now,
+        "time_msc": 0,
+        "spread": None,
+        "ticks": 0,
+    }
+
+
+def _update(symbol: str, tick: dict, now: float) -> None:
+    stats = _stats.get(symbol)
+    if stats is None:
+        stats = _stats[symbol] = _new_stats(now)
+    stats["rate"] = stats["rate"] * math.exp((stats["rate_at"] - now) / WINDOW) + 1.0
+    stats["rate_at"] = now
+    stats["last_change"] = now
+    stats["time_msc"] = tick.get('time_msc', 0)
+    stats["ticks"] += 1
+
+    info = symbols.get(symbol)
+    point = info.get('point') if info else None
+    if not point or not tick['bid'] or not tick['ask']:
+        return
+    spread = int(round((tick['ask'] - tick['bid']) / point))
+    stats["spread"] = spread
+    exponent = (now - stats["origin"]) / WINDOW
+    if exponent > _MAX_EXPONENT:
+        # exp(-exponent) underflows to 0 rather than raising for very old origins
+        stats["hist"] *= math.exp(-exponent)
+        stats["origin"] = now
+        exponent = 0.0
+    weight = math.exp(exponent)
+    stats["hist"][min(max(spread, 0), SPREAD_BINS - 1)] += weight
+
+
+def _is_polled(symbol: str, now: float, gap: float = _POLL_GAP_SECONDS) -> bool:
+    quote = quotes.get_quote(symbol)
+    return quote is not None and now - quote[0] <= gap
+
+
+def _sweep(now: float) -> None:
+    """Drop statistics of symbols not polled for a whole window (caller holds _lock)."""
+    for symbol in [s for s in _stats if not _is_polled(s, now, max(WINDOW, _POLL_GAP_SECONDS))]:
+        del _stats[symbol]
+
+
+def _on_ticks(changed: Dict[str, dict]) -> None:
+    global _swept_at
+    now = time.monotonic()
+    with _lock:
+        for symbol, tick in changed.items():
+            try:
+                _update(symbol, tick, now)
+            except Exception as e:
+                logger.error(f"Quote stats update failed for {symbol}: {e}")
+        if now - _swept_at > _SWEEP_SECONDS:
+            _swept_at = now
+            _sweep(now)
+
+
+def get_stats(symbol: str) -> Optional[dict]:
+    """Current statistics for symbol, or None if it has never been polled."""
+    now = time.monotonic()
+    with _lock:
+        stats = _stats.get(symbol)
+        if stats is None:
+            return None
+        hist = stats["hist"].copy()
+        # Normalise by the decay window actually covered so far (warm-up)
+        covered = WINDOW * -math.expm1((stats["created"] - now) / WINDOW)
+        rate = stats["rate"] * math.exp((stats["rate_at"] - now) / WINDOW) / covered if covered > 0 else 0.0
+        age = now - stats["last_change"]
+        polled = _is_polled(symbol, now)
+        result = {
+            "symbol": symbol,
+            "ticks": stats["ticks"],
+            "tick_rate": rate,
+            "last_quote_age": age,
+            "last_time_msc": stats["time_msc"],
+            "polled": polled,
+            "stale": polled and STALE_SECONDS > 0 and age > STALE_SECONDS,
+            "spread": {"last": stats["spread"]},
+        }
+    total = hist.sum()
+    if total > 0:
+        cumulative = np.cumsum(hist) / total
+        for p in PERCENTILES:
+            result["spread"][f"p{p}"] = int(np.searchsorted(cumulative, p / 100.0))
+        result["spread"]["mean"] = float(np.dot(hist, np.arange(SPREAD_BINS)) / total)
+    return result
+
+
+def all_symbols():
+    return list(_stats)
+
+
+def stale_reason(symbol: str) -> Optional[str]:
+    """
+    Why a market order on symbol should be rejected, or None. A quote is stale
+    when it is being polled but has not changed for QUOTE_STALE_SECONDS; symbols
+    without statistics are not judged (and start being polled).
+    """
+    if STALE_SECONDS <= 0:
+        return None
+    quotes.get_tick(symbol)
+    stats = get_stats(symbol)
+    if stats is None or not stats["stale"]:
+        return None
+    return f"Stale quote for {symbol}: unchanged for {stats['last_quote_age']:.1f}s"
+
+
+quotes.add_listener(_on_ticks)
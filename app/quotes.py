@@ -0,0 +1,199 @@
+"""
+Latest-quote table fed by a background tick poller. Subscribed symbols are
+refreshed with symbol_info_tick in one MT5 worker job per cycle. Readers never
+lock: table entries are (received_at, tick dict) tuples that are replaced
+whole, never mutated, so a dict lookup always sees a consistent quote.
+
+Symbols come from TICK_POLL_SYMBOLS (always polled), from pins held by other
+components, and from /symbol_info_tick requests (dropped after
+TICK_IDLE_SECONDS without a read). Requested symbols must exist in the
+symbol catalog once it is loaded, and at most TICK_MAX_REQUESTED of them are
+polled at a time.
+
+Ticks are stored and listeners notified only on the poller thread. Ticks
+read live by request handlers are handed over with offer() and stored at the
+start of the next poll cycle.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import MetaTrader5 as mt5
+
+from mt5_worker import run_mt5
+import symbols as catalog
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = float(os.environ.get('TICK_POLL_INTERVAL', 0.1))
+MAX_AGE = float(os.environ.get('TICK_MAX_AGE', 1.0))
+IDLE_SECONDS = float(os.environ.get('TICK_IDLE_SECONDS', 60))
+MAX_REQUESTED = int(os.environ.get('TICK_MAX_REQUESTED', 500))
+CONFIGURED_SYMBOLS = tuple(
+    s.strip() for s in os.environ.get('TICK_POLL_SYMBOLS', '').split(',') if s.strip()
+)
+
+_quotes: Dict[str, tuple] = {}
+_requested: Dict[str, float] = {}
+_pins: Dict[str, int] = {}
+_pins_lock = threading.Lock()
+_listeners: List[Callable[[Dict[str, dict]], None]] = []
+_offered: Dict[str, dict] = {}
+_offered_lock = threading.Lock()
+_wakeup = threading.Event()
+_poller: Optional[threading.Thread] = None
+_start_lock = threading.Lock()
+
+
+def _fetch_ticks(symbols) -> Dict[str, dict]:
+    """Runs on the MT5 worker: one symbol_info_tick per symbol."""
+    ticks = {}
+    for symbol in symbols:
+        tick = mt5.symbol_info_tick(symbol)
+        if tick is not None:
+            ticks[symbol] = tick._asdict()
+    return ticks
+
+
+def _active_symbols() -> List[str]:
+    now = time.monotonic()
+    for symbol, last_read in list(_requested.items()):
+        if now - last_read > IDLE_SECONDS:
+            _requested.pop(symbol, None)
+    return list(set(CONFIGURED_SYMBOLS).union(_requested, _pins))
+
+
+def _store(ticks: Dict[str, dict]) -> Dict[str, dict]:
+    """Poller thread only: store fetched ticks, notify listeners and return the ones that changed."""
+    received = time.monotonic()
+    changed = {}
+    for symbol, tick in ticks.items():
+        previous = _quotes.get(symbol)
+        _quotes[symbol] = (received, tick)
+        if previous is None or previous[1] != tick:
+            changed[symbol] = tick
+    if changed:
+        for listener in list(_listeners):
+            try:
+                listener(changed)
+            except Exception as e:
+                logger.error(f"Tick listener failed: {e}")
+    return changed
+
+
+def _take_offered() -> Dict[str, dict]:
+    global _offered
+    with _offered_lock:
+        offered, _offered = _offered, {}
+    return offered
+
+
+def _poll_loop() -> None:
+    while True:
+        offered = _take_offered()
+        if offered:
+            _store(offered)
+        symbols = _active_symbols()
+        if not symbols:
+            _wakeup.wait()
+            _wakeup.clear()
+            continue
+        started = time.monotonic()
+        try:
+            _store(run_mt5(lambda: _fetch_ticks(symbols), timeout=10))
+        except Exception as e:
+            logger.error(f"Tick poller: {e}")
+        time.sleep(max(0.0, POLL_INTERVAL - (time.monotonic() - started)))
+
+
+def start_tick_poller() -> None:
+    """Start the background tick poller thread (idempotent)."""
+    global _poller
+    if _poller is not None:
+        return
+    with _start_lock:
+        if _poller is None:
+            _poller = threading.Thread(target=_poll_loop, daemon=True)
+            _poller.start()
+
+
+def subscribe(symbol: str) -> None:
+    """Pin symbol so it is polled until a matching unsubscribe()."""
+    with _pins_lock:
+        _pins[symbol] = _pins.get(symbol, 0) + 1
+    start_tick_poller()
+    _wakeup.set()
+
+
+def unsubscribe(symbol: str) -> None:
+    """Release a pin taken with subscribe()."""
+    with _pins_lock:
+        count = _pins.get(symbol, 0) - 1
+        if count > 0:
+            _pins[symbol] = count
+        else:
+            _pins.pop(symbol, None)
+
+
+def offer(ticks: Dict[str, dict]) -> None:
+    """Hand ticks read outside the poller to it; they are stored (and listeners notified) on its thread."""
+    if ticks:
+        with _offered_lock:
+            _offered.update(ticks)
+        start_tick_poller()
+        _wakeup.set()
+
+
+def track(symbols: List[str]) -> None:
+    """
+    Poll symbols as if they had just been read (dropped after TICK_IDLE_SECONDS
+    without a read). Symbols missing from the loaded catalog, or beyond
+    TICK_MAX_REQUESTED, are ignored.
+    """
+    now = time.monotonic()
+    added = False
+    for symbol in symbols:
+        if symbol in _requested:
+            _requested[symbol] = now
+        elif len(_requested) < MAX_REQUESTED and (not catalog.is_loaded() or catalog.get(symbol) is not None):
+            _requested[symbol] = now
+            added = True
+    if added:
+        start_tick_poller()
+        _wakeup.set()
+
+
+def forget(symbols: List[str]) -> None:
+    """Stop polling symbols read via get_tick() and drop their stored quotes (pins are kept)."""
+    for symbol in symbols:
+        _requested.pop(symbol, None)
+        if symbol not in _pins and symbol not in CONFIGURED_SYMBOLS:
+            _quotes.pop(symbol, None)
+
+
+def add_listener(listener: Callable[[Dict[str, dict]], None]) -> None:
+    """Call listener({symbol: tick}) on the poller thread whenever stored ticks change."""
+    _listeners.append(listener)
+
+
+def get_quote(symbol: str) -> Optional[tuple]:
+    """Return (received_at monotonic, tick dict) for symbol, or None. Does not subscribe."""
+    return _quotes.get(symbol)
+
+
+def get_tick(symbol: str, max_age: Optional[float] = None) -> Optional[dict]:
+    """
+    Return the stored tick for symbol if polled within max_age seconds
+    (default TICK_MAX_AGE), else None. Keeps the symbol in the polled set,
+    unless it is not in the loaded catalog or TICK_MAX_REQUESTED is reached.
+    """
+    track([symbol])
+    entry = _quotes.get(symbol)
+    if entry is None:
+        return None
+    received, tick = entry
+    if time.monotonic() - received > (MAX_AGE if max_age is None else max_age):
+        return None
+    return tick
@@ -0,0 +1,109 @@
+"""
+Cacheable JSON responses. A Payload holds an encoded body and its strong
+ETag; routes keep Payloads in the cache so a conditional request
+(If-None-Match) is answered with 304 straight from the cache, without an MT5
+call or re-encoding. Compressed variants (gzip, and zstd when the zstandard
+package is installed) are negotiated from Accept-Encoding and stored on the
+Payload, so a cache hit never recompresses.
+"""
+import gzip
+import hashlib
+import os
+import threading
+
+from flask import current_app, request
+
+from serialize import json_body
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Bodies smaller than this go out uncompressed
+MIN_COMPRESS_BYTES = int(os.environ.get('MIN_COMPRESS_BYTES', 1024))
+GZIP_LEVEL = 5
+ZSTD_LEVEL = 3
+# Preferred first; short suffix keeps each encoding's ETag distinct
+ENCODINGS = {'zstd': 'zst', 'gzip': 'gz'} if zstandard is not None else {'gzip': 'gz'}
+
+_zstd_local = threading.local()
+
+
+def _compress(data: bytes, encoding: str) -> bytes:
+    if encoding == 'gzip':
+        return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    compressor = getattr(_zstd_local, 'compressor', None)
+    if compressor is None:
+        compressor = _zstd_local.compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+    return compressor.compress(data)
+
+
+def negotiate_encoding(size: int):
+    """Return the content coding to use for a body of this size, or None for identity."""
+    if size < MIN_COMPRESS_BYTES:
+        return None
+    return request.accept_encodings.best_match(list(ENCODINGS))
+
+
+class Payload:
+    """Encoded JSON response body (with jsonify's trailing newline), its ETag and compressed variants."""
+    __slots__ = ('data', 'etag', '_variants')
+
+    def __init__(self, body: str):
+        self.data = f"{body}\n".encode('utf-8')
+        self.etag = hashlib.blake2b(self.data, digest_size=16).hexdigest()
+        self._variants = {}
+
+    def variant(self, encoding):
+        """Return (data, etag) for the content coding, compressing on first use."""
+        if encoding is None:
+            return self.data, self.etag
+        variant = self._variants.get(encoding)
+        if variant is None:
+            variant = (_compress(self.data, encoding), f"{self.etag}-{ENCODINGS[encoding]}")
+            self._variants[encoding] = variant
+        return variant
+
+
+def json_payload(obj) -> Payload:
+    """Build a Payload from a JSON-serializable object."""
+    return Payload(json_body(obj))
+
+
+def payload_response(payload: Payload, status: int = 200):
+    """Return payload in the negotiated encoding, or 304 if the client already holds it."""
+    encoding = negotiate_encoding(len(payload.data))
+    data, etag = payload.variant(encoding)
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.response_class(data, status=status, mimetype=current_app.json.mimetype)
+    response.set_etag(etag)
+    if len(payload.data) >= MIN_COMPRESS_BYTES:
+        response.vary.add('Accept-Encoding')
+        if encoding is not None:
+            response.content_encoding = encoding
+    return response
+
+
+def compress_response(response):
+    """
+    after_request hook: compress other JSON responses (history, orders, ...)
+    when the client accepts it. Payload responses are already encoded.
+    """
+    if (response.status_code < 200 or response.status_code in (204, 304)
+            or response.direct_passthrough or response.is_streamed
+            or response.content_encoding or response.get_etag()[0]
+            or not response.is_json):
+        return response
+    data = response.get_data()
+    if len(data) < MIN_COMPRESS_BYTES:
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate_encoding(len(data))
+    if encoding is None:
+        return response
+    response.set_data(_compress(data, encoding))
+    response.content_encoding = encoding
+    return response
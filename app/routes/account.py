@@ -1,9 +1,11 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
 import MetaTrader5 as mt5
 import logging
 from flasgger import swag_from
 from mt5_worker import run_mt5
 from cache import get as cache_get, set as cache_set
+from responses import json_payload, payload_response
+import account_series
 
 account_bp = Blueprint('account', __name__)
 logger = logging.getLogger(__name__)
@@ -54,7 +56,7 @@ def get_account_info():
     try:
         cached = cache_get(ACCOUNT_CACHE_KEY)
         if cached is not None:
-            return jsonify(cached), 200
+            return payload_response(cached)
         account_info = run_mt5(mt5.account_info)
         if account_info is None:
             error_code, error_str = run_mt5(mt5.last_error)
@@ -65,10 +67,88 @@ def get_account_info():
             }), 400
         
         # Convert to dictionary
-        account_dict = account_info._asdict()
-        cache_set(ACCOUNT_CACHE_KEY, account_dict, ACCOUNT_TTL)
-        return jsonify(account_dict), 200
+        payload = json_payload(account_info._asdict())
+        cache_set(ACCOUNT_CACHE_KEY, payload, ACCOUNT_TTL)
+        return payload_response(payload)
     
     except Exception as e:
         logger.error(f"Error in get_account_info: {str(e)}")
         return jsonify({"error": "Internal server error"}), 500
+
+
+@account_bp.route('/account_history', methods=['GET'])
+@swag_from({
+    'tags': ['Account'],
+    'parameters': [
+        {
+            'name': 'from',
+            'in': 'query',
+            'type': 'number',
+            'required': False,
+            'description': 'Start of the range (Unix seconds). Defaults to the oldest stored sample.'
+        },
+        {
+            'name': 'to',
+            'in': 'query',
+            'type': 'number',
+            'required': False,
+            'description': 'End of the range (Unix seconds). Defaults to the latest sample.'
+        },
+        {
+            'name': 'points',
+            'in': 'query',
+            'type': 'integer',
+            'required': False,
+            'description': 'Downsample to at most this many points (last sample per equal time bucket).'
+        }
+    ],
+    'responses': {
+        200: {
+            'description': 'Account samples as parallel arrays, oldest first.',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'time_msc': {'type': 'array', 'items': {'type': 'integer'}},
+                    'balance': {'type': 'array', 'items': {'type': 'number'}},
+                    'equity': {'type': 'array', 'items': {'type': 'number'}},
+                    'margin': {'type': 'array', 'items': {'type': 'number'}},
+                    'margin_free': {'type': 'array', 'items': {'type': 'number'}},
+                    'margin_level': {'type': 'array', 'items': {'type': 'number'}},
+                    'interval': {'type': 'number'},
+                    'capacity': {'type': 'integer'}
+                }
+            }
+        },
+        400: {
+            'description': 'Invalid request parameters.'
+        },
+        500: {
+            'description': 'Internal server error.'
+        }
+    }
+})
+def get_account_history():
+    """
+    Get Account History
+    ---
+    description: Balance, equity, margin, free margin and margin level sampled in the background every ACCOUNT_SAMPLE_INTERVAL seconds. Served from memory; does not call the terminal.
+    """
+    try:
+        from_s = request.args.get('from', type=float)
+        to_s = request.args.get('to', type=float)
+        points = request.args.get('points', type=int)
+        if points is not None and points < 1:
+            return jsonify({"error": "points must be a positive integer"}), 400
+
+        result = account_series.series(
+            None if from_s is None else int(from_s * 1000),
+            None if to_s is None else int(to_s * 1000),
+            points,
+        )
+        result["interval"] = account_series.INTERVAL
+        result["capacity"] = account_series.CAPACITY
+        return jsonify(result), 200
+
+    except Exception as e:
+        logger.error(f"Error in get_account_history: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
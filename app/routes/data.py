@@ -3,16 +3,61 @@ import MetaTrader5 as mt5
 import logging
 from datetime import datetime
 import pytz
-import pandas as pd
 from flasgger import swag_from
 from lib import get_timeframe
 from mt5_worker import run_mt5
 from cache import get as cache_get, set as cache_set, ttl_for_timeframe
+import bars
+import indicators
+from serialize import http_dates, rates_json
+from responses import Payload, payload_response
 
 data_bp = Blueprint('data', __name__)
 logger = logging.getLogger(__name__)
 FETCH_DATA_RANGE_TTL = 60
 
+
+def _get_rates_pos(symbol, timeframe, num_bars):
+    """Return the raw copy_rates_from_pos array (cached per timeframe TTL), or None."""
+    cache_key = ("rates_pos", symbol, timeframe, num_bars)
+    rates = cache_get(cache_key)
+    if rates is not None:
+        return rates
+    mt5_timeframe = get_timeframe(timeframe)
+    rates = run_mt5(lambda: mt5.copy_rates_from_pos(symbol, mt5_timeframe, 0, num_bars))
+    if rates is not None:
+        cache_set(cache_key, rates, ttl_for_timeframe(timeframe))
+    return rates
+
+
+def _get_rates_range(symbol, timeframe, start_str, end_str):
+    """Return the raw copy_rates_range array (cached FETCH_DATA_RANGE_TTL), or None."""
+    cache_key = ("rates_range", symbol, timeframe, start_str, end_str)
+    rates = cache_get(cache_key)
+    if rates is not None:
+        return rates
+    mt5_timeframe = get_timeframe(timeframe)
+    utc = pytz.UTC
+    start_date = utc.localize(datetime.fromisoformat(start_str.replace('Z', '+00:00')))
+    end_date = utc.localize(datetime.fromisoformat(end_str.replace('Z', '+00:00')))
+    rates = run_mt5(lambda: mt5.copy_rates_range(symbol, mt5_timeframe, start_date, end_date))
+    if rates is not None:
+        cache_set(cache_key, rates, FETCH_DATA_RANGE_TTL)
+    return rates
+
+
+def _since_payload(rates, since):
+    """
+    Payload for a delta poll: bars newer than since plus the forming (last) bar,
+    and the new cursor, which is the time of the last closed bar.
+    """
+    if len(rates) == 0:
+        return Payload(f'{{"bars":[],"cursor":{since}}}')
+    mask = rates['time'] > since
+    mask[-1] = True
+    cursor = max(since, int(rates['time'][-2])) if len(rates) > 1 else since
+    return Payload(f'{{"bars":{rates_json(rates[mask])},"cursor":{cursor}}}')
+
 @data_bp.route('/fetch_data_pos', methods=['GET'])
 @swag_from({
     'tags': ['Data'],
@@ -39,6 +84,13 @@ FETCH_DATA_RANGE_TTL = 60
             'required': False,
             'default': 100,
             'description': 'Number of bars to fetch.'
+        },
+        {
+            'name': 'since',
+            'in': 'query',
+            'type': 'integer',
+            'required': False,
+            'description': 'Delta cursor (bar time, Unix seconds). When set, the response is {bars, cursor}: only bars newer than since plus the forming bar. Pass the returned cursor on the next poll.'
         }
     ],
     'responses': {
@@ -82,25 +134,36 @@ def fetch_data_pos_endpoint():
         symbol = request.args.get('symbol')
         timeframe = request.args.get('timeframe', 'M1')
         num_bars = int(request.args.get('num_bars', 100))
+        since = request.args.get('since')
         
         if not symbol:
             return jsonify({"error": "Symbol parameter is required"}), 400
 
+        get_timeframe(timeframe)
+        live = bars.live_bars(symbol, timeframe)
+
+        if since is not None:
+            rates = _get_rates_pos(symbol, timeframe, num_bars)
+            if rates is None:
+                return jsonify({"error": "Failed to get rates data"}), 404
+            bars.track(symbol, timeframe)
+            return payload_response(_since_payload(bars.merge(rates, live), int(since)))
+
+        # Cached payload is reused while the live forming bar is unchanged
         cache_key = ("fetch_data_pos", symbol, timeframe, num_bars)
         cached = cache_get(cache_key)
-        if cached is not None:
-            return jsonify(cached)
+        if cached is not None and cached[0] == live:
+            bars.track(symbol, timeframe)
+            return payload_response(cached[1])
 
-        mt5_timeframe = get_timeframe(timeframe)
-        rates = run_mt5(lambda: mt5.copy_rates_from_pos(symbol, mt5_timeframe, 0, num_bars))
+        rates = _get_rates_pos(symbol, timeframe, num_bars)
         if rates is None:
             return jsonify({"error": "Failed to get rates data"}), 404
         
-        df = pd.DataFrame(rates)
-        df['time'] = pd.to_datetime(df['time'], unit='s')
-        records = df.to_dict(orient='records')
-        cache_set(cache_key, records, ttl_for_timeframe(timeframe))
-        return jsonify(records)
+        bars.track(symbol, timeframe)
+        payload = Payload(rates_json(bars.merge(rates, live)))
+        cache_set(cache_key, (live, payload), ttl_for_timeframe(timeframe))
+        return payload_response(payload)
     
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
@@ -108,6 +171,107 @@ def fetch_data_pos_endpoint():
         logger.error(f"Error in fetch_data_pos: {str(e)}")
         return jsonify({"error": "Internal server error"}), 500
 
+@data_bp.route('/fetch_indicators', methods=['GET'])
+@swag_from({
+    'tags': ['Data'],
+    'parameters': [
+        {
+            'name': 'symbol',
+            'in': 'query',
+            'type': 'string',
+            'required': True,
+            'description': 'Symbol name to compute indicators for.'
+        },
+        {
+            'name': 'timeframe',
+            'in': 'query',
+            'type': 'string',
+            'required': False,
+            'default': 'M1',
+            'description': 'Timeframe for the data (e.g., M1, M5, H1).'
+        },
+        {
+            'name': 'num_bars',
+            'in': 'query',
+            'type': 'integer',
+            'required': False,
+            'default': 100,
+            'description': 'Number of bars to compute over (same window as fetch_data_pos).'
+        },
+        {
+            'name': 'indicators',
+            'in': 'query',
+            'type': 'string',
+            'required': True,
+            'description': 'Comma-separated indicators with colon-separated parameters: sma:N, ema:N, rsi:N, atr:N, bbands:N[:width].'
+        }
+    ],
+    'responses': {
+        200: {
+            'description': 'Indicators computed successfully. Series are aligned with time; null during warm-up.',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'symbol': {'type': 'string'},
+                    'timeframe': {'type': 'string'},
+                    'time': {'type': 'array', 'items': {'type': 'string', 'format': 'date-time'}},
+                    'indicators': {
+                        'type': 'object',
+                        'additionalProperties': {'type': 'array', 'items': {'type': 'number'}}
+                    }
+                }
+            }
+        },
+        400: {
+            'description': 'Invalid request parameters.'
+        },
+        404: {
+            'description': 'Failed to get rates data.'
+        },
+        500: {
+            'description': 'Internal server error.'
+        }
+    }
+})
+def fetch_indicators_endpoint():
+    """
+    Fetch Technical Indicators
+    ---
+    description: Compute SMA/EMA/RSI/ATR/Bollinger series over the cached bars used by fetch_data_pos.
+    """
+    try:
+        symbol = request.args.get('symbol')
+        timeframe = request.args.get('timeframe', 'M1')
+        num_bars = int(request.args.get('num_bars', 100))
+        specs_str = request.args.get('indicators')
+
+        if not symbol or not specs_str:
+            return jsonify({"error": "Symbol and indicators parameters are required"}), 400
+
+        specs = indicators.parse_specs(specs_str)
+        rates = _get_rates_pos(symbol, timeframe, num_bars)
+        if rates is None or len(rates) == 0:
+            return jsonify({"error": "Failed to get rates data"}), 404
+        bars.track(symbol, timeframe)
+        rates = bars.merge(rates, bars.live_bars(symbol, timeframe))
+
+        series = indicators.compute(symbol, timeframe.upper(), rates, specs)
+        return jsonify({
+            "symbol": symbol,
+            "timeframe": timeframe.upper(),
+            "time": http_dates(rates['time']),
+            "indicators": {
+                name: [None if v != v else v for v in values.tolist()]
+                for name, values in series.items()
+            }
+        })
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error in fetch_indicators: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+
 @data_bp.route('/fetch_data_range', methods=['GET'])
 @swag_from({
     'tags': ['Data'],
@@ -142,6 +306,13 @@ def fetch_data_pos_endpoint():
             'required': True,
             'format': 'date-time',
             'description': 'End datetime in ISO format.'
+        },
+        {
+            'name': 'since',
+            'in': 'query',
+            'type': 'integer',
+            'required': False,
+            'description': 'Delta cursor (bar time, Unix seconds). When set, the response is {bars, cursor}: only bars newer than since plus the forming bar. Pass the returned cursor on the next poll.'
         }
     ],
     'responses': {
@@ -186,29 +357,25 @@ def fetch_data_range_endpoint():
         timeframe = request.args.get('timeframe', 'M1')
         start_str = request.args.get('start')
         end_str = request.args.get('end')
+        since = request.args.get('since')
         
         if not all([symbol, start_str, end_str]):
             return jsonify({"error": "Symbol, start, and end parameters are required"}), 400
 
         cache_key = ("fetch_data_range", symbol, timeframe, start_str, end_str)
         cached = cache_get(cache_key)
-        if cached is not None:
-            return jsonify(cached)
+        if cached is not None and since is None:
+            return payload_response(cached)
 
-        mt5_timeframe = get_timeframe(timeframe)
-        utc = pytz.UTC
-        start_date = utc.localize(datetime.fromisoformat(start_str.replace('Z', '+00:00')))
-        end_date = utc.localize(datetime.fromisoformat(end_str.replace('Z', '+00:00')))
-        
-        rates = run_mt5(lambda: mt5.copy_rates_range(symbol, mt5_timeframe, start_date, end_date))
+        rates = _get_rates_range(symbol, timeframe, start_str, end_str)
         if rates is None:
             return jsonify({"error": "Failed to get rates data"}), 404
+        if since is not None:
+            return payload_response(_since_payload(rates, int(since)))
         
-        df = pd.DataFrame(rates)
-        df['time'] = pd.to_datetime(df['time'], unit='s')
-        records = df.to_dict(orient='records')
-        cache_set(cache_key, records, FETCH_DATA_RANGE_TTL)
-        return jsonify(records)
+        payload = Payload(rates_json(rates))
+        cache_set(cache_key, payload, FETCH_DATA_RANGE_TTL)
+        return payload_response(payload)
     
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
@@ -193,6 +193,13 @@ def get_order_from_ticket_endpoint():
             'type': 'integer',
             'required': False,
             'description': 'Position ID to filter deals.'
+        },
+        {
+            'name': 'since',
+            'in': 'query',
+            'type': 'integer',
+            'required': False,
+            'description': 'Delta cursor (deal ticket). When set, only deals with a greater ticket are returned, plus a cursor to pass on the next poll.'
         }
     ],
     'responses': {
@@ -227,6 +234,7 @@ def history_deals_get_endpoint():
         from_date = request.args.get('from_date')
         to_date = request.args.get('to_date')
         position = request.args.get('position')
+        since = request.args.get('since')
         
         if not all([from_date, to_date]):
             return jsonify({"error": "from_date and to_date parameters are required"}), 400
@@ -257,6 +265,11 @@ def history_deals_get_endpoint():
         if deals is None:
             return jsonify({"error": "Failed to get deals history"}), 404
         
+        # Delta poll: only deals after the cursor ticket
+        if since is not None:
+            since = int(since)
+            deals = [deal for deal in deals if deal.ticket > since]
+
         # Convert to list of dictionaries
         deals_list = [deal._asdict() for deal in deals]
         
@@ -267,10 +280,13 @@ def history_deals_get_endpoint():
                     deal_dict['time'], tz=pytz.UTC
                 ).isoformat()
         
-        return jsonify({
+        body = {
             "deals": deals_list,
             "total": len(deals_list)
-        }), 200
+        }
+        if since is not None:
+            body["cursor"] = max([since] + [deal['ticket'] for deal in deals_list])
+        return jsonify(body), 200
     
     except ValueError:
         return jsonify({"error": "Invalid parameter format"}), 400
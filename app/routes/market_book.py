@@ -0,0 +1,144 @@
+from flask import Blueprint, jsonify, request
+import logging
+from flasgger import swag_from
+import depth
+
+market_book_bp = Blueprint('market_book', __name__)
+logger = logging.getLogger(__name__)
+
+_SYMBOLS_BODY = {
+    'name': 'body',
+    'in': 'body',
+    'required': True,
+    'schema': {
+        'type': 'object',
+        'properties': {
+            'symbols': {'type': 'array', 'items': {'type': 'string'}}
+        },
+        'required': ['symbols']
+    }
+}
+
+
+def _symbols_from_body():
+    data = request.get_json(silent=True) or {}
+    symbols = data.get('symbols')
+    if isinstance(symbols, str):
+        symbols = [symbols]
+    if not symbols or not all(isinstance(s, str) and s for s in symbols):
+        return None
+    return symbols
+
+
+@market_book_bp.route('/market_book/subscribe', methods=['POST'])
+@swag_from({
+    'tags': ['Market Book'],
+    'parameters': [_SYMBOLS_BODY],
+    'responses': {
+        200: {
+            'description': 'Subscription result per symbol (market_book_add succeeded).',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'subscribed': {'type': 'object', 'additionalProperties': {'type': 'boolean'}}
+                }
+            }
+        },
+        400: {
+            'description': 'Invalid request body.'
+        },
+        500: {
+            'description': 'Internal server error.'
+        }
+    }
+})
+def market_book_subscribe_endpoint():
+    """
+    Subscribe to Market Depth
+    ---
+    description: Enable depth of market (market_book_add) for symbols and keep their books refreshed in the background until unsubscribed.
+    """
+    try:
+        symbols = _symbols_from_body()
+        if symbols is None:
+            return jsonify({"error": "symbols list is required"}), 400
+        return jsonify({"subscribed": depth.subscribe(symbols)}), 200
+    except Exception as e:
+        logger.error(f"Error in market_book_subscribe: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+
+
+@market_book_bp.route('/market_book/unsubscribe', methods=['POST'])
+@swag_from({
+    'tags': ['Market Book'],
+    'parameters': [_SYMBOLS_BODY],
+    'responses': {
+        200: {
+            'description': 'Symbols unsubscribed; books are released on the next refresh once unused.'
+        },
+        400: {
+            'description': 'Invalid request body.'
+        }
+    }
+})
+def market_book_unsubscribe_endpoint():
+    """
+    Unsubscribe from Market Depth
+    ---
+    description: Release a subscription taken with /market_book/subscribe (market_book_release once no reader uses the book).
+    """
+    symbols = _symbols_from_body()
+    if symbols is None:
+        return jsonify({"error": "symbols list is required"}), 400
+    depth.unsubscribe(symbols)
+    return jsonify({"message": "Unsubscribed", "symbols": symbols}), 200
+
+
+@market_book_bp.route('/market_book/<symbol>', methods=['GET'])
+@swag_from({
+    'tags': ['Market Book'],
+    'parameters': [
+        {
+            'name': 'symbol',
+            'in': 'path',
+            'type': 'string',
+            'required': True,
+            'description': 'Symbol name.'
+        }
+    ],
+    'responses': {
+        200: {
+            'description': 'Latest depth snapshot. Sides are parallel price/volume arrays, best level first.',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'symbol': {'type': 'string'},
+                    'seq': {'type': 'integer'},
+                    'time_msc': {'type': 'integer'},
+                    'bids': {'type': 'object'},
+                    'asks': {'type': 'object'}
+                }
+            }
+        },
+        404: {
+            'description': 'Market depth not available for the symbol.'
+        },
+        500: {
+            'description': 'Internal server error.'
+        }
+    }
+})
+def market_book_snapshot_endpoint(symbol):
+    """
+    Get Market Depth Snapshot
+    ---
+    description: Return the latest order book snapshot from memory. Unsubscribed symbols are added on first read and refreshed until idle.
+    """
+    try:
+        book = depth.get_book(symbol)
+        if book is None:
+            return jsonify({"error": f"Market depth not available for {symbol}"}), 404
+        return jsonify(book), 200
+    except Exception as e:
+        logger.error(f"Error in market_book snapshot: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
@@ -1,13 +1,22 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, make_response, request
 import MetaTrader5 as mt5
 import logging
+import time
 from flasgger import swag_from
 from datetime import datetime
 import pytz
 from mt5_worker import run_mt5
+import filling
+import idempotency
+import orders
+import pending
+import pretrade
+import submissions
 
 order_bp = Blueprint('order', __name__)
 logger = logging.getLogger(__name__)
+# How long a retry waits for the original request with the same idempotency key
+IDEMPOTENCY_WAIT_SECONDS = 60
 
 @order_bp.route('/order', methods=['POST'])
 @swag_from({
@@ -37,14 +46,26 @@ logger = logging.getLogger(__name__)
                     'comment': {'type': 'string', 'default': ''},
                     'type_filling': {
                         'type': 'string',
-                        'enum': ['ORDER_FILLING_IOC', 'ORDER_FILLING_FOK', 'ORDER_FILLING_RETURN']
+                        'enum': ['ORDER_FILLING_IOC', 'ORDER_FILLING_FOK', 'ORDER_FILLING_RETURN'],
+                        'description': 'Optional. If omitted, the symbol\'s allowed mode is used and remembered; a mode rejected as unsupported is replaced by the next one automatically.'
                     },
                     'sl': {'type': 'number'},
                     'tp': {'type': 'number'},
-                    'expiration': {'type': 'string', 'format': 'date-time'}
+                    'expiration': {'type': 'string', 'format': 'date-time'},
+                    'idempotency_key': {'type': 'string', 'description': 'Alternative to the Idempotency-Key header.'},
+                    'max_attempts': {'type': 'integer', 'description': 'Market orders: total sends on requote/price changed/price off, re-priced from a fresh tick in the same MT5 job (default ORDER_MAX_ATTEMPTS).'},
+                    'max_slippage': {'type': 'number', 'description': 'Market orders: stop retrying once the price has moved this many points against the first attempt (default: deviation).'},
+                    'async': {'type': 'boolean', 'default': False, 'description': 'Queue the order and return 202 with a submission id instead of waiting for order_send. Track it with /order_status or "order" stream events.'}
                 },
                 'required': ['symbol', 'volume', 'type']
             }
+        },
+        {
+            'name': 'Idempotency-Key',
+            'in': 'header',
+            'type': 'string',
+            'required': False,
+            'description': 'Client-chosen unique key. A retry with the same key waits for the original request and returns its response (Idempotent-Replayed: true) instead of sending another order. 5xx responses are not stored, so the key can be retried.'
         }
     ],
     'responses': {
@@ -63,13 +84,41 @@ logger = logging.getLogger(__name__)
                             'price': {'type': 'number'},
                             'symbol': {'type': 'string'}
                         }
+                    },
+                    'attempts': {
+                        'type': 'array',
+                        'items': {
+                            'type': 'object',
+                            'properties': {
+                                'price': {'type': 'number'},
+                                'retcode': {'type': 'integer'},
+                                'latency_ms': {'type': 'number'},
+                                'stopped': {'type': 'string'}
+                            }
+                        }
                     }
                 }
             }
         },
+        202: {
+            'description': 'Async order accepted and queued.',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'id': {'type': 'string'},
+                    'status': {'type': 'string'}
+                }
+            }
+        },
         400: {
             'description': 'Bad request or order failed.'
         },
+        409: {
+            'description': 'A request with this idempotency key is still in progress.'
+        },
+        422: {
+            'description': 'Idempotency key was already used with a different request body.'
+        },
         500: {
             'description': 'Internal server error.'
         }
@@ -79,94 +128,74 @@ def send_order_endpoint():
     """
     Send Order (Market, Limit, or Stop)
     ---
-    description: Execute a market order or place a pending order (limit/stop).
+    description: Execute a market order or place a pending order (limit/stop). Supports idempotency keys for safe client retries.
     """
-    try:
-        data = request.get_json()
-        if not data:
-            return jsonify({"error": "Order data is required"}), 400
+    data = request.get_json(silent=True)
+    key = request.headers.get('Idempotency-Key')
+    if isinstance(data, dict):
+        key = key or data.get('idempotency_key')
+        data = {k: v for k, v in data.items() if k != 'idempotency_key'}
+    if not key:
+        return _send_order(data)
 
-        required_fields = ['symbol', 'volume', 'type']
-        if not all(field in data for field in required_fields):
-            return jsonify({"error": "Missing required fields"}), 400
-
-        # Map order types to MT5 constants
-        order_type_map = {
-            'BUY': mt5.ORDER_TYPE_BUY,
-            'SELL': mt5.ORDER_TYPE_SELL,
-            'BUY_LIMIT': mt5.ORDER_TYPE_BUY_LIMIT,
-            'SELL_LIMIT': mt5.ORDER_TYPE_SELL_LIMIT,
-            'BUY_STOP': mt5.ORDER_TYPE_BUY_STOP,
-            'SELL_STOP': mt5.ORDER_TYPE_SELL_STOP,
-            'BUY_STOP_LIMIT': mt5.ORDER_TYPE_BUY_STOP_LIMIT,
-            'SELL_STOP_LIMIT': mt5.ORDER_TYPE_SELL_STOP_LIMIT
-        }
+    digest = idempotency.fingerprint(data)
+    entry, owner = idempotency.begin(key, digest)
+    if not owner:
+        if entry["digest"] != digest:
+            return jsonify({"error": "Idempotency key was already used with a different request"}), 422
+        stored = idempotency.wait(entry, IDEMPOTENCY_WAIT_SECONDS)
+        if stored is None:
+            return jsonify({"error": "A request with this idempotency key is still in progress"}), 409
+        return Response(stored[0], status=stored[1], mimetype='application/json', headers={'Idempotent-Replayed': 'true'})
 
-        order_type_str = data['type']
-        if order_type_str not in order_type_map:
-            return jsonify({"error": f"Invalid order type: {order_type_str}"}), 400
+    try:
+        response = make_response(_send_order(data))
+    except Exception:
+        idempotency.abandon(key, entry)
+        raise
+    if response.status_code >= 500:
+        # Transient failures (e.g. worker timeout) must stay retryable under the same key
+        idempotency.abandon(key, entry)
+    else:
+        idempotency.complete(entry, (response.get_data(), response.status_code))
+    return response
 
-        mt5_order_type = order_type_map[order_type_str]
 
-        # Determine if this is a market order or pending order
-        is_market_order = order_type_str in ['BUY', 'SELL']
-        is_pending_order = not is_market_order
+def _send_order(data):
+    try:
+        if not data:
+            return jsonify({"error": "Order data is required"}), 400
 
-        # Map filling type string to MT5 constant
-        type_filling_map = {
-            'ORDER_FILLING_IOC': mt5.ORDER_FILLING_IOC,
-            'ORDER_FILLING_FOK': mt5.ORDER_FILLING_FOK,
-            'ORDER_FILLING_RETURN': mt5.ORDER_FILLING_RETURN
-        }
-        type_filling_str = data.get('type_filling', 'ORDER_FILLING_IOC').upper()
-        type_filling = type_filling_map.get(type_filling_str, mt5.ORDER_FILLING_IOC)
+        try:
+            request_data = orders.build_request(data)
+            policy = orders.retry_policy(data)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        is_market_order = orders.is_market(data)
 
-        # Build request
-        request_data = {
-            "action": mt5.TRADE_ACTION_DEAL if is_market_order else mt5.TRADE_ACTION_PENDING,
-            "symbol": data['symbol'],
-            "volume": float(data['volume']),
-            "type": mt5_order_type,
-            "deviation": data.get('deviation', 20),
-            "magic": data.get('magic', 0),
-            "comment": data.get('comment', ''),
-            "type_time": mt5.ORDER_TIME_GTC,
-            "type_filling": type_filling,
-        }
+        # Reject locally what the broker would reject (volume, stops, trade mode, stale quote)
+        invalid = pretrade.check_order(request_data)
+        if invalid:
+            return jsonify({"error": f"Order rejected: {invalid}"}), 400
 
-        # Add expiration if provided (for pending orders)
-        if 'expiration' in data and is_pending_order:
-            try:
-                expiration = datetime.fromisoformat(data['expiration'].replace('Z', '+00:00'))
-                if expiration.tzinfo is None:
-                    expiration = pytz.UTC.localize(expiration)
-                request_data["expiration"] = expiration
-            except ValueError:
-                return jsonify({"error": "Invalid expiration format. Use ISO 8601 format"}), 400
-
-        # Add optional SL/TP if provided
-        if 'sl' in data:
-            request_data["sl"] = float(data['sl'])
-        if 'tp' in data:
-            request_data["tp"] = float(data['tp'])
-
-        # For market orders, get current price and send in worker; for pending, set price and send in worker
+        if data.get('async', False) is not False:
+            if data['async'] is not True:
+                return jsonify({"error": "async must be a boolean"}), 400
+            return jsonify(submissions.submit(request_data, policy, data)), 202
+
+        # For market orders, get current price and send in worker; for pending, send in worker
         if is_market_order:
             def _get_tick_and_send():
                 tick = mt5.symbol_info_tick(data['symbol'])
                 if tick is None:
                     return None, "no_tick"
-                request_data["price"] = tick.ask if order_type_str == 'BUY' else tick.bid
-                result = mt5.order_send(request_data)
-                return result, None
-            result, err = run_mt5(_get_tick_and_send)
+                return orders.send(request_data, tick, policy), None
+            sent, err = run_mt5(_get_tick_and_send)
             if err == "no_tick":
                 return jsonify({"error": "Failed to get symbol price"}), 400
         else:
-            if 'price' not in data:
-                return jsonify({"error": "Price is required for limit/stop orders"}), 400
-            request_data["price"] = float(data['price'])
-            result = run_mt5(lambda: mt5.order_send(request_data))
+            sent = run_mt5(lambda: orders.send(request_data))
+        result, attempts = sent
         if result is None or result.retcode != mt5.TRADE_RETCODE_DONE:
             error_code, error_str = run_mt5(mt5.last_error)
             error_message = result.comment if result else "MT5 order_send returned None"
@@ -174,19 +203,339 @@ def send_order_endpoint():
             return jsonify({
                 "error": f"Order failed: {error_message}",
                 "mt5_error": error_str,
-                "result": result._asdict() if result else None
+                "result": result._asdict() if result else None,
+                "attempts": attempts
             }), 400
 
         action_word = "executed" if is_market_order else "placed"
         return jsonify({
             "message": f"Order {action_word} successfully",
-            "result": result._asdict()
+            "result": result._asdict(),
+            "attempts": attempts
         }), 200
     
     except Exception as e:
         logger.error(f"Error in send_order: {str(e)}")
         return jsonify({"error": "Internal server error"}), 500
 
+
+@order_bp.route('/order_status/<submission_id>', methods=['GET'])
+@swag_from({
+    'tags': ['Order'],
+    'parameters': [
+        {
+            'name': 'submission_id',
+            'in': 'path',
+            'type': 'string',
+            'required': True,
+            'description': 'Id returned by an async /order.'
+        }
+    ],
+    'responses': {
+        200: {
+            'description': 'Submission state.',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'id': {'type': 'string'},
+                    'status': {'type': 'string', 'enum': ['pending', 'sending', 'done', 'rejected', 'error', 'expired'], 'description': 'expired: not sent because it waited longer than SUBMISSION_QUEUE_TIMEOUT for the MT5 worker.'},
+                    'symbol': {'type': 'string'},
+                    'type': {'type': 'string'},
+                    'volume': {'type': 'number'},
+                    'submitted_time_msc': {'type': 'integer'},
+                    'elapsed_ms': {'type': 'number'},
+                    'error': {'type': 'string'},
+                    'result': {'type': 'object'},
+                    'attempts': {'type': 'array', 'items': {'type': 'object'}}
+                }
+            }
+        },
+        404: {
+            'description': 'Unknown or expired submission id.'
+        }
+    }
+})
+def order_status_endpoint(submission_id):
+    """
+    Get Async Order Status
+    ---
+    description: Return the state of an order submitted with async true, including the order_send result once it has completed.
+    """
+    submission = submissions.get(submission_id)
+    if submission is None:
+        return jsonify({"error": "Submission not found"}), 404
+    return jsonify(submission), 200
+
+
+def _send_batch(legs, policies, stop_on_reject):
+    """
+    Runs on the MT5 worker: one symbol_info_tick per market symbol, then every
+    order_send back-to-back. Returns per-leg results in leg order.
+    """
+    batch_started = time.perf_counter()
+    ticks = {}
+    for request_data in legs:
+        symbol = request_data["symbol"]
+        if request_data["action"] == mt5.TRADE_ACTION_DEAL and symbol not in ticks:
+            ticks[symbol] = mt5.symbol_info_tick(symbol)
+
+    results = []
+    rejected = False
+    for index, request_data in enumerate(legs):
+        leg = {"index": index, "symbol": request_data["symbol"]}
+        results.append(leg)
+        if rejected and stop_on_reject:
+            leg["status"] = "skipped"
+            continue
+        is_market_order = request_data["action"] == mt5.TRADE_ACTION_DEAL
+        if is_market_order and ticks[request_data["symbol"]] is None:
+            leg.update(status="rejected", error="Failed to get symbol price")
+            rejected = True
+            continue
+        leg["sent_at_ms"] = (time.perf_counter() - batch_started) * 1000
+        result, leg["attempts"] = orders.send(request_data, ticks.get(request_data["symbol"]), policies[index])
+        leg["latency_ms"] = sum(attempt["latency_ms"] for attempt in leg["attempts"])
+        leg["result"] = result._asdict() if result else None
+        if result is None or result.retcode != mt5.TRADE_RETCODE_DONE:
+            leg["status"] = "rejected"
+            leg["error"] = result.comment if result else "MT5 order_send returned None"
+            leg["mt5_error"] = mt5.last_error()[1]
+            rejected = True
+        else:
+            leg["status"] = "done"
+    return results, (time.perf_counter() - batch_started) * 1000
+
+
+@order_bp.route('/order_batch', methods=['POST'])
+@swag_from({
+    'tags': ['Order'],
+    'parameters': [
+        {
+            'name': 'body',
+            'in': 'body',
+            'required': True,
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'orders': {
+                        'type': 'array',
+                        'description': 'Order legs with the same fields as /order.',
+                        'items': {'type': 'object'}
+                    },
+                    'stop_on_reject': {'type': 'boolean', 'default': False}
+                },
+                'required': ['orders']
+            }
+        }
+    ],
+    'responses': {
+        200: {
+            'description': 'Batch processed; see per-leg status (done, rejected or skipped).',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'results': {
+                        'type': 'array',
+                        'items': {
+                            'type': 'object',
+                            'properties': {
+                                'index': {'type': 'integer'},
+                                'symbol': {'type': 'string'},
+                                'status': {'type': 'string', 'enum': ['done', 'rejected', 'skipped']},
+                                'result': {'type': 'object'},
+                                'error': {'type': 'string'},
+                                'mt5_error': {'type': 'string'},
+                                'sent_at_ms': {'type': 'number', 'description': 'Milliseconds from batch start to this order_send.'},
+                                'latency_ms': {'type': 'number', 'description': 'order_send duration in milliseconds (all attempts).'},
+                                'attempts': {'type': 'array', 'items': {'type': 'object'}, 'description': 'Per-attempt price, retcode and latency_ms.'}
+                            }
+                        }
+                    },
+                    'succeeded': {'type': 'integer'},
+                    'rejected': {'type': 'integer'},
+                    'skipped': {'type': 'integer'},
+                    'elapsed_ms': {'type': 'number'}
+                }
+            }
+        },
+        400: {
+            'description': 'Invalid request body or an invalid leg (nothing was sent).'
+        },
+        500: {
+            'description': 'Internal server error.'
+        }
+    }
+})
+def send_order_batch_endpoint():
+    """
+    Send Order Batch
+    ---
+    description: Validate all legs (locally, against the symbol catalog), then send every order back-to-back in a single MT5 worker job with one tick read per symbol. With stop_on_reject, legs after the first rejection are skipped.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        legs = data.get('orders')
+        if not isinstance(legs, list) or not legs:
+            return jsonify({"error": "orders list is required"}), 400
+        stop_on_reject = bool(data.get('stop_on_reject', False))
+
+        requests_data, policies, errors = [], [], []
+        for index, leg in enumerate(legs):
+            try:
+                if not isinstance(leg, dict):
+                    raise ValueError("Order leg must be an object")
+                request_data = orders.build_request(leg)
+                policies.append(orders.retry_policy(leg))
+                invalid = pretrade.check_order(request_data)
+                if invalid:
+                    raise ValueError(invalid)
+                requests_data.append(request_data)
+            except ValueError as e:
+                errors.append({"index": index, "error": str(e)})
+        if errors:
+            return jsonify({"error": "Invalid order legs; nothing was sent", "legs": errors}), 400
+
+        results, elapsed_ms = run_mt5(lambda: _send_batch(requests_data, policies, stop_on_reject))
+        counts = {status: sum(1 for leg in results if leg["status"] == status) for status in ("done", "rejected", "skipped")}
+        return jsonify({
+            "results": results,
+            "succeeded": counts["done"],
+            "rejected": counts["rejected"],
+            "skipped": counts["skipped"],
+            "elapsed_ms": elapsed_ms
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Error in send_order_batch: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+
+
+def _check_orders(legs):
+    """Runs on the MT5 worker: order_check every request, with one tick read per market symbol."""
+    ticks = {}
+    checks = []
+    for request_data in legs:
+        symbol = request_data["symbol"]
+        if request_data["action"] == mt5.TRADE_ACTION_DEAL:
+            if symbol not in ticks:
+                ticks[symbol] = mt5.symbol_info_tick(symbol)
+            if ticks[symbol] is None:
+                checks.append((None, "Failed to get symbol price"))
+                continue
+            tick = ticks[symbol]
+            request_data["price"] = tick.ask if request_data["type"] == mt5.ORDER_TYPE_BUY else tick.bid
+        if request_data["type_filling"] is None:
+            request_data["type_filling"] = filling.resolve(symbol, request_data["action"] == mt5.TRADE_ACTION_DEAL)
+        result = mt5.order_check(request_data)
+        if result is None:
+            checks.append((None, f"order_check returned None: {mt5.last_error()[1]}"))
+            continue
+        check = result._asdict()
+        if hasattr(check.get('request'), '_asdict'):
+            check['request'] = check['request']._asdict()
+        checks.append((check, None))
+    return checks
+
+
+@order_bp.route('/order_check', methods=['POST'])
+@swag_from({
+    'tags': ['Order'],
+    'parameters': [
+        {
+            'name': 'body',
+            'in': 'body',
+            'required': True,
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'orders': {
+                        'type': 'array',
+                        'description': 'Orders with the same fields as /order.',
+                        'items': {'type': 'object'}
+                    }
+                },
+                'required': ['orders']
+            }
+        }
+    ],
+    'responses': {
+        200: {
+            'description': 'Dry-run result per order. Nothing is sent.',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'results': {
+                        'type': 'array',
+                        'items': {
+                            'type': 'object',
+                            'properties': {
+                                'index': {'type': 'integer'},
+                                'valid': {'type': 'boolean'},
+                                'error': {'type': 'string'},
+                                'check': {'type': 'object', 'description': 'order_check result (retcode, margin, margin_free, ...), for orders that passed local validation.'}
+                            }
+                        }
+                    },
+                    'valid': {'type': 'integer'},
+                    'invalid': {'type': 'integer'}
+                }
+            }
+        },
+        400: {
+            'description': 'Invalid request body.'
+        },
+        500: {
+            'description': 'Internal server error.'
+        }
+    }
+})
+def order_check_endpoint():
+    """
+    Check Orders (Dry Run)
+    ---
+    description: Validate many orders without sending them. Each order is validated locally against the symbol catalog; those that pass are checked with MT5 order_check, all in one worker job.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        legs = data.get('orders')
+        if not isinstance(legs, list) or not legs:
+            return jsonify({"error": "orders list is required"}), 400
+
+        results, to_check = [], []
+        for index, leg in enumerate(legs):
+            entry = {"index": index, "valid": False}
+            results.append(entry)
+            try:
+                if not isinstance(leg, dict):
+                    raise ValueError("Order leg must be an object")
+                request_data = orders.build_request(leg)
+            except ValueError as e:
+                entry["error"] = str(e)
+                continue
+            invalid = pretrade.check_order(request_data)
+            if invalid:
+                entry["error"] = invalid
+                continue
+            to_check.append((entry, request_data))
+
+        if to_check:
+            checks = run_mt5(lambda: _check_orders([request_data for _, request_data in to_check]))
+            for (entry, _), (check, error) in zip(to_check, checks):
+                entry["check"] = check
+                if error:
+                    entry["error"] = error
+                elif check["retcode"] != 0:
+                    entry["error"] = check.get("comment") or f"order_check retcode {check['retcode']}"
+                else:
+                    entry["valid"] = True
+
+        valid = sum(1 for entry in results if entry["valid"])
+        return jsonify({"results": results, "valid": valid, "invalid": len(results) - valid}), 200
+
+    except Exception as e:
+        logger.error(f"Error in order_check: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+
 @order_bp.route('/cancel_order', methods=['POST'])
 @swag_from({
     'tags': ['Order'],
@@ -279,6 +628,205 @@ def cancel_order_endpoint():
         logger.error(f"Error in cancel_order: {str(e)}")
         return jsonify({"error": "Internal server error"}), 500
 
+_ORDER_FILTERS = {
+    'magic': {'type': 'integer'},
+    'symbol': {'type': 'string'},
+    'type': {
+        'type': 'string',
+        'enum': ['BUY_LIMIT', 'SELL_LIMIT', 'BUY_STOP', 'SELL_STOP', 'BUY_STOP_LIMIT', 'SELL_STOP_LIMIT']
+    },
+    'tickets': {'type': 'array', 'items': {'type': 'integer'}}
+}
+_BULK_RESULTS = {
+    'type': 'array',
+    'items': {
+        'type': 'object',
+        'properties': {
+            'ticket': {'type': 'integer'},
+            'symbol': {'type': 'string'},
+            'status': {'type': 'string'},
+            'retcode': {'type': 'integer'},
+            'error': {'type': 'string'},
+            'latency_ms': {'type': 'number'}
+        }
+    }
+}
+
+
+def _order_filters(data):
+    """Filters from a bulk body. Empty strings/lists are rejected: they must not widen the selection to every order."""
+    filters = {name: data.get(name) for name in _ORDER_FILTERS}
+    for name, value in filters.items():
+        if value == [] or isinstance(value, str) and not value.strip():
+            raise ValueError(f"{name} must not be empty")
+    if filters['tickets'] is not None:
+        if not isinstance(filters['tickets'], list):
+            raise ValueError("tickets must be a list")
+        filters['tickets'] = [int(t) for t in filters['tickets']]
+    if filters['magic'] is not None:
+        filters['magic'] = int(filters['magic'])
+    return filters
+
+
+def _bulk_response(results, done_status):
+    done = sum(1 for r in results if r["status"] == done_status)
+    unchanged = sum(1 for r in results if r["status"] == "unchanged")
+    return jsonify({
+        "results": results,
+        done_status: done,
+        "unchanged": unchanged,
+        "failed": len(results) - done - unchanged
+    }), 200
+
+
+@order_bp.route('/cancel_orders', methods=['POST'])
+@swag_from({
+    'tags': ['Order'],
+    'parameters': [
+        {
+            'name': 'body',
+            'in': 'body',
+            'required': True,
+            'schema': {
+                'type': 'object',
+                'properties': dict(_ORDER_FILTERS, all={'type': 'boolean', 'description': 'Required to cancel every pending order when no filter is given.'})
+            }
+        }
+    ],
+    'responses': {
+        200: {
+            'description': 'Per-order cancel results.',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'results': _BULK_RESULTS,
+                    'cancelled': {'type': 'integer'},
+                    'failed': {'type': 'integer'}
+                }
+            }
+        },
+        400: {
+            'description': 'Invalid request body.'
+        },
+        500: {
+            'description': 'Internal server error.'
+        }
+    }
+})
+def cancel_orders_endpoint():
+    """
+    Cancel Pending Orders in Bulk
+    ---
+    description: Cancel every pending order matching magic, symbol, type and/or a ticket list in one MT5 worker job.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        filters = _order_filters(data)
+        if not any(value is not None for value in filters.values()) and not data.get('all'):
+            return jsonify({"error": "Give a filter (magic, symbol, type, tickets) or all: true"}), 400
+        results = run_mt5(lambda: pending.cancel(filters))
+        if results is None:
+            return jsonify({"error": "Failed to get orders"}), 500
+        return _bulk_response(results, "cancelled")
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error in cancel_orders: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+
+
+@order_bp.route('/modify_orders', methods=['POST'])
+@swag_from({
+    'tags': ['Order'],
+    'parameters': [
+        {
+            'name': 'body',
+            'in': 'body',
+            'required': True,
+            'schema': {
+                'type': 'object',
+                'properties': dict(
+                    _ORDER_FILTERS,
+                    modifications={
+                        'type': 'array',
+                        'description': 'Explicit changes; omitted fields keep their current value.',
+                        'items': {
+                            'type': 'object',
+                            'properties': {
+                                'ticket': {'type': 'integer'},
+                                'price': {'type': 'number'},
+                                'sl': {'type': 'number'},
+                                'tp': {'type': 'number'},
+                                'expiration': {'type': 'string', 'format': 'date-time'}
+                            },
+                            'required': ['ticket']
+                        }
+                    },
+                    shift_points={'type': 'number', 'description': 'Instead of modifications: move price, SL and TP of every matching order by this many points.'},
+                    expiration={'type': 'string', 'format': 'date-time', 'description': 'Instead of modifications: set this expiration on every matching order.'}
+                )
+            }
+        }
+    ],
+    'responses': {
+        200: {
+            'description': 'Per-order modification results.',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'results': _BULK_RESULTS,
+                    'modified': {'type': 'integer'},
+                    'unchanged': {'type': 'integer'},
+                    'failed': {'type': 'integer'}
+                }
+            }
+        },
+        400: {
+            'description': 'Invalid request body.'
+        },
+        500: {
+            'description': 'Internal server error.'
+        }
+    }
+})
+def modify_orders_endpoint():
+    """
+    Modify Pending Orders in Bulk
+    ---
+    description: Change price, SL/TP and expiration of many pending orders in one MT5 worker job. No-op changes are skipped and new levels are checked against the stops level locally.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        modifications = data.get('modifications')
+        if modifications:
+            if not isinstance(modifications, list) or not all(isinstance(m, dict) and 'ticket' in m for m in modifications):
+                return jsonify({"error": "Each modification needs a ticket"}), 400
+            changes = {}
+            for m in modifications:
+                change = {name: float(m[name]) for name in ('price', 'sl', 'tp') if m.get(name) is not None}
+                if m.get('expiration'):
+                    change['expiration'] = int(orders.parse_expiration(m['expiration']).timestamp())
+                changes[int(m['ticket'])] = change
+            results = run_mt5(lambda: pending.modify(changes))
+        else:
+            filters = _order_filters(data)
+            shift_points = float(data.get('shift_points') or 0)
+            expiration = int(orders.parse_expiration(data['expiration']).timestamp()) if data.get('expiration') else None
+            if not shift_points and expiration is None:
+                return jsonify({"error": "modifications list, shift_points or expiration is required"}), 400
+            if not any(value is not None for value in filters.values()):
+                return jsonify({"error": "Give a filter (magic, symbol, type, tickets) for shift_points/expiration"}), 400
+            results = run_mt5(lambda: pending.modify(filters=filters, shift_points=shift_points, expiration=expiration))
+        if results is None:
+            return jsonify({"error": "Failed to get orders"}), 500
+        return _bulk_response(results, "modified")
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error in modify_orders: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+
+
 @order_bp.route('/get_orders', methods=['GET'])
 @swag_from({
     'tags': ['Order'],
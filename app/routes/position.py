@@ -1,10 +1,15 @@
 from flask import Blueprint, jsonify, request
 import MetaTrader5 as mt5
 import logging
+import time
 from lib import close_position, close_all_positions, get_positions
 from flasgger import swag_from
 from mt5_worker import run_mt5
 from cache import get as cache_get, set as cache_set
+from responses import json_payload, payload_response
+import pretrade
+import quotes
+import sltp
 
 position_bp = Blueprint('position', __name__)
 logger = logging.getLogger(__name__)
@@ -104,6 +109,13 @@ def close_position_endpoint():
         logger.error(f"Error in close_position: {str(e)}")
         return jsonify({"error": "Internal server error"}), 500
 
+def _close_reports(reports):
+    return [
+        dict({key: value for key, value in report.items() if key != "result"}, closed=report["error"] is None)
+        for report in reports
+    ]
+
+
 @position_bp.route('/close_all_positions', methods=['POST'])
 @swag_from({
     'tags': ['Position'],
@@ -116,7 +128,9 @@ def close_position_endpoint():
                 'type': 'object',
                 'properties': {
                     'order_type': {'type': 'string', 'enum': ['BUY', 'SELL', 'all'], 'default': 'all'},
-                    'magic': {'type': 'integer'}
+                    'magic': {'type': 'integer'},
+                    'symbols': {'type': 'array', 'items': {'type': 'string'}, 'description': 'Only close positions in these symbols.'},
+                    'deviation': {'type': 'integer', 'default': 20}
                 }
             }
         }
@@ -141,7 +155,26 @@ def close_position_endpoint():
                                 # Add other relevant fields as needed
                             }
                         }
-                    }
+                    },
+                    'closes': {
+                        'type': 'array',
+                        'description': 'One entry per matching position, including failures.',
+                        'items': {
+                            'type': 'object',
+                            'properties': {
+                                'ticket': {'type': 'integer'},
+                                'symbol': {'type': 'string'},
+                                'volume': {'type': 'number'},
+                                'price': {'type': 'number', 'description': 'Requested close price.'},
+                                'closed': {'type': 'boolean'},
+                                'error': {'type': 'string'},
+                                'latency_ms': {'type': 'number'},
+                                'slippage_points': {'type': 'number', 'description': 'Adverse distance of the fill from the requested price.'}
+                            }
+                        }
+                    },
+                    'failed': {'type': 'integer'},
+                    'elapsed_ms': {'type': 'number', 'description': 'Time spent closing inside the MT5 worker job (excludes queue wait).'}
                 }
             }
         },
@@ -163,14 +196,32 @@ def close_all_positions_endpoint():
         data = request.get_json() or {}
         order_type = data.get('order_type', 'all')
         magic = data.get('magic')
-        
-        results = run_mt5(lambda: close_all_positions(order_type, magic))
-        if not results:
-            return jsonify({"message": "No positions were closed"}), 200
+        symbols_filter = data.get('symbols')
+        if isinstance(symbols_filter, str):
+            symbols_filter = [symbols_filter]
+        try:
+            deviation = int(data.get('deviation', 20))
+            magic = int(magic) if magic is not None else None
+        except (TypeError, ValueError):
+            return jsonify({"error": "deviation and magic must be integers"}), 400
+
+        def _close_all():
+            # Timed inside the job so queue wait is not counted
+            started = time.perf_counter()
+            reports = close_all_positions(order_type, magic, symbols_filter=symbols_filter, deviation=deviation)
+            return reports, (time.perf_counter() - started) * 1000
+
+        reports, elapsed_ms = run_mt5(_close_all)
+        closed = [report for report in reports if report["error"] is None]
+        if not closed:
+            return jsonify({"message": "No positions were closed", "closes": _close_reports(reports)}), 200
         
         return jsonify({
-            "message": f"Closed {len(results)} positions",
-            "results": [result._asdict() for result in results]
+            "message": f"Closed {len(closed)} positions",
+            "results": [report["result"]._asdict() for report in closed],
+            "closes": _close_reports(reports),
+            "failed": len(reports) - len(closed),
+            "elapsed_ms": elapsed_ms
         })
     
     except Exception as e:
@@ -247,7 +298,24 @@ def modify_sl_tp_endpoint():
             "tp": tp
         }
         
-        result = run_mt5(lambda: mt5.order_send(request_data))
+        def _check_and_send():
+            # Validate against stops/freeze levels with a local terminal read
+            # (no broker round trip) before order_send
+            positions = mt5.positions_get(ticket=position)
+            if positions:
+                current = positions[0]._asdict()
+                tick = quotes.get_tick(current['symbol'])
+                if tick is None:
+                    live = mt5.symbol_info_tick(current['symbol'])
+                    tick = live._asdict() if live is not None else None
+                invalid = pretrade.check_sltp(current, sl, tp, tick)
+                if invalid:
+                    return None, invalid
+            return mt5.order_send(request_data), None
+
+        result, invalid = run_mt5(_check_and_send)
+        if invalid:
+            return jsonify({"error": f"Failed to modify SL/TP: {invalid}"}), 400
         if result is None:
             error_code, error_str = run_mt5(mt5.last_error)
             return jsonify({
@@ -275,6 +343,123 @@ def modify_sl_tp_endpoint():
         logger.error(f"Error in modify_sl_tp: {str(e)}")
         return jsonify({"error": "Internal server error"}), 500
 
+@position_bp.route('/modify_sl_tp_bulk', methods=['POST'])
+@swag_from({
+    'tags': ['Position'],
+    'parameters': [
+        {
+            'name': 'body',
+            'in': 'body',
+            'required': True,
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'modifications': {
+                        'type': 'array',
+                        'description': 'Explicit targets; an omitted sl or tp keeps the current value.',
+                        'items': {
+                            'type': 'object',
+                            'properties': {
+                                'ticket': {'type': 'integer'},
+                                'sl': {'type': 'number'},
+                                'tp': {'type': 'number'}
+                            },
+                            'required': ['ticket']
+                        }
+                    },
+                    'rule': {
+                        'type': 'object',
+                        'description': 'Instead of modifications: apply to every position matching the filters.',
+                        'properties': {
+                            'magic': {'type': 'integer'},
+                            'symbol': {'type': 'string'},
+                            'order_type': {'type': 'string', 'enum': ['BUY', 'SELL']},
+                            'breakeven': {'type': 'boolean', 'description': 'Move SL to the open price when that tightens it.'},
+                            'offset_points': {'type': 'number', 'description': 'Breakeven offset in the position\'s favour.'},
+                            'sl_points': {'type': 'number', 'description': 'Set SL this many points from the open price.'},
+                            'tp_points': {'type': 'number', 'description': 'Set TP this many points from the open price.'}
+                        }
+                    }
+                }
+            }
+        }
+    ],
+    'responses': {
+        200: {
+            'description': 'Per-position results.',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'results': {
+                        'type': 'array',
+                        'items': {
+                            'type': 'object',
+                            'properties': {
+                                'ticket': {'type': 'integer'},
+                                'symbol': {'type': 'string'},
+                                'status': {'type': 'string', 'enum': ['modified', 'unchanged', 'rejected', 'not_found']},
+                                'sl': {'type': 'number'},
+                                'tp': {'type': 'number'},
+                                'retcode': {'type': 'integer'},
+                                'error': {'type': 'string'},
+                                'latency_ms': {'type': 'number'}
+                            }
+                        }
+                    },
+                    'modified': {'type': 'integer'},
+                    'unchanged': {'type': 'integer'},
+                    'failed': {'type': 'integer'}
+                }
+            }
+        },
+        400: {
+            'description': 'Invalid request body.'
+        },
+        500: {
+            'description': 'Internal server error.'
+        }
+    }
+})
+def modify_sl_tp_bulk_endpoint():
+    """
+    Modify SL/TP for Many Positions
+    ---
+    description: Apply SL/TP changes to many positions in one MT5 worker job. No-op changes are skipped and stops/freeze levels are checked locally before sending.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        modifications = data.get('modifications')
+        rule = data.get('rule')
+        if modifications:
+            if not isinstance(modifications, list) or not all(isinstance(m, dict) and 'ticket' in m for m in modifications):
+                return jsonify({"error": "Each modification needs a ticket"}), 400
+            targets = {
+                int(m['ticket']): (None if m.get('sl') is None else float(m['sl']), None if m.get('tp') is None else float(m['tp']))
+                for m in modifications
+            }
+            results = run_mt5(lambda: sltp.modify(targets))
+        elif isinstance(rule, dict):
+            if not rule.get('breakeven') and rule.get('sl_points') is None and rule.get('tp_points') is None:
+                return jsonify({"error": "rule needs breakeven, sl_points or tp_points"}), 400
+            results = run_mt5(lambda: sltp.modify(rule=rule))
+        else:
+            return jsonify({"error": "modifications list or rule is required"}), 400
+
+        modified = sum(1 for r in results if r["status"] == "modified")
+        unchanged = sum(1 for r in results if r["status"] == "unchanged")
+        return jsonify({
+            "results": results,
+            "modified": modified,
+            "unchanged": unchanged,
+            "failed": len(results) - modified - unchanged
+        }), 200
+
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error in modify_sl_tp_bulk: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+
 @position_bp.route('/get_positions', methods=['GET'])
 @swag_from({
     'tags': ['Position'],
@@ -337,20 +522,15 @@ def get_positions_endpoint():
         cache_key = ("get_positions", magic)
         cached = cache_get(cache_key)
         if cached is not None:
-            if cached == []:
-                return jsonify({"positions": []}), 200
-            return jsonify(cached), 200
+            return payload_response(cached)
 
-        positions_df = run_mt5(lambda: get_positions(magic))
-        if positions_df is None:
+        records = run_mt5(lambda: get_positions(magic))
+        if records is None:
             return jsonify({"error": "Failed to retrieve positions"}), 500
             
-        if positions_df.empty:
-            cache_set(cache_key, [], POSITIONS_TTL)
-            return jsonify({"positions": []}), 200
-        records = positions_df.to_dict(orient='records')
-        cache_set(cache_key, records, POSITIONS_TTL)
-        return jsonify(records), 200
+        payload = json_payload(records if records else {"positions": []})
+        cache_set(cache_key, payload, POSITIONS_TTL)
+        return payload_response(payload)
     
     except Exception as e:
         logger.error(f"Error in get_positions: {str(e)}")
@@ -0,0 +1,150 @@
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+import logging
+import queue
+from flasgger import swag_from
+import bars
+import depth
+import quotes
+import stream
+import submissions
+import trade_events
+from lib import get_timeframe
+
+stream_bp = Blueprint('stream', __name__)
+logger = logging.getLogger(__name__)
+HEARTBEAT_SECONDS = 15
+
+
+def _split(value):
+    return [item.strip() for item in (value or '').split(',') if item.strip()]
+
+
+@stream_bp.route('/stream', methods=['GET'])
+@swag_from({
+    'tags': ['Stream'],
+    'parameters': [
+        {
+            'name': 'symbols',
+            'in': 'query',
+            'type': 'string',
+            'required': False,
+            'description': 'Comma-separated symbols to receive tick events for.'
+        },
+        {
+            'name': 'timeframes',
+            'in': 'query',
+            'type': 'string',
+            'required': False,
+            'description': 'Comma-separated timeframes (e.g. M1,H1) to also receive bar events for, per symbol.'
+        },
+        {
+            'name': 'books',
+            'in': 'query',
+            'type': 'string',
+            'required': False,
+            'description': 'Comma-separated symbols to receive market depth for: a book_snapshot event, then book diff events ([price, volume] levels; volume 0 = removed).'
+        },
+        {
+            'name': 'trades',
+            'in': 'query',
+            'type': 'boolean',
+            'required': False,
+            'default': False,
+            'description': 'Also receive "trade" events for position and pending order changes (same objects as /trade_events).'
+        },
+        {
+            'name': 'orders',
+            'in': 'query',
+            'type': 'boolean',
+            'required': False,
+            'default': False,
+            'description': 'Also receive "order" events when async /order submissions complete (same objects as /order_status).'
+        }
+    ],
+    'produces': ['text/event-stream'],
+    'responses': {
+        200: {
+            'description': 'Server-Sent Events stream. "tick" events carry symbol_info_tick fields plus symbol; "bar" events carry fetch_data_pos bar fields plus symbol and timeframe; "book_snapshot"/"book" events carry market depth; "trade" events carry position/order changes; "order" events carry async order outcomes.'
+        },
+        400: {
+            'description': 'Invalid request parameters.'
+        }
+    }
+})
+def stream_endpoint():
+    """
+    Push Stream (Server-Sent Events)
+    ---
+    description: Subscribe to tick, bar, market depth, trade and async order updates. All clients share the internal pollers, so adding clients adds no MT5 load.
+    """
+    symbols = _split(request.args.get('symbols'))
+    timeframes = [tf.upper() for tf in _split(request.args.get('timeframes'))]
+    books = _split(request.args.get('books'))
+    trades = request.args.get('trades', 'false').lower() == 'true'
+    order_events = request.args.get('orders', 'false').lower() == 'true'
+    if not symbols and not books and not trades and not order_events:
+        return jsonify({"error": "Symbols, books, trades or orders parameter is required"}), 400
+
+    try:
+        for tf in timeframes:
+            get_timeframe(tf)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    bar_keys = [(symbol, tf) for symbol in symbols for tf in timeframes]
+    for symbol, tf in bar_keys:
+        bars.subscribe(symbol, tf)
+    for symbol in symbols:
+        quotes.subscribe(symbol)
+    if books:
+        try:
+            books = [symbol for symbol, ok in depth.subscribe(books).items() if ok]
+        except Exception as e:
+            # Release only the pins this request took
+            for symbol in symbols:
+                quotes.unsubscribe(symbol)
+            for symbol, tf in bar_keys:
+                bars.unsubscribe(symbol, tf)
+            logger.error(f"Error in stream: {str(e)}")
+            return jsonify({"error": "Internal server error"}), 500
+
+    topics = [("tick", symbol) for symbol in symbols] + [("bar", symbol, tf) for symbol, tf in bar_keys]
+    topics += [("book", symbol) for symbol in books]
+    if trades:
+        trade_events.subscribe()
+        topics.append(trade_events.TOPIC)
+    if order_events:
+        topics.append(submissions.TOPIC)
+    q = stream.subscribe(topics)
+
+    def generate():
+        try:
+            yield ": connected\n\n"
+            for symbol in symbols:
+                quote = quotes.get_quote(symbol)
+                if quote is not None:
+                    yield stream.format_event("tick", dict(quote[1], symbol=symbol))
+            for symbol in books:
+                book = depth.latest(symbol)
+                if book is not None:
+                    yield stream.format_event("book_snapshot", book)
+            while True:
+                try:
+                    yield q.get(timeout=HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+        finally:
+            stream.unsubscribe(q, topics)
+            for symbol in symbols:
+                quotes.unsubscribe(symbol)
+            for symbol, tf in bar_keys:
+                bars.unsubscribe(symbol, tf)
+            if books:
+                depth.unsubscribe(books)
+            if trades:
+                trade_events.unsubscribe()
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
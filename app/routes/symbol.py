@@ -3,6 +3,9 @@ import MetaTrader5 as mt5
 from flasgger import swag_from
 import logging
 from mt5_worker import run_mt5
+import quotes
+import quote_stats
+import symbols as catalog
 
 symbol_bp = Blueprint('symbol', __name__)
 logger = logging.getLogger(__name__)
@@ -17,6 +20,13 @@ logger = logging.getLogger(__name__)
             'type': 'string',
             'required': True,
             'description': 'Symbol name to retrieve tick information.'
+        },
+        {
+            'name': 'max_age',
+            'in': 'query',
+            'type': 'number',
+            'required': False,
+            'description': 'Maximum age in seconds of a polled quote served from memory (default TICK_MAX_AGE). 0 forces a live MT5 read.'
         }
     ],
     'responses': {
@@ -42,15 +52,189 @@ def get_symbol_info_tick_endpoint(symbol):
     """
     Get Symbol Tick Information
     ---
-    description: Retrieve the latest tick information for a given symbol.
+    description: Retrieve the latest tick information for a given symbol. Served from the background-polled quote table when fresh.
     """
+    max_age = request.args.get('max_age', type=float)
+    tick_dict = quotes.get_tick(symbol, max_age)
+    if tick_dict is not None:
+        return jsonify(tick_dict)
+
     tick = run_mt5(lambda: mt5.symbol_info_tick(symbol))
     if tick is None:
         return jsonify({"error": "Failed to get symbol tick info"}), 404
     
     tick_dict = tick._asdict()
+    quotes.offer({symbol: tick_dict})
     return jsonify(tick_dict)
 
+QUOTE_FIELDS = ('bid', 'ask', 'last', 'time', 'time_msc')
+
+
+def _fetch_ticks(symbols, group):
+    """Runs on the MT5 worker: resolve group (if any) and read ticks in one job."""
+    if group:
+        symbols = [info.name for info in (mt5.symbols_get(group=group) or ())]
+    ticks = {}
+    for symbol in symbols:
+        tick = mt5.symbol_info_tick(symbol)
+        if tick is not None:
+            ticks[symbol] = tick._asdict()
+    return symbols, ticks
+
+
+@symbol_bp.route('/symbol_info_ticks', methods=['GET'])
+@swag_from({
+    'tags': ['Symbol'],
+    'parameters': [
+        {
+            'name': 'symbols',
+            'in': 'query',
+            'type': 'string',
+            'required': False,
+            'description': 'Comma-separated symbol names.'
+        },
+        {
+            'name': 'group',
+            'in': 'query',
+            'type': 'string',
+            'required': False,
+            'description': 'symbols_get group pattern instead of a list, e.g. "*USD*" or "*,!*EUR*".'
+        },
+        {
+            'name': 'max_age',
+            'in': 'query',
+            'type': 'number',
+            'required': False,
+            'description': 'Maximum age in seconds of polled quotes served from memory (default TICK_MAX_AGE).'
+        }
+    ],
+    'responses': {
+        200: {
+            'description': 'Latest quotes as parallel arrays (index i of each array belongs to symbol[i]).',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'symbol': {'type': 'array', 'items': {'type': 'string'}},
+                    'bid': {'type': 'array', 'items': {'type': 'number'}},
+                    'ask': {'type': 'array', 'items': {'type': 'number'}},
+                    'last': {'type': 'array', 'items': {'type': 'number'}},
+                    'time': {'type': 'array', 'items': {'type': 'integer'}},
+                    'time_msc': {'type': 'array', 'items': {'type': 'integer'}},
+                    'missing': {'type': 'array', 'items': {'type': 'string'}}
+                }
+            }
+        },
+        400: {
+            'description': 'Invalid request parameters.'
+        },
+        500: {
+            'description': 'Internal server error.'
+        }
+    }
+})
+def get_symbol_info_ticks_endpoint():
+    """
+    Get Latest Quotes for Many Symbols
+    ---
+    description: Bulk quote snapshot from the polled quote table; symbols without a fresh quote are read in a single MT5 job.
+    """
+    try:
+        symbols = [s.strip() for s in request.args.get('symbols', '').split(',') if s.strip()]
+        group = request.args.get('group')
+        max_age = request.args.get('max_age', type=float)
+        if not symbols and not group:
+            return jsonify({"error": "symbols or group parameter is required"}), 400
+
+        # Resolve the group locally once the catalog is loaded
+        if group and catalog.is_loaded():
+            symbols, group = catalog.match(group), None
+
+        ticks = {}
+        if not group:
+            for symbol in symbols:
+                tick = quotes.get_tick(symbol, max_age)
+                if tick is not None:
+                    ticks[symbol] = tick
+        stale = [symbol for symbol in symbols if symbol not in ticks]
+        if group or stale:
+            resolved, fetched = run_mt5(lambda: _fetch_ticks(stale, group))
+            if group:
+                symbols = resolved
+                for symbol in symbols:
+                    quotes.get_tick(symbol)
+            quotes.offer(fetched)
+            ticks.update(fetched)
+
+        found = [symbol for symbol in symbols if symbol in ticks]
+        body = {"symbol": found, "missing": [symbol for symbol in symbols if symbol not in ticks]}
+        for field in QUOTE_FIELDS:
+            body[field] = [ticks[symbol][field] for symbol in found]
+        return jsonify(body), 200
+
+    except Exception as e:
+        logger.error(f"Error in symbol_info_ticks: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+
+
+@symbol_bp.route('/quote_stats', methods=['GET'])
+@swag_from({
+    'tags': ['Symbol'],
+    'parameters': [
+        {
+            'name': 'symbols',
+            'in': 'query',
+            'type': 'string',
+            'required': False,
+            'description': 'Comma-separated symbol names. Defaults to every symbol the tick poller has seen.'
+        }
+    ],
+    'responses': {
+        200: {
+            'description': 'Rolling quote statistics per symbol (null for symbols never polled).',
+            'schema': {
+                'type': 'object',
+                'additionalProperties': {
+                    'type': 'object',
+                    'properties': {
+                        'symbol': {'type': 'string'},
+                        'ticks': {'type': 'integer'},
+                        'tick_rate': {'type': 'number', 'description': 'Quote changes per second (decayed).'},
+                        'last_quote_age': {'type': 'number', 'description': 'Seconds since the quote last changed.'},
+                        'last_time_msc': {'type': 'integer'},
+                        'polled': {'type': 'boolean'},
+                        'stale': {'type': 'boolean'},
+                        'spread': {
+                            'type': 'object',
+                            'description': 'Spread in points: last, p50, p90, p99, mean.'
+                        }
+                    }
+                }
+            }
+        },
+        500: {
+            'description': 'Internal server error.'
+        }
+    }
+})
+def get_quote_stats_endpoint():
+    """
+    Get Quote Statistics
+    ---
+    description: Spread percentiles, tick rate, quote age and stale flag per symbol, maintained from the tick poller over a QUOTE_STATS_WINDOW decay window. Requested symbols start being polled.
+    """
+    try:
+        symbols = [s.strip() for s in request.args.get('symbols', '').split(',') if s.strip()]
+        if symbols:
+            for symbol in symbols:
+                quotes.get_tick(symbol)
+        else:
+            symbols = quote_stats.all_symbols()
+        return jsonify({symbol: quote_stats.get_stats(symbol) for symbol in symbols}), 200
+
+    except Exception as e:
+        logger.error(f"Error in quote_stats: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+
 @symbol_bp.route('/symbol_info/<symbol>', methods=['GET'])
 @swag_from({
     'tags': ['Symbol'],
@@ -61,6 +245,14 @@ def get_symbol_info_tick_endpoint(symbol):
             'type': 'string',
             'required': True,
             'description': 'Symbol name to retrieve information.'
+        },
+        {
+            'name': 'refresh',
+            'in': 'query',
+            'type': 'boolean',
+            'required': False,
+            'default': False,
+            'description': 'Also update the symbol\'s entry in the in-memory catalog from this read.'
         }
     ],
     'responses': {
@@ -92,15 +284,235 @@ def get_symbol_info(symbol):
     """
     Get Symbol Information
     ---
-    description: Retrieve detailed information for a given symbol.
+    description: Retrieve detailed information for a given symbol with a live symbol_info read, so dynamic fields (quotes, spread, daily highs/lows, session statistics) are current. A symbol missing from the in-memory symbol catalog is added to it; refresh=true also updates an existing catalog entry.
     """
-    symbol_info = run_mt5(lambda: mt5.symbol_info(symbol))
-    if symbol_info is None:
+    refresh = request.args.get('refresh', 'false').lower() == 'true'
+
+    def _read():
+        info = mt5.symbol_info(symbol)
+        return info._asdict() if info is not None else None
+
+    symbol_info_dict = run_mt5(_read)
+    if symbol_info_dict is None:
         return jsonify({"error": "Failed to get symbol info"}), 404
-    
-    symbol_info_dict = symbol_info._asdict()
+    if refresh or catalog.get(symbol) is None:
+        catalog.store({symbol: symbol_info_dict})
     return jsonify(symbol_info_dict)
 
+@symbol_bp.route('/symbols', methods=['GET'])
+@swag_from({
+    'tags': ['Symbol'],
+    'parameters': [
+        {
+            'name': 'group',
+            'in': 'query',
+            'type': 'string',
+            'required': False,
+            'description': 'symbols_get group filter, e.g. "*USD*,!EUR*".'
+        },
+        {
+            'name': 'path',
+            'in': 'query',
+            'type': 'string',
+            'required': False,
+            'description': 'Group path (or parent path), e.g. "Forex\\Majors".'
+        },
+        {
+            'name': 'currency',
+            'in': 'query',
+            'type': 'string',
+            'required': False,
+            'description': 'Base, profit or margin currency, e.g. "JPY".'
+        }
+    ],
+    'responses': {
+        200: {
+            'description': 'Matching symbol names from the catalog.',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'symbols': {'type': 'array', 'items': {'type': 'string'}},
+                    'total': {'type': 'integer'},
+                    'loaded_at': {'type': 'number'}
+                }
+            }
+        },
+        503: {
+            'description': 'Symbol catalog not loaded yet.'
+        }
+    }
+})
+def list_symbols_endpoint():
+    """
+    List Symbols from the Catalog
+    ---
+    description: Filter the in-memory symbol catalog by group pattern, group path and/or currency (filters combine).
+    """
+    if not catalog.is_loaded():
+        return jsonify({"error": "Symbol catalog not loaded yet"}), 503
+
+    names = None
+    for values in (
+        catalog.match(request.args['group']) if 'group' in request.args else None,
+        catalog.names_in_group(request.args['path']) if 'path' in request.args else None,
+        catalog.names_for_currency(request.args['currency']) if 'currency' in request.args else None,
+    ):
+        if values is not None:
+            allowed = set(values)
+            names = values if names is None else [name for name in names if name in allowed]
+    if names is None:
+        names = catalog.match('*')
+    return jsonify({"symbols": sorted(names), "total": len(names), "loaded_at": catalog.loaded_at()})
+
+@symbol_bp.route('/symbol_catalog/refresh', methods=['POST'])
+@swag_from({
+    'tags': ['Symbol'],
+    'responses': {
+        200: {
+            'description': 'Catalog reloaded.',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'total': {'type': 'integer'},
+                    'loaded_at': {'type': 'number'}
+                }
+            }
+        },
+        500: {
+            'description': 'Internal server error.'
+        }
+    }
+})
+def refresh_symbol_catalog_endpoint():
+    """
+    Refresh Symbol Catalog
+    ---
+    description: Reload all symbols from MT5 into the in-memory catalog now.
+    """
+    try:
+        total = catalog.refresh()
+        return jsonify({"total": total, "loaded_at": catalog.loaded_at()}), 200
+    except Exception as e:
+        logger.error(f"Error in symbol_catalog refresh: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+
+def _select_symbols(symbols, group, enable):
+    """
+    Runs on the MT5 worker: resolve group (if any), symbol_select every symbol
+    and re-read its symbol_info (plus the tick when enabling) in the same job.
+    """
+    if group:
+        symbols = [info.name for info in (mt5.symbols_get(group=group) or ())]
+    results, infos, ticks = {}, {}, {}
+    for symbol in symbols:
+        if not mt5.symbol_select(symbol, enable):
+            error_code, error_str = mt5.last_error()
+            results[symbol] = {"selected": False, "error_code": error_code, "mt5_error": error_str}
+            continue
+        results[symbol] = {"selected": enable}
+        info = mt5.symbol_info(symbol)
+        if info is not None:
+            infos[symbol] = info._asdict()
+        if enable:
+            tick = mt5.symbol_info_tick(symbol)
+            if tick is not None:
+                ticks[symbol] = tick._asdict()
+    return results, infos, ticks
+
+
+@symbol_bp.route('/symbol_select', methods=['POST'])
+@swag_from({
+    'tags': ['Symbol'],
+    'parameters': [
+        {
+            'name': 'body',
+            'in': 'body',
+            'required': True,
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'symbols': {'type': 'array', 'items': {'type': 'string'}},
+                    'group': {'type': 'string', 'description': 'symbols_get group pattern instead of a list, e.g. "*USD*" or "*,!*EUR*".'},
+                    'enable': {'type': 'boolean', 'default': True}
+                }
+            }
+        }
+    ],
+    'responses': {
+        200: {
+            'description': 'Per-symbol selection results.',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'enable': {'type': 'boolean'},
+                    'succeeded': {'type': 'integer'},
+                    'failed': {'type': 'integer'},
+                    'results': {
+                        'type': 'object',
+                        'additionalProperties': {
+                            'type': 'object',
+                            'properties': {
+                                'selected': {'type': 'boolean'},
+                                'error_code': {'type': 'integer'},
+                                'mt5_error': {'type': 'string'}
+                            }
+                        }
+                    }
+                }
+            }
+        },
+        400: {
+            'description': 'Invalid request body.'
+        },
+        500: {
+            'description': 'Internal server error.'
+        }
+    }
+})
+def symbol_select_bulk_endpoint():
+    """
+    Select Many Symbols
+    ---
+    description: Select or deselect a list of symbols (or a group pattern) in Market Watch in one MT5 job. Selected symbols are refreshed in the symbol catalog and quote table and polled until idle; deselected ones stop being polled.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        symbols = data.get('symbols') or []
+        group = data.get('group')
+        enable = data.get('enable', True)
+        if not isinstance(enable, bool):
+            return jsonify({"error": "enable must be a boolean"}), 400
+        if isinstance(symbols, str):
+            symbols = [symbols]
+        if not symbols and not group:
+            return jsonify({"error": "symbols list or group is required"}), 400
+
+        # Resolve the group locally once the catalog is loaded
+        if group and catalog.is_loaded():
+            symbols, group = catalog.match(group), None
+
+        results, infos, ticks = run_mt5(lambda: _select_symbols(symbols, group, enable))
+        catalog.store(infos)
+        selected = [symbol for symbol, result in results.items() if "error_code" not in result]
+        if enable:
+            quotes.offer(ticks)
+            quotes.track(selected)
+        else:
+            quotes.forget(selected)
+
+        failed = sum(1 for result in results.values() if "error_code" in result)
+        return jsonify({
+            "enable": enable,
+            "succeeded": len(results) - failed,
+            "failed": failed,
+            "results": results
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Error in symbol_select_bulk: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+
+
 @symbol_bp.route('/symbol_select/<symbol>', methods=['POST'])
 @swag_from({
     'tags': ['Symbol'],
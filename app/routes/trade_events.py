@@ -0,0 +1,65 @@
+from flask import Blueprint, jsonify, request
+import logging
+from flasgger import swag_from
+import trade_events
+
+trade_events_bp = Blueprint('trade_events', __name__)
+logger = logging.getLogger(__name__)
+
+
+@trade_events_bp.route('/trade_events', methods=['GET'])
+@swag_from({
+    'tags': ['Position'],
+    'parameters': [
+        {
+            'name': 'since',
+            'in': 'query',
+            'type': 'integer',
+            'required': False,
+            'default': 0,
+            'description': 'Return events with a sequence number greater than this. Pass the returned seq on the next poll.'
+        }
+    ],
+    'responses': {
+        200: {
+            'description': 'Position and pending order change events since the given sequence number.',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'events': {
+                        'type': 'array',
+                        'items': {
+                            'type': 'object',
+                            'properties': {
+                                'seq': {'type': 'integer'},
+                                'time_msc': {'type': 'integer'},
+                                'kind': {'type': 'string', 'enum': ['position', 'order']},
+                                'event': {'type': 'string', 'enum': ['opened', 'closed', 'placed', 'removed', 'modified', 'profit']},
+                                'ticket': {'type': 'integer'},
+                                'data': {'type': 'object'},
+                                'changes': {'type': 'object', 'description': 'Changed fields as [old, new] (modified/profit only). Only the latest profit event of each open position is kept.'}
+                            }
+                        }
+                    },
+                    'seq': {'type': 'integer'},
+                    'reset': {'type': 'boolean', 'description': 'Events after since were dropped; re-read /get_positions and /get_orders.'}
+                }
+            }
+        },
+        500: {
+            'description': 'Internal server error.'
+        }
+    }
+})
+def trade_events_endpoint():
+    """
+    Get Trade Change Events
+    ---
+    description: Opened/closed/modified/profit events for positions and placed/removed/modified events for pending orders, detected by a shared background watcher. The first call starts the watcher and returns no events.
+    """
+    try:
+        since = request.args.get('since', 0, type=int)
+        return jsonify(trade_events.since(since)), 200
+    except Exception as e:
+        logger.error(f"Error in trade_events: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
@@ -0,0 +1,144 @@
+from flask import Blueprint, jsonify, request
+import logging
+from flasgger import swag_from
+import trailing
+
+trailing_bp = Blueprint('trailing', __name__)
+logger = logging.getLogger(__name__)
+
+_RULE_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'ticket': {'type': 'integer'},
+        'mode': {'type': 'string', 'enum': ['trailing', 'breakeven']},
+        'symbol': {'type': 'string'},
+        'sl': {'type': 'number', 'description': 'SL last set or seen by the engine.'},
+        'modifications': {'type': 'integer'},
+        'error': {'type': 'string', 'description': 'Reason the last modification was rejected.'}
+    }
+}
+
+
+@trailing_bp.route('/trailing_stop/add', methods=['POST'])
+@swag_from({
+    'tags': ['Position'],
+    'parameters': [
+        {
+            'name': 'body',
+            'in': 'body',
+            'required': True,
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'ticket': {'type': 'integer'},
+                    'mode': {'type': 'string', 'enum': ['trailing', 'breakeven'], 'default': 'trailing'},
+                    'distance_points': {'type': 'number', 'description': 'trailing: SL distance behind the closing price.'},
+                    'step_points': {'type': 'number', 'default': 1, 'description': 'trailing: minimum SL improvement per modification.'},
+                    'activation_points': {'type': 'number', 'default': 0, 'description': 'trailing: profit required before trailing starts.'},
+                    'trigger_points': {'type': 'number', 'description': 'breakeven: profit required before SL moves to the open price.'},
+                    'offset_points': {'type': 'number', 'default': 0, 'description': 'breakeven: SL offset from the open price in the position\'s favour.'}
+                },
+                'required': ['ticket']
+            }
+        }
+    ],
+    'responses': {
+        200: {
+            'description': 'Rule registered (replaces any existing rule for the ticket).',
+            'schema': _RULE_SCHEMA
+        },
+        400: {
+            'description': 'Invalid request body.'
+        },
+        404: {
+            'description': 'Position not found.'
+        },
+        500: {
+            'description': 'Internal server error.'
+        }
+    }
+})
+def trailing_stop_add_endpoint():
+    """
+    Add Trailing Stop or Breakeven Rule
+    ---
+    description: Register a server-side rule for an open position. It is evaluated on every quote change and SL modifications are sent in batched MT5 worker jobs.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        if 'ticket' not in data:
+            return jsonify({"error": "ticket is required"}), 400
+        rule = trailing.add(int(data['ticket']), data.get('mode', 'trailing'), data)
+        if rule is None:
+            return jsonify({"error": "Position not found"}), 404
+        return jsonify(rule), 200
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error in trailing_stop_add: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+
+
+@trailing_bp.route('/trailing_stop/remove', methods=['POST'])
+@swag_from({
+    'tags': ['Position'],
+    'parameters': [
+        {
+            'name': 'body',
+            'in': 'body',
+            'required': True,
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'tickets': {'type': 'array', 'items': {'type': 'integer'}}
+                },
+                'required': ['tickets']
+            }
+        }
+    ],
+    'responses': {
+        200: {
+            'description': 'Tickets whose rules were removed.'
+        },
+        400: {
+            'description': 'Invalid request body.'
+        }
+    }
+})
+def trailing_stop_remove_endpoint():
+    """
+    Remove Trailing Stop Rules
+    ---
+    description: Stop managing SL for the given position tickets. The current SL is left as it is.
+    """
+    data = request.get_json(silent=True) or {}
+    tickets = data.get('tickets')
+    if isinstance(tickets, int):
+        tickets = [tickets]
+    if not tickets or not all(isinstance(t, int) for t in tickets):
+        return jsonify({"error": "tickets list is required"}), 400
+    return jsonify({"removed": trailing.remove(tickets)}), 200
+
+
+@trailing_bp.route('/trailing_stop', methods=['GET'])
+@swag_from({
+    'tags': ['Position'],
+    'responses': {
+        200: {
+            'description': 'Active rules.',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'rules': {'type': 'array', 'items': _RULE_SCHEMA}
+                }
+            }
+        }
+    }
+})
+def trailing_stop_list_endpoint():
+    """
+    List Trailing Stop Rules
+    ---
+    description: Return the active trailing/breakeven rules with the SL last set and any rejection reason.
+    """
+    return jsonify({"rules": trailing.get_rules()}), 200
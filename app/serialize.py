@@ -0,0 +1,70 @@
+"""
+Pandas-free JSON encoding for MT5 results. Rates arrays (numpy structured
+arrays from copy_rates_*) are encoded straight to a JSON body with time
+fields converted vectorized. Output is byte-identical to what jsonify produced
+from the old DataFrame.to_dict(orient='records') path: keys sorted, compact
+separators and times as HTTP dates (how Flask serializes datetimes).
+"""
+import json
+from typing import List
+
+import numpy as np
+from flask import current_app
+
+_WEEKDAYS = np.array(['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'])
+_MONTHS = np.array(['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+                    'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'])
+TIME_FIELDS = ('time',)
+
+
+def http_dates(epoch_seconds) -> List[str]:
+    """Format UTC epoch seconds like werkzeug's http_date, e.g. 'Mon, 01 Jan 2024 00:00:00 GMT'."""
+    secs = np.asarray(epoch_seconds, dtype=np.int64).astype('datetime64[s]')
+    # 1970-01-01 was a Thursday (Mon=0)
+    weekdays = _WEEKDAYS[(secs.astype('datetime64[D]').astype(np.int64) + 3) % 7]
+    months = _MONTHS[secs.astype('datetime64[M]').astype(np.int64) % 12]
+    iso = np.datetime_as_string(secs, unit='s')  # 2024-01-01T00:00:00
+    return [
+        f"{wd}, {s[8:10]} {mon} {s[:4]} {s[11:]} GMT"
+        for wd, mon, s in zip(weekdays.tolist(), months.tolist(), iso.tolist())
+    ]
+
+
+def rates_json(rates) -> str:
+    """
+    Encode a rates structured array as a JSON array of records (no trailing newline).
+    Falls back to json.dumps when a float field is not finite.
+    """
+    names = sorted(rates.dtype.names)
+    columns = []
+    parts = []
+    finite = True
+    for name in names:
+        column = rates[name]
+        if name in TIME_FIELDS:
+            columns.append(http_dates(column))
+            parts.append(f'"{name}":"%s"')
+        elif column.dtype.kind == 'f':
+            finite = finite and bool(np.isfinite(column).all())
+            columns.append(column.tolist())
+            parts.append(f'"{name}":%r')
+        else:
+            columns.append(column.tolist())
+            parts.append(f'"{name}":%d')
+    if not finite:
+        records = [dict(zip(names, row)) for row in zip(*columns)]
+        return json.dumps(records, sort_keys=True, separators=(',', ':'))
+    template = '{' + ','.join(parts) + '}'
+    return '[' + ','.join([template % row for row in zip(*columns)]) + ']'
+
+
+def rates_records(rates) -> List[dict]:
+    """Convert a rates structured array to records with HTTP-date times (fetch_data_pos shape)."""
+    names = rates.dtype.names
+    columns = [http_dates(rates[name]) if name in TIME_FIELDS else rates[name].tolist() for name in names]
+    return [dict(zip(names, row)) for row in zip(*columns)]
+
+
+def json_body(obj) -> str:
+    """Encode obj exactly as jsonify does with compact output (no trailing newline)."""
+    return current_app.json.dumps(obj, separators=(',', ':'))
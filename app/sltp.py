@@ -0,0 +1,125 @@
+"""
+Bulk SL/TP modification. Targets are (sl, tp) per position ticket, given
+explicitly or derived from a rule (breakeven, fixed distances from the open
+price). modify() runs on the MT5 worker: one positions_get, local no-op and
+stops/freeze level checks, then every TRADE_ACTION_SLTP back-to-back, with
+last_error read inline instead of in a separate job.
+"""
+import time
+from typing import Dict, List, Optional, Tuple
+
+import MetaTrader5 as mt5
+
+import pretrade
+import quotes
+import symbols
+
+
+def _point(symbol: str) -> float:
+    info = symbols.get(symbol)
+    return (info.get('point') if info else None) or 0.0
+
+
+def _same(a: float, b: float, point: float) -> bool:
+    return abs((a or 0.0) - (b or 0.0)) < (point / 2 if point else 1e-9)
+
+
+def rule_targets(positions: List[dict], rule: dict) -> Dict[int, Tuple[Optional[float], Optional[float]]]:
+    """
+    Targets for positions matching the rule's magic/symbol/order_type filters.
+    breakeven moves SL to the open price (+offset_points in the position's
+    favour) only when that tightens it; sl_points/tp_points set SL/TP at a
+    distance in points from the open price.
+    """
+    wanted_type = {'BUY': mt5.POSITION_TYPE_BUY, 'SELL': mt5.POSITION_TYPE_SELL}.get(rule.get('order_type'))
+    targets = {}
+    for position in positions:
+        if rule.get('magic') is not None and position['magic'] != rule['magic']:
+            continue
+        if rule.get('symbol') and position['symbol'] != rule['symbol']:
+            continue
+        if wanted_type is not None and position['type'] != wanted_type:
+            continue
+        point = _point(position['symbol'])
+        if not point:
+            continue
+        direction = 1 if position['type'] == mt5.POSITION_TYPE_BUY else -1
+        sl, tp = None, None
+        if rule.get('breakeven'):
+            breakeven = position['price_open'] + direction * float(rule.get('offset_points', 0)) * point
+            current = position['sl']
+            if not current or (breakeven - current) * direction > 0:
+                sl = breakeven
+        if rule.get('sl_points') is not None:
+            sl = position['price_open'] - direction * float(rule['sl_points']) * point
+        if rule.get('tp_points') is not None:
+            tp = position['price_open'] + direction * float(rule['tp_points']) * point
+        targets[position['ticket']] = (sl, tp)
+    return targets
+
+
+def modify(targets: Optional[Dict[int, Tuple[Optional[float], Optional[float]]]] = None, rule: Optional[dict] = None,
+           tighten_only: bool = False) -> List[dict]:
+    """
+    Runs on the MT5 worker. Apply (sl, tp) targets per ticket (None keeps the
+    current value), or the targets of rule. With tighten_only, a target SL
+    that is not tighter than the position's live SL is ignored. Returns one
+    result per target: status modified, unchanged (skipped locally), rejected
+    or not_found; sl/tp are the values sent or kept.
+    """
+    positions = {p.ticket: p._asdict() for p in (mt5.positions_get() or ())}
+    if rule is not None:
+        targets = rule_targets(list(positions.values()), rule)
+
+    ticks = {}
+    results = []
+    for ticket, (sl, tp) in targets.items():
+        entry = {"ticket": ticket}
+        results.append(entry)
+        position = positions.get(ticket)
+        if position is None:
+            entry.update(status="not_found", error="Position not found")
+            continue
+        symbol = position['symbol']
+        info = symbols.get(symbol) or {}
+        point = info.get('point') or 0.0
+        if tighten_only and sl is not None and position['sl']:
+            direction = 1 if position['type'] == mt5.POSITION_TYPE_BUY else -1
+            if (sl - position['sl']) * direction <= 0:
+                sl = None
+        sl = position['sl'] if sl is None else sl
+        tp = position['tp'] if tp is None else tp
+        if info.get('digits') is not None:
+            sl, tp = round(sl, info['digits']), round(tp, info['digits'])
+        entry.update(symbol=symbol, sl=sl, tp=tp)
+        if _same(sl, position['sl'], point) and _same(tp, position['tp'], point):
+            entry["status"] = "unchanged"
+            continue
+
+        if symbol not in ticks:
+            tick = quotes.get_tick(symbol)
+            if tick is None:
+                live = mt5.symbol_info_tick(symbol)
+                tick = live._asdict() if live is not None else None
+            ticks[symbol] = tick
+        invalid = pretrade.check_sltp(position, sl, tp, ticks[symbol])
+        if invalid:
+            entry.update(status="rejected", error=invalid)
+            continue
+
+        started = time.perf_counter()
+        result = mt5.order_send({
+            "action": mt5.TRADE_ACTION_SLTP,
+            "position": ticket,
+            "symbol": symbol,
+            "sl": sl,
+            "tp": tp,
+        })
+        entry["latency_ms"] = (time.perf_counter() - started) * 1000
+        if result is None:
+            entry.update(status="rejected", error=f"order_send returned None: {mt5.last_error()[1]}")
+        elif result.retcode in (mt5.TRADE_RETCODE_DONE, mt5.TRADE_RETCODE_NO_CHANGES):
+            entry.update(status="modified" if result.retcode == mt5.TRADE_RETCODE_DONE else "unchanged", retcode=result.retcode)
+        else:
+            entry.update(status="rejected", retcode=result.retcode, error=result.comment)
+    return results
@@ -0,0 +1,72 @@
+"""
+In-process publish/subscribe hub for the /stream Server-Sent Events endpoint.
+Producers (tick poller, bar tracker, ...) publish once per topic; each event
+is encoded once and fanned out to every subscriber queue, so N clients cost
+one MT5 poll instead of N.
+"""
+import json
+import logging
+import queue
+import threading
+from typing import Dict, Hashable, Iterable, Set
+
+import quotes
+
+logger = logging.getLogger(__name__)
+
+# Events buffered per client before new ones are dropped (slow consumer)
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+_subscribers: Dict[Hashable, Set[queue.Queue]] = {}
+_lock = threading.Lock()
+
+
+def format_event(event: str, data) -> str:
+    """Encode one SSE message."""
+    return f"event: {event}\ndata: {json.dumps(data, sort_keys=True, separators=(',', ':'))}\n\n"
+
+
+def subscribe(topics: Iterable[Hashable]) -> queue.Queue:
+    """Register a new subscriber queue for the given topics."""
+    q = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+    with _lock:
+        for topic in topics:
+            _subscribers.setdefault(topic, set()).add(q)
+    return q
+
+
+def unsubscribe(q: queue.Queue, topics: Iterable[Hashable]) -> None:
+    """Remove a subscriber queue from the given topics."""
+    with _lock:
+        for topic in topics:
+            subscribers = _subscribers.get(topic)
+            if subscribers is not None:
+                subscribers.discard(q)
+                if not subscribers:
+                    del _subscribers[topic]
+
+
+def has_subscribers(topic: Hashable) -> bool:
+    return topic in _subscribers
+
+
+def publish(topic: Hashable, event: str, data) -> None:
+    """Fan an event out to every subscriber of topic (no-op without subscribers)."""
+    with _lock:
+        subscribers = list(_subscribers.get(topic, ()))
+    if not subscribers:
+        return
+    message = format_event(event, data)
+    for q in subscribers:
+        try:
+            q.put_nowait(message)
+        except queue.Full:
+            logger.warning(f"Stream subscriber queue full; dropping {event} event")
+
+
+def _publish_ticks(changed: Dict[str, dict]) -> None:
+    for symbol, tick in changed.items():
+        publish(("tick", symbol), "tick", dict(tick, symbol=symbol))
+
+
+quotes.add_listener(_publish_ticks)
@@ -0,0 +1,152 @@
+"""
+Asynchronous order submissions. submit() queues the order on the MT5 worker
+and returns a submission id at once; the worker job's completion callback
+records the outcome, which is read with get() and published to the stream
+hub as "order" events. Status goes pending -> sending (the worker picked it
+up) -> done, rejected or error. A submission still queued after
+SUBMISSION_QUEUE_TIMEOUT seconds is marked expired and is never sent.
+Submissions are kept for SUBMISSION_TTL seconds after they complete, at most
+SUBMISSION_MAX_KEPT of them (oldest first). Queued and completed ids are kept
+in order in two deques, so expiry and purging only look at the oldest ones.
+"""
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Dict, Optional
+
+import MetaTrader5 as mt5
+
+from mt5_worker import submit_mt5
+import orders
+import stream
+
+TTL = float(os.environ.get('SUBMISSION_TTL', 3600))
+MAX_KEPT = int(os.environ.get('SUBMISSION_MAX_KEPT', 10000))
+QUEUE_TIMEOUT = float(os.environ.get('SUBMISSION_QUEUE_TIMEOUT', 30))
+TOPIC = ("orders",)
+
+_submissions: Dict[str, dict] = {}
+# Ids not yet picked up by the worker (submission order) and completed ids (completion order)
+_queued: deque = deque()
+_completed: deque = deque()
+_lock = threading.Lock()
+
+
+def _expire(now: float) -> list:
+    """Mark submissions queued longer than QUEUE_TIMEOUT as expired; returns them for publishing."""
+    expired = []
+    while _queued:
+        entry = _submissions.get(_queued[0])
+        if entry is not None and entry["status"] == "pending":
+            if now - entry["submitted_at"] <= QUEUE_TIMEOUT:
+                break
+            entry.update(status="expired", completed_at=now, elapsed_ms=(now - entry["submitted_at"]) * 1000,
+                         error=f"Not sent: waited more than {QUEUE_TIMEOUT:g}s for the MT5 worker")
+            _completed.append(entry["id"])
+            expired.append(describe(entry))
+        _queued.popleft()
+    return expired
+
+
+def _purge(now: float) -> None:
+    """Drop the oldest completed submissions while they are past TTL or over MAX_KEPT."""
+    while _completed:
+        entry = _submissions[_completed[0]]
+        if now - entry["completed_at"] <= TTL and len(_submissions) <= MAX_KEPT:
+            break
+        del _submissions[_completed.popleft()]
+
+
+def _housekeep() -> None:
+    now = time.monotonic()
+    with _lock:
+        expired = _expire(now)
+        _purge(now)
+    for public in expired:
+        stream.publish(TOPIC, "order", public)
+
+
+def _claim(submission_id: str) -> bool:
+    """Move a queued submission to sending; False when it expired (or was evicted) meanwhile."""
+    with _lock:
+        entry = _submissions.get(submission_id)
+        if entry is None or entry["status"] != "pending":
+            return False
+        entry["status"] = "sending"
+        return True
+
+
+def _send(submission_id: str, request_data: dict, policy: dict):
+    """Runs on the MT5 worker: same path as a synchronous /order."""
+    if not _claim(submission_id):
+        return None
+    tick = None
+    if request_data["action"] == mt5.TRADE_ACTION_DEAL:
+        tick = mt5.symbol_info_tick(request_data["symbol"])
+        if tick is None:
+            return None, [], "Failed to get symbol price"
+    result, attempts = orders.send(request_data, tick, policy)
+    error = None
+    if result is None:
+        error = f"MT5 order_send returned None: {mt5.last_error()[1]}"
+    elif result.retcode != mt5.TRADE_RETCODE_DONE:
+        error = f"Order failed: {result.comment}"
+    return result, attempts, error
+
+
+def _complete(submission_id: str, sent, exception: Optional[Exception]) -> None:
+    now = time.monotonic()
+    with _lock:
+        entry = _submissions.get(submission_id)
+        if entry is None or sent is None and exception is None:
+            return
+        if exception is not None:
+            update = {"status": "error", "error": str(exception)}
+        else:
+            result, attempts, error = sent
+            update = {
+                "status": "rejected" if error else "done",
+                "error": error,
+                "result": result._asdict() if result is not None else None,
+                "attempts": attempts,
+            }
+        update["elapsed_ms"] = (now - entry["submitted_at"]) * 1000
+        entry.update(update, completed_at=now)
+        public = describe(entry)
+        _completed.append(submission_id)
+    stream.publish(TOPIC, "order", public)
+    _housekeep()
+
+
+def submit(request_data: dict, policy: dict, client_data: Optional[dict] = None) -> dict:
+    """Queue a request built by orders.build_request; returns the pending submission."""
+    submission_id = uuid.uuid4().hex
+    entry = {
+        "id": submission_id,
+        "status": "pending",
+        "symbol": request_data["symbol"],
+        "type": (client_data or {}).get("type"),
+        "volume": request_data["volume"],
+        "submitted_at": time.monotonic(),
+        "submitted_time_msc": int(time.time() * 1000),
+    }
+    _housekeep()
+    with _lock:
+        _submissions[submission_id] = entry
+        _queued.append(submission_id)
+        public = describe(entry)
+    submit_mt5(lambda: _send(submission_id, request_data, policy), lambda sent, exc: _complete(submission_id, sent, exc))
+    return public
+
+
+def describe(entry: dict) -> dict:
+    return {k: v for k, v in entry.items() if k not in ("submitted_at", "completed_at")}
+
+
+def get(submission_id: str) -> Optional[dict]:
+    _housekeep()
+    with _lock:
+        entry = _submissions.get(submission_id)
+        return describe(entry) if entry is not None else None
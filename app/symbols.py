@@ -0,0 +1,209 @@
+"""
+In-memory symbol catalog. symbols_get() is loaded once at startup and
+refreshed on a slow schedule (SYMBOL_CATALOG_REFRESH seconds) or on demand,
+then indexed by name, group path and currency. Contract specs (digits,
+volume limits, filling mode, stops level, ...) are read from here instead of
+calling symbol_info on every request. Only static contract fields are kept:
+dynamic ones (quotes, spread, daily highs/lows, session statistics, tick
+value) are dropped on load, so nothing stale can be served from here.
+"""
+import fnmatch
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+import MetaTrader5 as mt5
+
+from mt5_worker import run_mt5
+
+logger = logging.getLogger(__name__)
+
+REFRESH_SECONDS = float(os.environ.get('SYMBOL_CATALOG_REFRESH', 3600))
+CURRENCY_FIELDS = ('currency_base', 'currency_profit', 'currency_margin')
+# symbol_info fields that change with the market (plus every session_* and price_* field)
+DYNAMIC_FIELDS = frozenset((
+    'select', 'visible', 'time', 'spread',
+    'bid', 'bidhigh', 'bidlow', 'ask', 'askhigh', 'asklow', 'last', 'lasthigh', 'lastlow',
+    'volume', 'volumehigh', 'volumelow', 'volume_real', 'volumehigh_real', 'volumelow_real',
+    'trade_tick_value', 'trade_tick_value_profit', 'trade_tick_value_loss',
+))
+DYNAMIC_PREFIXES = ('session_', 'price_')
+
+# Replaced whole on every full load; single-symbol updates copy-on-write
+_catalog = {"by_name": {}, "by_group": {}, "by_currency": {}, "loaded_at": None}
+_lock = threading.Lock()
+_refresher: Optional[threading.Thread] = None
+
+
+def is_dynamic(field: str) -> bool:
+    return field in DYNAMIC_FIELDS or field.startswith(DYNAMIC_PREFIXES)
+
+
+def static(info: dict) -> dict:
+    """The contract fields of a symbol_info dict."""
+    return {k: v for k, v in info.items() if not is_dynamic(k)}
+
+
+def _group_of(info: dict) -> str:
+    """Group path of a symbol: its path without the trailing symbol name."""
+    return info.get('path', '').rpartition('\\')[0]
+
+
+def _currencies(info: dict) -> set:
+    return {currency for currency in (info.get(field) for field in CURRENCY_FIELDS) if currency}
+
+
+def _index(by_name: Dict[str, dict]) -> dict:
+    by_group: Dict[str, List[str]] = {}
+    by_currency: Dict[str, List[str]] = {}
+    for name, info in by_name.items():
+        by_group.setdefault(_group_of(info), []).append(name)
+        for currency in _currencies(info):
+            by_currency.setdefault(currency, []).append(name)
+    return {"by_name": by_name, "by_group": by_group, "by_currency": by_currency, "loaded_at": time.time()}
+
+
+def refresh() -> int:
+    """Reload the whole catalog from symbols_get(). Returns the number of symbols."""
+    infos = run_mt5(mt5.symbols_get)
+    if infos is None:
+        raise RuntimeError(f"symbols_get failed: {run_mt5(mt5.last_error)}")
+    catalog = _index({info.name: static(info._asdict()) for info in infos})
+    global _catalog
+    with _lock:
+        _catalog = catalog
+    logger.info(f"Symbol catalog loaded: {len(catalog['by_name'])} symbols.")
+    return len(catalog['by_name'])
+
+
+def update(names: List[str]) -> Dict[str, dict]:
+    """Re-read the given symbols with symbol_info and store them. Returns the full (live) dicts found."""
+    def _read():
+        found = {}
+        for name in names:
+            info = mt5.symbol_info(name)
+            if info is not None:
+                found[name] = info._asdict()
+        return found
+    found = run_mt5(_read)
+    store(found)
+    return found
+
+
+def store(infos: Dict[str, dict]) -> None:
+    """
+    Store symbol_info dicts read elsewhere. Known symbols whose group and
+    currencies are unchanged are replaced in place; otherwise only the
+    affected index entries are rebuilt (copy-on-write).
+    """
+    if not infos:
+        return
+    infos = {name: static(info) for name, info in infos.items()}
+    global _catalog
+    with _lock:
+        by_name = _catalog["by_name"]
+        moved = {
+            name for name, info in infos.items()
+            if name not in by_name
+            or _group_of(info) != _group_of(by_name[name]) or _currencies(info) != _currencies(by_name[name])
+        }
+        if not moved:
+            # Same keys, so readers iterating by_name never see it change size
+            by_name.update(infos)
+            return
+        by_name = dict(by_name)
+        by_group = dict(_catalog["by_group"])
+        by_currency = dict(_catalog["by_currency"])
+        for name in moved:
+            old = by_name.get(name)
+            if old is not None:
+                by_group[_group_of(old)] = [n for n in by_group[_group_of(old)] if n != name]
+                for currency in _currencies(old):
+                    by_currency[currency] = [n for n in by_currency[currency] if n != name]
+            info = infos[name]
+            by_group[_group_of(info)] = by_group.get(_group_of(info), []) + [name]
+            for currency in _currencies(info):
+                by_currency[currency] = by_currency.get(currency, []) + [name]
+        by_name.update(infos)
+        _catalog = {"by_name": by_name, "by_group": by_group, "by_currency": by_currency,
+                    "loaded_at": _catalog["loaded_at"]}
+
+
+def get(name: str) -> Optional[dict]:
+    """Return the catalog entry (symbol_info fields) for name, or None."""
+    return _catalog["by_name"].get(name)
+
+
+def get_or_load(name: str) -> Optional[dict]:
+    """Catalog entry for name, reading it with symbol_info on a miss. Safe on the worker thread."""
+    info = get(name)
+    if info is None and update([name]):
+        info = get(name)
+    return info
+
+
+def is_loaded() -> bool:
+    return _catalog["loaded_at"] is not None
+
+
+def loaded_at() -> Optional[float]:
+    return _catalog["loaded_at"]
+
+
+def names_in_group(path: str) -> List[str]:
+    """Names whose group path equals path or lies under it (e.g. 'Forex' or 'Forex\\Majors')."""
+    catalog = _catalog
+    prefix = path.rstrip('\\') + '\\'
+    return [
+        name for group, names in catalog["by_group"].items()
+        if group == path or group.startswith(prefix)
+        for name in names
+    ]
+
+
+def names_for_currency(currency: str) -> List[str]:
+    return list(_catalog["by_currency"].get(currency.upper(), ()))
+
+
+def match(group: str) -> List[str]:
+    """
+    Names matching a symbols_get group filter: comma-separated wildcard
+    conditions applied in order, '!' excludes, e.g. "*USD*,!EUR*".
+    """
+    conditions = [c.strip() for c in group.split(',') if c.strip()]
+    matched = []
+    for name in _catalog["by_name"]:
+        selected = False
+        for condition in conditions:
+            if condition.startswith('!'):
+                if fnmatch.fnmatchcase(name, condition[1:]):
+                    selected = False
+            elif fnmatch.fnmatchcase(name, condition):
+                selected = True
+        if selected:
+            matched.append(name)
+    return matched
+
+
+def _refresh_loop() -> None:
+    while True:
+        try:
+            refresh()
+        except Exception as e:
+            logger.error(f"Symbol catalog refresh failed: {e}")
+            # Retry sooner while the catalog has never loaded
+            if not is_loaded():
+                time.sleep(min(30.0, REFRESH_SECONDS))
+                continue
+        time.sleep(REFRESH_SECONDS)
+
+
+def start_symbol_catalog() -> None:
+    """Load the catalog in the background and keep refreshing it (idempotent)."""
+    global _refresher
+    with _lock:
+        if _refresher is None:
+            _refresher = threading.Thread(target=_refresh_loop, daemon=True)
+            _refresher.start()
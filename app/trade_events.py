@@ -0,0 +1,203 @@
+"""
+Change detection for open positions and pending orders. A background
+watcher snapshots positions_get and orders_get in one MT5 worker job and
+diffs them by ticket against the previous snapshot. Changes become numbered
+events kept in a bounded buffer (read with since()) and published to the
+stream hub, so dashboards receive deltas instead of re-pulling the book.
+Profit events (profit, swap or current price moved) are published on every
+change but kept out of that buffer: only the latest one per position is
+kept for since(), so they cannot push deal and order events out.
+
+The interval adapts: TRADE_POLL_MIN_INTERVAL right after a change, doubling
+up to TRADE_POLL_MAX_INTERVAL while nothing moves. The watcher runs while
+stream clients are subscribed or until TRADE_EVENTS_IDLE_SECONDS after the
+last since() read.
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import MetaTrader5 as mt5
+
+from mt5_worker import run_mt5
+import stream
+
+logger = logging.getLogger(__name__)
+
+MIN_INTERVAL = float(os.environ.get('TRADE_POLL_MIN_INTERVAL', 0.25))
+MAX_INTERVAL = float(os.environ.get('TRADE_POLL_MAX_INTERVAL', 2.0))
+IDLE_SECONDS = float(os.environ.get('TRADE_EVENTS_IDLE_SECONDS', 60))
+BUFFER_SIZE = int(os.environ.get('TRADE_EVENTS_BUFFER', 10000))
+TOPIC = ("trades",)
+
+# Fields whose change is reported as "modified"; profit/price moves are "profit"
+POSITION_FIELDS = ('volume', 'sl', 'tp', 'comment')
+POSITION_PROFIT_FIELDS = ('profit', 'swap', 'price_current')
+ORDER_FIELDS = ('volume_current', 'price_open', 'sl', 'tp', 'price_stoplimit',
+                'type_time', 'time_expiration', 'state', 'comment')
+
+_events: deque = deque(maxlen=BUFFER_SIZE)
+# ticket -> latest "profit" event, coalesced out of _events
+_profit_events: Dict[int, dict] = {}
+_seq = 0
+# Highest sequence number that can no longer be read with since()
+_dropped = 0
+_snapshot: Optional[Tuple[dict, dict]] = None
+_pins = 0
+_last_read = 0.0
+_lock = threading.Lock()
+_wakeup = threading.Event()
+_watcher: Optional[threading.Thread] = None
+
+
+def _read_book() -> Optional[Tuple[dict, dict]]:
+    """Runs on the MT5 worker: ({ticket: position}, {ticket: order}), or None on failure."""
+    positions = mt5.positions_get()
+    orders = mt5.orders_get()
+    if positions is None or orders is None:
+        return None
+    return ({p.ticket: p._asdict() for p in positions}, {o.ticket: o._asdict() for o in orders})
+
+
+def _changes(old: dict, new: dict, fields) -> Dict[str, list]:
+    return {f: [old.get(f), new.get(f)] for f in fields if old.get(f) != new.get(f)}
+
+
+def _diff(kind: str, old: dict, new: dict, fields, profit_fields=()) -> List[dict]:
+    opened, closed = ("opened", "closed") if kind == "position" else ("placed", "removed")
+    events = []
+    for ticket, record in new.items():
+        previous = old.get(ticket)
+        if previous is None:
+            events.append({"kind": kind, "event": opened, "ticket": ticket, "data": record})
+            continue
+        changes = _changes(previous, record, fields)
+        if changes:
+            events.append({"kind": kind, "event": "modified", "ticket": ticket, "data": record, "changes": changes})
+        elif profit_fields:
+            changes = _changes(previous, record, profit_fields)
+            if changes:
+                events.append({"kind": kind, "event": "profit", "ticket": ticket, "data": record, "changes": changes})
+    for ticket, record in old.items():
+        if ticket not in new:
+            events.append({"kind": kind, "event": closed, "ticket": ticket, "data": record})
+    return events
+
+
+def _keep(event: dict) -> None:
+    """Buffer a numbered event for since() (caller holds _lock)."""
+    global _dropped
+    if event["event"] == "profit":
+        _profit_events[event["ticket"]] = event
+        return
+    if event["kind"] == "position" and event["event"] == "closed":
+        _profit_events.pop(event["ticket"], None)
+    if len(_events) == _events.maxlen:
+        _dropped = _events[0]["seq"]
+    _events.append(event)
+
+
+def _record(book: Tuple[dict, dict]) -> int:
+    """Diff book against the previous snapshot, store and publish events. Returns the event count."""
+    global _snapshot, _seq
+    previous, _snapshot = _snapshot, book
+    if previous is None:
+        return 0
+    events = _diff("position", previous[0], book[0], POSITION_FIELDS, POSITION_PROFIT_FIELDS)
+    events += _diff("order", previous[1], book[1], ORDER_FIELDS)
+    now_msc = int(time.time() * 1000)
+    for event in events:
+        with _lock:
+            _seq += 1
+            event["seq"] = _seq
+            event["time_msc"] = now_msc
+            _keep(event)
+        stream.publish(TOPIC, "trade", event)
+    return len(events)
+
+
+def _is_active() -> bool:
+    return _pins > 0 or time.monotonic() - _last_read < IDLE_SECONDS
+
+
+def _watch_loop() -> None:
+    global _snapshot, _seq, _dropped
+    interval = MIN_INTERVAL
+    while True:
+        if not _is_active():
+            # Changes while idle are not tracked: drop the baseline and skip a
+            # sequence number so returning readers get reset=true
+            with _lock:
+                _snapshot = None
+                _events.clear()
+                _profit_events.clear()
+                _seq += 1
+                _dropped = _seq
+            _wakeup.wait()
+            _wakeup.clear()
+            interval = MIN_INTERVAL
+            continue
+        started = time.monotonic()
+        try:
+            book = run_mt5(_read_book, timeout=10)
+            if book is None:
+                logger.error(f"Trade watcher: positions_get/orders_get failed: {run_mt5(mt5.last_error)}")
+            elif _record(book):
+                interval = MIN_INTERVAL
+            else:
+                interval = min(MAX_INTERVAL, interval * 2)
+        except Exception as e:
+            logger.error(f"Trade watcher: {e}")
+        _wakeup.wait(max(0.0, interval - (time.monotonic() - started)))
+        _wakeup.clear()
+
+
+def _ensure_watcher() -> None:
+    global _watcher
+    with _lock:
+        if _watcher is None:
+            _watcher = threading.Thread(target=_watch_loop, daemon=True)
+            _watcher.start()
+    _wakeup.set()
+
+
+def subscribe() -> None:
+    """Keep the watcher running until a matching unsubscribe() (stream clients)."""
+    global _pins
+    with _lock:
+        _pins += 1
+    _ensure_watcher()
+
+
+def unsubscribe() -> None:
+    global _pins
+    with _lock:
+        _pins = max(0, _pins - 1)
+
+
+def since(seq: int) -> dict:
+    """
+    Events with a sequence number above seq, plus the latest sequence number.
+    Only the latest profit event per open position is returned.
+    reset is true when events after seq were already dropped from the buffer
+    (or seq is from before a restart): re-read positions and orders instead.
+    """
+    global _last_read
+    was_active = _is_active()
+    _last_read = time.monotonic()
+    if not was_active:
+        _ensure_watcher()
+    with _lock:
+        events = [event for event in _events if event["seq"] > seq]
+        profits = [event for event in _profit_events.values() if event["seq"] > seq]
+        latest, dropped = _seq, _dropped
+    if profits:
+        events = sorted(events + profits, key=lambda event: event["seq"])
+    return {
+        "events": events,
+        "seq": latest,
+        "reset": seq > latest or seq < dropped,
+    }
@@ -0,0 +1,242 @@
+"""
+Server-side trailing stop and breakeven rules, one per position ticket.
+Rules are evaluated on every quote change from the latest-quote table (the
+rule's symbol is pinned in the tick poller while the rule exists) and only
+produce a modification when the new SL beats the current one by the rule's
+step. Pending modifications are coalesced per ticket and sent by one engine
+thread with sltp.modify, so a burst of ticks across many positions becomes a
+single MT5 worker job.
+
+trailing: once the position is activation_points in profit, keep SL
+distance_points behind the closing price (bid for buys, ask for sells),
+moving it only in steps of at least step_points.
+breakeven: once the position is trigger_points in profit, move SL to the
+open price (+offset_points in the position's favour); the rule is removed
+after it fires.
+
+Targets are checked again against the live position SL inside the worker
+job and only ever tighten it, so a stop moved further by a client (e.g. with
+/modify_sl_tp) is kept and becomes the rule's new reference.
+
+Rules whose positions are gone are dropped on the next modification attempt
+or by a positions_get every TRAILING_PRUNE_SECONDS. A rejected modification
+is not retried for TRAILING_RETRY_SECONDS.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+import MetaTrader5 as mt5
+
+from mt5_worker import run_mt5
+import quotes
+import sltp
+import symbols
+
+logger = logging.getLogger(__name__)
+
+MODES = ('trailing', 'breakeven')
+PRUNE_SECONDS = float(os.environ.get('TRAILING_PRUNE_SECONDS', 30))
+RETRY_SECONDS = float(os.environ.get('TRAILING_RETRY_SECONDS', 1.0))
+
+_rules: Dict[int, dict] = {}
+_pending: Dict[int, float] = {}
+_lock = threading.Lock()
+_wakeup = threading.Event()
+_engine: Optional[threading.Thread] = None
+
+
+def _target(rule: dict, tick: dict) -> Optional[float]:
+    """The SL the rule wants at this quote, or None when it should not move."""
+    price = tick['bid'] if rule['is_buy'] else tick['ask']
+    if not price:
+        return None
+    direction = 1 if rule['is_buy'] else -1
+    point = rule['point']
+    # Rounded so a move of exactly N points is not read as N - 1e-12
+    profit_points = round((price - rule['price_open']) * direction / point, 6)
+    if rule['mode'] == 'breakeven':
+        if profit_points < rule['trigger_points']:
+            return None
+        target = rule['price_open'] + direction * rule['offset_points'] * point
+        step = 0.5
+    else:
+        if profit_points < rule['activation_points']:
+            return None
+        target = price - direction * rule['distance_points'] * point
+        step = max(rule['step_points'], 0.5)
+    target = round(target, rule['digits'])
+    if rule['sl'] and round((target - rule['sl']) * direction / point, 6) < step:
+        return None
+    return target
+
+
+def _on_ticks(changed: Dict[str, dict]) -> None:
+    now = time.monotonic()
+    queued = False
+    with _lock:
+        for ticket, rule in _rules.items():
+            tick = changed.get(rule['symbol'])
+            if tick is None or ticket in _pending or now < rule['retry_at']:
+                continue
+            target = _target(rule, tick)
+            if target is not None:
+                _pending[ticket] = target
+                queued = True
+    if queued:
+        _wakeup.set()
+
+
+def _drop(tickets) -> None:
+    removed = []
+    with _lock:
+        for ticket in tickets:
+            rule = _rules.pop(ticket, None)
+            _pending.pop(ticket, None)
+            if rule is not None:
+                removed.append(rule['symbol'])
+    for symbol in removed:
+        quotes.unsubscribe(symbol)
+
+
+def _apply(results: List[dict]) -> None:
+    finished = []
+    now = time.monotonic()
+    with _lock:
+        for result in results:
+            rule = _rules.get(result['ticket'])
+            if rule is None:
+                continue
+            status = result['status']
+            if status == 'not_found':
+                finished.append(result['ticket'])
+            elif status in ('modified', 'unchanged'):
+                rule['sl'] = result['sl']
+                rule['error'] = None
+                if status == 'modified':
+                    rule['modifications'] += 1
+                if rule['mode'] == 'breakeven':
+                    finished.append(result['ticket'])
+            else:
+                rule['error'] = result.get('error')
+                rule['retry_at'] = now + RETRY_SECONDS
+    _drop(finished)
+
+
+def _open_tickets() -> set:
+    """Runs on the MT5 worker."""
+    positions = mt5.positions_get()
+    return None if positions is None else {p.ticket for p in positions}
+
+
+def _engine_loop() -> None:
+    last_prune = time.monotonic()
+    while True:
+        _wakeup.wait(timeout=PRUNE_SECONDS)
+        _wakeup.clear()
+        with _lock:
+            pending = dict(_pending)
+        if pending:
+            try:
+                targets = {ticket: (sl, None) for ticket, sl in pending.items()}
+                _apply(run_mt5(lambda: sltp.modify(targets, tighten_only=True), timeout=10))
+            except Exception as e:
+                logger.error(f"Trailing engine: {e}")
+                time.sleep(RETRY_SECONDS)
+            finally:
+                with _lock:
+                    for ticket in pending:
+                        _pending.pop(ticket, None)
+        if _rules and time.monotonic() - last_prune >= PRUNE_SECONDS:
+            last_prune = time.monotonic()
+            try:
+                tickets = run_mt5(_open_tickets, timeout=10)
+                if tickets is not None:
+                    _drop([t for t in list(_rules) if t not in tickets])
+            except Exception as e:
+                logger.error(f"Trailing engine: {e}")
+
+
+def _ensure_engine() -> None:
+    global _engine
+    with _lock:
+        if _engine is None:
+            _engine = threading.Thread(target=_engine_loop, daemon=True)
+            _engine.start()
+
+
+def _number(params: dict, name: str, default: Optional[float] = None) -> float:
+    value = params.get(name, default)
+    if value is None:
+        raise ValueError(f"{name} is required")
+    value = float(value)
+    if value < 0:
+        raise ValueError(f"{name} must be non-negative")
+    return value
+
+
+def add(ticket: int, mode: str, params: dict) -> Optional[dict]:
+    """
+    Register (or replace) the rule for an open position. Raises ValueError on
+    bad parameters; returns None when the position does not exist.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Invalid mode: {mode}. Must be one of {', '.join(MODES)}")
+    rule = {"ticket": ticket, "mode": mode}
+    if mode == 'trailing':
+        rule.update(distance_points=_number(params, 'distance_points'),
+                    step_points=_number(params, 'step_points', 1),
+                    activation_points=_number(params, 'activation_points', 0))
+        if not rule['distance_points']:
+            raise ValueError("distance_points must be positive")
+    else:
+        rule.update(trigger_points=_number(params, 'trigger_points'),
+                    offset_points=_number(params, 'offset_points', 0))
+
+    def _read():
+        positions = mt5.positions_get(ticket=ticket)
+        if not positions:
+            return None
+        return positions[0]._asdict(), symbols.get_or_load(positions[0].symbol)
+
+    found = run_mt5(_read)
+    if found is None:
+        return None
+    position, info = found
+    if not info or not info.get('point'):
+        raise ValueError(f"No point size known for {position['symbol']}")
+    rule.update(symbol=position['symbol'], is_buy=position['type'] == mt5.POSITION_TYPE_BUY,
+                price_open=position['price_open'], sl=position['sl'], point=info['point'],
+                digits=info.get('digits', 5), modifications=0, error=None, retry_at=0.0)
+
+    quotes.subscribe(rule['symbol'])
+    with _lock:
+        previous = _rules.get(ticket)
+        _rules[ticket] = rule
+        _pending.pop(ticket, None)
+    if previous is not None:
+        quotes.unsubscribe(previous['symbol'])
+    _ensure_engine()
+    return describe(rule)
+
+
+def remove(tickets: List[int]) -> List[int]:
+    """Remove the rules for tickets; returns the tickets that had one."""
+    with _lock:
+        existing = [t for t in tickets if t in _rules]
+    _drop(existing)
+    return existing
+
+
+def describe(rule: dict) -> dict:
+    return {k: v for k, v in rule.items() if k not in ('retry_at', 'point', 'digits')}
+
+
+def get_rules() -> List[dict]:
+    with _lock:
+        return [describe(rule) for rule in _rules.values()]
+
+
+quotes.add_listener(_on_ticks)
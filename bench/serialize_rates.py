@@ -0,0 +1,64 @@
+"""
+Benchmark for serialize.rates_json: encodes 10k synthetic M1 bars with the old
+pandas path (DataFrame + to_datetime + to_dict + jsonify) and with rates_json,
+checks both bodies are identical and prints the best time of each.
+
+Run from the repository root: python bench/serialize_rates.py [num_bars]
+"""
+import os
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+from flask import Flask, jsonify
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from serialize import rates_json  # noqa: E402
+
+RATES_DTYPE = np.dtype([
+    ('time', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'), ('close', '<f8'),
+    ('tick_volume', '<u8'), ('spread', '<i4'), ('real_volume', '<u8'),
+])
+
+
+def make_rates(num_bars):
+    """copy_rates_from_pos-shaped array with a random walk of prices."""
+    rng = np.random.default_rng(0)
+    rates = np.zeros(num_bars, dtype=RATES_DTYPE)
+    rates['time'] = 1704067200 + 60 * np.arange(num_bars)
+    close = np.round(1.1 + np.cumsum(rng.normal(0, 0.0002, num_bars)), 5)
+    rates['open'] = np.round(close - rng.normal(0, 0.0001, num_bars), 5)
+    rates['high'] = np.maximum(rates['open'], close) + 0.0002
+    rates['low'] = np.minimum(rates['open'], close) - 0.0002
+    rates['close'] = close
+    rates['tick_volume'] = rng.integers(1, 500, num_bars)
+    rates['spread'] = rng.integers(0, 20, num_bars)
+    return rates
+
+
+def pandas_body(rates):
+    df = pd.DataFrame(rates)
+    df['time'] = pd.to_datetime(df['time'], unit='s')
+    return jsonify(df.to_dict(orient='records')).get_data(as_text=True)
+
+
+def rates_json_body(rates):
+    return f"{rates_json(rates)}\n"
+
+
+def main():
+    num_bars = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    rates = make_rates(num_bars)
+    app = Flask(__name__)
+    with app.app_context():
+        if pandas_body(rates) != rates_json_body(rates):
+            sys.exit("bodies differ")
+        for name, fn in (("pandas + jsonify", pandas_body), ("rates_json", rates_json_body)):
+            best = min(timeit.repeat(lambda: fn(rates), number=5, repeat=5)) / 5
+            print(f"{name:>18}: {best * 1000:8.2f} ms for {num_bars} bars")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Unit tests import the modules under app/ directly. The MetaTrader5 package
+only exists on Windows; where it is missing a minimal stand-in with the
+constants the tested logic compares against is installed instead (calls
+into the terminal are never made by these tests, except through the
+fake_terminal fixture).
+"""
+import os
+import sys
+import types
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, 'app'))
+
+try:
+    import MetaTrader5  # noqa: F401
+except ImportError:
+    mt5 = types.ModuleType('MetaTrader5')
+    mt5.__dict__.update(
+        ORDER_TYPE_BUY=0, ORDER_TYPE_SELL=1, ORDER_TYPE_BUY_LIMIT=2, ORDER_TYPE_SELL_LIMIT=3,
+        ORDER_TYPE_BUY_STOP=4, ORDER_TYPE_SELL_STOP=5, ORDER_TYPE_BUY_STOP_LIMIT=6, ORDER_TYPE_SELL_STOP_LIMIT=7,
+        POSITION_TYPE_BUY=0, POSITION_TYPE_SELL=1,
+        TRADE_ACTION_DEAL=1, TRADE_ACTION_PENDING=5, TRADE_ACTION_SLTP=6, TRADE_ACTION_MODIFY=7, TRADE_ACTION_REMOVE=8,
+        ORDER_FILLING_FOK=0, ORDER_FILLING_IOC=1, ORDER_FILLING_RETURN=2,
+        ORDER_TIME_GTC=0, ORDER_TIME_DAY=1, ORDER_TIME_SPECIFIED=2,
+        TRADE_RETCODE_REQUOTE=10004, TRADE_RETCODE_DONE=10009, TRADE_RETCODE_PRICE_CHANGED=10020,
+        TRADE_RETCODE_PRICE_OFF=10021, TRADE_RETCODE_NO_CHANGES=10025, TRADE_RETCODE_INVALID_FILL=10030,
+    )
+    sys.modules['MetaTrader5'] = mt5
+
+import MetaTrader5 as mt5  # noqa: E402
+
+
+class Record:
+    """Stand-in for MT5's namedtuple-like records (TradePosition, TradeOrder, ...)."""
+
+    def __init__(self, **fields):
+        self._fields = fields
+        self.__dict__.update(fields)
+
+    def _asdict(self):
+        return dict(self._fields)
+
+
+class FakeTerminal:
+    """
+    positions_get/orders_get return the positions/orders dicts (ticket ->
+    fields) as records; order_send appends each request to sent and answers
+    with retcode.
+    """
+
+    def __init__(self):
+        self.positions = {}
+        self.orders = {}
+        self.sent = []
+        self.retcode = mt5.TRADE_RETCODE_DONE
+
+    def order_send(self, request):
+        self.sent.append(request)
+        return Record(retcode=self.retcode, comment='')
+
+
+@pytest.fixture
+def fake_terminal(monkeypatch):
+    terminal = FakeTerminal()
+    monkeypatch.setattr(mt5, 'positions_get', lambda: [Record(**p) for p in terminal.positions.values()], raising=False)
+    monkeypatch.setattr(mt5, 'orders_get', lambda: [Record(**o) for o in terminal.orders.values()], raising=False)
+    monkeypatch.setattr(mt5, 'order_send', terminal.order_send, raising=False)
+    return terminal
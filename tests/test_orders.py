@@ -0,0 +1,37 @@
+import collections
+
+import pytest
+
+import MetaTrader5 as mt5
+
+import orders
+
+Tick = collections.namedtuple('Tick', 'time_msc bid ask')
+
+
+def test_retry_policy_rejects_null_and_non_numbers():
+    for body in ({'max_attempts': None}, {'max_slippage': 'x'}, {'max_attempts': 0}):
+        with pytest.raises(ValueError):
+            orders.retry_policy(body)
+    assert orders.retry_policy({'deviation': 5}) == {'max_attempts': orders.MAX_ATTEMPTS, 'max_slippage': 5.0}
+
+
+@pytest.fixture
+def quotes(monkeypatch):
+    """Ticks returned by successive symbol_info_tick calls (the last one repeats)."""
+    ticks = []
+    monkeypatch.setattr(mt5, 'symbol_info_tick', lambda symbol: ticks.pop(0) if len(ticks) > 1 else ticks[0], raising=False)
+    monkeypatch.setattr(orders, 'REQUOTE_WAIT', 0.05)
+    return ticks
+
+
+def test_next_tick_waits_for_the_quote_to_change(quotes):
+    rejected = Tick(1000, 1.1, 1.1002)
+    quotes.extend([rejected, rejected, Tick(1000, 1.1001, 1.1003)])
+    assert orders._next_tick('EURUSD', rejected) == Tick(1000, 1.1001, 1.1003)
+
+
+def test_next_tick_gives_up_when_the_quote_does_not_move(quotes):
+    rejected = Tick(1000, 1.1, 1.1002)
+    quotes.append(rejected)
+    assert orders._next_tick('EURUSD', rejected) is None
@@ -0,0 +1,68 @@
+import pytest
+
+import MetaTrader5 as mt5
+
+import pending
+import symbols
+
+
+def _order(ticket, type_=mt5.ORDER_TYPE_BUY_LIMIT, magic=7, symbol='EURUSD', price=1.09, sl=1.08, tp=0.0):
+    return {'ticket': ticket, 'type': type_, 'magic': magic, 'symbol': symbol, 'price_open': price,
+            'price_stoplimit': 0.0, 'sl': sl, 'tp': tp, 'type_time': mt5.ORDER_TIME_GTC, 'time_expiration': 0}
+
+
+BOOK = [
+    _order(1),
+    _order(2, type_=mt5.ORDER_TYPE_SELL_LIMIT),
+    _order(3, magic=8),
+    _order(4, symbol='GBPUSD'),
+]
+
+
+def _tickets(orders):
+    return [order['ticket'] for order in orders]
+
+
+def test_select_filters():
+    assert _tickets(pending.select(BOOK, {'magic': 7, 'symbol': 'EURUSD', 'type': 'BUY_LIMIT'})) == [1]
+    assert _tickets(pending.select(BOOK, {'tickets': [2, 3, 99]})) == [2, 3]
+    assert _tickets(pending.select(BOOK, {})) == [1, 2, 3, 4]
+
+
+def test_select_empty_filters_match_nothing():
+    assert pending.select(BOOK, {'tickets': []}) == []
+    assert pending.select(BOOK, {'symbol': ''}) == []
+
+
+def test_select_rejects_unknown_type():
+    with pytest.raises(ValueError):
+        pending.select(BOOK, {'type': 'NOT_A_TYPE'})
+
+
+@pytest.fixture
+def terminal(fake_terminal, monkeypatch):
+    monkeypatch.setattr(symbols, 'get', lambda name: {'point': 0.0001, 'digits': 5, 'trade_stops_level': 0})
+    monkeypatch.setattr(pending.quotes, 'get_tick', lambda symbol: {'bid': 1.1, 'ask': 1.1001})
+    fake_terminal.orders.update((order['ticket'], order) for order in BOOK)
+    return fake_terminal.sent
+
+
+def test_shift_moves_price_and_stops(terminal):
+    results = pending.modify(filters={'tickets': [1]}, shift_points=-10)
+    assert results[0]['status'] == 'modified'
+    request = terminal[0]
+    assert request['action'] == mt5.TRADE_ACTION_MODIFY
+    assert (request['price'], request['sl'], request['tp']) == (pytest.approx(1.089), pytest.approx(1.079), 0.0)
+
+
+def test_no_op_changes_are_not_sent(terminal):
+    results = pending.modify({1: {'price': 1.09000001, 'sl': 1.08}, 3: {}})
+    assert [result['status'] for result in results] == ['unchanged', 'unchanged']
+    assert terminal == []
+
+
+def test_expiration_switches_to_specified(terminal):
+    results = pending.modify({1: {'expiration': 1900000000}, 99: {'price': 1.0}})
+    assert [result['status'] for result in results] == ['modified', 'not_found']
+    assert terminal[0]['type_time'] == mt5.ORDER_TIME_SPECIFIED
+    assert terminal[0]['expiration'] == 1900000000
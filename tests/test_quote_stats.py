@@ -0,0 +1,45 @@
+import pytest
+
+import quote_stats
+import symbols
+
+
+@pytest.fixture(autouse=True)
+def stats(monkeypatch):
+    monkeypatch.setattr(symbols, 'get', lambda name: {'point': 0.0001})
+    monkeypatch.setattr(quote_stats, '_stats', {})
+
+
+def _tick(spread_points):
+    return {'bid': 1.1, 'ask': 1.1 + spread_points * 0.0001, 'time_msc': 0}
+
+
+def test_old_origin_is_rescaled_instead_of_overflowing():
+    quote_stats._update('EURUSD', _tick(2), 0.0)
+    # About 800 windows later exp() of the weight exponent would overflow
+    later = 800 * quote_stats.WINDOW
+    quote_stats._update('EURUSD', _tick(5), later)
+    quote_stats._update('EURUSD', _tick(5), later + 1)
+    stats = quote_stats._stats['EURUSD']
+    assert stats['origin'] == later
+    assert stats['ticks'] == 3
+    assert stats['hist'].argmax() == 5
+    assert stats['hist'][2] == 0.0
+
+
+def test_failing_symbol_does_not_skip_the_batch(monkeypatch):
+    monkeypatch.setattr(quote_stats, '_swept_at', float('inf'))
+    # No ask: _update raises KeyError for BAD
+    quote_stats._on_ticks({'BAD': {'bid': 1.1}, 'EURUSD': _tick(3)})
+    assert quote_stats._stats['BAD']['spread'] is None
+    assert quote_stats._stats['EURUSD']['spread'] == 3
+
+
+def test_sweep_drops_symbols_no_longer_polled(monkeypatch):
+    quote_stats._update('EURUSD', _tick(2), 0.0)
+    quote_stats._update('GBPUSD', _tick(2), 0.0)
+    now = 10 * quote_stats.WINDOW
+    quotes = {'EURUSD': (now - 1.0, _tick(2)), 'GBPUSD': (0.0, _tick(2))}
+    monkeypatch.setattr(quote_stats.quotes, 'get_quote', quotes.get)
+    quote_stats._sweep(now)
+    assert list(quote_stats._stats) == ['EURUSD']
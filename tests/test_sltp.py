@@ -0,0 +1,71 @@
+import pytest
+
+import MetaTrader5 as mt5
+
+import sltp
+import symbols
+
+
+@pytest.fixture(autouse=True)
+def catalog(monkeypatch):
+    monkeypatch.setattr(symbols, 'get', lambda name: {'point': 0.0001, 'digits': 5})
+
+
+def _position(ticket, type_, price_open=1.1, sl=0.0, magic=7, symbol='EURUSD'):
+    return {'ticket': ticket, 'type': type_, 'price_open': price_open, 'sl': sl, 'tp': 0.0,
+            'magic': magic, 'symbol': symbol}
+
+
+def test_breakeven_only_tightens():
+    positions = [
+        _position(1, mt5.POSITION_TYPE_BUY),
+        _position(2, mt5.POSITION_TYPE_BUY, sl=1.105),
+        _position(3, mt5.POSITION_TYPE_SELL, sl=1.12),
+    ]
+    targets = sltp.rule_targets(positions, {'breakeven': True, 'offset_points': 10})
+    assert targets[1][0] == pytest.approx(1.101)
+    assert targets[2] == (None, None)
+    assert targets[3][0] == pytest.approx(1.099)
+
+
+def test_filters():
+    positions = [
+        _position(1, mt5.POSITION_TYPE_BUY, magic=7),
+        _position(2, mt5.POSITION_TYPE_SELL, magic=7),
+        _position(3, mt5.POSITION_TYPE_BUY, magic=8),
+        _position(4, mt5.POSITION_TYPE_BUY, magic=7, symbol='GBPUSD'),
+    ]
+    rule = {'magic': 7, 'symbol': 'EURUSD', 'order_type': 'BUY', 'breakeven': True}
+    assert list(sltp.rule_targets(positions, rule)) == [1]
+
+
+def test_distances_from_open_price():
+    positions = [_position(1, mt5.POSITION_TYPE_BUY), _position(2, mt5.POSITION_TYPE_SELL)]
+    targets = sltp.rule_targets(positions, {'sl_points': 50, 'tp_points': 100})
+    assert targets[1] == (pytest.approx(1.095), pytest.approx(1.11))
+    assert targets[2] == (pytest.approx(1.105), pytest.approx(1.09))
+
+
+@pytest.fixture
+def terminal(fake_terminal, monkeypatch):
+    """Positions seen by sltp.modify and the requests it sends."""
+    monkeypatch.setattr(sltp.quotes, 'get_tick', lambda symbol: {'bid': 1.12, 'ask': 1.1201})
+    monkeypatch.setattr(sltp.pretrade, 'check_sltp', lambda *args: None)
+    return fake_terminal.positions, fake_terminal.sent
+
+
+def test_modify_skips_no_op(terminal):
+    positions, sent = terminal
+    positions[1] = _position(1, mt5.POSITION_TYPE_BUY, sl=1.1)
+    results = sltp.modify({1: (1.10000004, None)})
+    assert results[0]['status'] == 'unchanged'
+    assert sent == []
+
+
+def test_modify_tighten_only_keeps_tighter_live_sl(terminal):
+    positions, sent = terminal
+    positions[1] = _position(1, mt5.POSITION_TYPE_BUY, sl=1.11)
+    positions[2] = _position(2, mt5.POSITION_TYPE_SELL, sl=1.13)
+    results = sltp.modify({1: (1.105, None), 2: (1.125, None)}, tighten_only=True)
+    assert [(r['ticket'], r['status'], r['sl']) for r in results] == [(1, 'unchanged', 1.11), (2, 'modified', 1.125)]
+    assert [request['position'] for request in sent] == [2]
@@ -0,0 +1,50 @@
+import pytest
+
+import trailing
+
+
+def _rule(mode='trailing', is_buy=True, sl=0.0, **params):
+    rule = {'mode': mode, 'is_buy': is_buy, 'price_open': 1.1, 'sl': sl, 'point': 0.0001, 'digits': 5}
+    if mode == 'trailing':
+        rule.update(distance_points=50, step_points=10, activation_points=0)
+    else:
+        rule.update(trigger_points=30, offset_points=0)
+    rule.update(params)
+    return rule
+
+
+def _tick(bid, spread=0.0001):
+    return {'bid': bid, 'ask': bid + spread}
+
+
+def test_trailing_follows_price_at_distance():
+    assert trailing._target(_rule(), _tick(1.1020)) == pytest.approx(1.0970)
+    assert trailing._target(_rule(is_buy=False), _tick(1.0979)) == pytest.approx(1.1030)
+
+
+def test_trailing_waits_for_activation():
+    rule = _rule(activation_points=20)
+    assert trailing._target(rule, _tick(1.1019)) is None
+    assert trailing._target(rule, _tick(1.1020)) == pytest.approx(1.0970)
+
+
+def test_trailing_moves_only_by_step():
+    rule = _rule(sl=1.0970)
+    assert trailing._target(rule, _tick(1.1029)) is None
+    assert trailing._target(rule, _tick(1.1030)) == pytest.approx(1.0980)
+    # Never loosens
+    assert trailing._target(rule, _tick(1.1000)) is None
+
+
+def test_breakeven_trigger_and_offset():
+    rule = _rule(mode='breakeven', offset_points=5)
+    assert trailing._target(rule, _tick(1.1029)) is None
+    assert trailing._target(rule, _tick(1.1030)) == pytest.approx(1.1005)
+    assert trailing._target(dict(rule, sl=1.1005), _tick(1.1050)) is None
+
+
+def test_breakeven_sell_uses_ask():
+    rule = _rule(mode='breakeven', is_buy=False)
+    # ask 1.0971 is 29 points in profit, ask 1.0970 is 30
+    assert trailing._target(rule, _tick(1.0970)) is None
+    assert trailing._target(rule, _tick(1.0969)) == pytest.approx(1.1)